@@ -0,0 +1,225 @@
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+import numpy as np
+import columnar
+import models
+
+# An append-only archive of the frame arrays (see columnar.py) of many demos, meant for analysis across a whole season of matches.
+# Each column is one flat binary file that every round's (frame x slot) block is appended to, and index.jsonl records where each round starts.
+# Readers memory-map the column files, so a round's arrays are views into the files - nothing is read until it is used,
+# and hundreds of demos take up no more RAM than the parts actually being looked at.
+
+INDEX_FILE_NAME: str = "index.jsonl"
+COLUMN_FILE_EXTENSION: str = ".bin"
+
+# Column name -> dtype of the (frame x slot) arrays
+CELL_COLUMNS: dict[str, type] = {
+    **{name: np.float64 for name in columnar.FLOAT_COLUMNS},
+    **{name: np.int32 for name in columnar.INT_COLUMNS},
+    "flags": columnar.FLAG_DTYPE,
+    "is_present": np.bool_,
+}
+# One value per frame
+FRAME_COLUMNS: dict[str, type] = {
+    "ticks": np.int64,
+}
+# One value per slot
+SLOT_COLUMNS: dict[str, type] = {
+    "slot_steam_ids": np.int64,
+    "slot_is_ct": np.bool_,
+}
+
+@dataclass
+class ArchivedRound:
+    """
+    One line of the archive's index
+    """
+    match_id: str
+    map_name: str
+    round_number: int
+    frame_count: int
+    slot_count: int
+    cell_offset: int # Where the round's block starts in the CELL_COLUMNS files (in elements, not bytes)
+    frame_offset: int # Where the round's ticks start in the FRAME_COLUMNS files
+    slot_offset: int # Where the round's slots start in the SLOT_COLUMNS files
+    first_tick: int | None
+    last_tick: int | None
+
+class FrameArchive:
+    """
+    A directory of memory-mappable frame arrays for many demos
+
+    Usage:
+        archive = FrameArchive("season_archive")
+        archive.add_demo(demo)
+        arrays = archive.get_round_arrays(match_id, round_number) # columnar.RoundFrameArrays backed by the archive files
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+        self.rounds: dict[tuple[str, int], ArchivedRound] = {}
+        self.memmaps: dict[str, np.memmap] = {}
+        index_file_path: str = os.path.join(directory, INDEX_FILE_NAME)
+        if os.path.isfile(index_file_path):
+            with open(index_file_path, "r", encoding="utf-8") as index_file:
+                lines: list[str] = index_file.read().split("\n")
+            if lines[-1] != "":
+                # The last line was cut off part way through being written (its round's data is cut off below too)
+                lines[-1] = ""
+                with open(index_file_path, "w", encoding="utf-8") as index_file:
+                    index_file.write("\n".join(lines))
+            for line in lines:
+                if line.strip() == "":
+                    continue
+                archived_round: ArchivedRound = ArchivedRound(**json.loads(line))
+                self.rounds[(archived_round.match_id, archived_round.round_number)] = archived_round
+        self._truncate_to_index()
+
+    def _get_indexed_length(self, column_name: str) -> int:
+        """
+        Returns the number of elements of a column file that the index accounts for
+        """
+        if column_name in CELL_COLUMNS:
+            return max((r.cell_offset + r.frame_count * r.slot_count for r in self.rounds.values()), default=0)
+        if column_name in FRAME_COLUMNS:
+            return max((r.frame_offset + r.frame_count for r in self.rounds.values()), default=0)
+        return max((r.slot_offset + r.slot_count for r in self.rounds.values()), default=0)
+
+    def _truncate_to_index(self) -> None:
+        """
+        Cuts every column file back to the end of the last indexed round
+        add_demo writes the data before the index, so a crash part way through leaves data in some column files that no round owns,
+        and the next demo's offsets (taken from the file lengths) would then point at different places in different columns
+        """
+        for column_name, dtype in {**CELL_COLUMNS, **FRAME_COLUMNS, **SLOT_COLUMNS}.items():
+            file_path: str = self.get_column_file_path(column_name)
+            indexed_size: int = self._get_indexed_length(column_name) * np.dtype(dtype).itemsize
+            file_size: int = os.path.getsize(file_path) if os.path.isfile(file_path) else 0
+            if file_size < indexed_size:
+                raise ValueError(f"{file_path} is shorter than the archive's index says it should be")
+            if file_size > indexed_size:
+                os.truncate(file_path, indexed_size)
+
+    def get_column_file_path(self, column_name: str) -> str:
+        return os.path.join(self.directory, column_name + COLUMN_FILE_EXTENSION)
+
+    def _get_file_length(self, column_name: str, dtype: type) -> int:
+        """
+        Returns the number of elements in a column file
+        """
+        file_path: str = self.get_column_file_path(column_name)
+        if os.path.isfile(file_path) is False:
+            return 0
+        return os.path.getsize(file_path) // np.dtype(dtype).itemsize
+
+    def get_match_ids(self) -> list[str]:
+        return list(dict.fromkeys(match_id for match_id, _ in self.rounds))
+
+    def has_match(self, match_id: str) -> bool:
+        return any(archived_match_id == match_id for archived_match_id, _ in self.rounds)
+
+    def add_demo(self, demo: models.Demo) -> bool:
+        """
+        Appends the frame arrays of every round of the demo to the archive
+        Returns False (and adds nothing) if a demo with the same match id is already in the archive
+        """
+        if self.has_match(demo.match_id):
+            return False
+        index_lines: list[str] = []
+        for round in demo.game_rounds:
+            arrays: columnar.RoundFrameArrays = columnar.build_round_frame_arrays(round)
+            column_arrays: dict[str, np.ndarray] = {
+                **{name: arrays.floats[name] for name in columnar.FLOAT_COLUMNS},
+                **{name: arrays.ints[name] for name in columnar.INT_COLUMNS},
+                "flags": arrays.flags,
+                "is_present": arrays.is_present,
+                "ticks": arrays.ticks,
+                "slot_steam_ids": arrays.slot_steam_ids,
+                "slot_is_ct": arrays.slot_is_ct,
+            }
+            archived_round: ArchivedRound = ArchivedRound(
+                match_id=demo.match_id,
+                map_name=demo.map_name,
+                round_number=round.round_number,
+                frame_count=arrays.frame_count,
+                slot_count=arrays.slot_count,
+                cell_offset=self._get_file_length("is_present", np.bool_),
+                frame_offset=self._get_file_length("ticks", np.int64),
+                slot_offset=self._get_file_length("slot_steam_ids", np.int64),
+                first_tick=int(arrays.ticks[0]) if arrays.frame_count > 0 else None,
+                last_tick=int(arrays.ticks[-1]) if arrays.frame_count > 0 else None,
+            )
+            for column_name, dtype in {**CELL_COLUMNS, **FRAME_COLUMNS, **SLOT_COLUMNS}.items():
+                with open(self.get_column_file_path(column_name), "ab") as column_file:
+                    column_file.write(np.ascontiguousarray(column_arrays[column_name], dtype=dtype).tobytes())
+            self.rounds[(archived_round.match_id, archived_round.round_number)] = archived_round
+            index_lines.append(json.dumps(asdict(archived_round)) + "\n")
+        # The index is only written once the data is, so readers never see a round whose arrays are incomplete
+        with open(os.path.join(self.directory, INDEX_FILE_NAME), "a", encoding="utf-8") as index_file:
+            index_file.writelines(index_lines)
+        # Existing memory maps don't cover what was just appended
+        self.memmaps.clear()
+        return True
+
+    def _get_memmap(self, column_name: str, dtype: type) -> np.ndarray:
+        if column_name not in self.memmaps:
+            if self._get_file_length(column_name, dtype) == 0:
+                # np.memmap can't map an empty file
+                self.memmaps[column_name] = np.zeros(0, dtype=dtype)
+            else:
+                self.memmaps[column_name] = np.memmap(self.get_column_file_path(column_name), dtype=dtype, mode="r")
+        return self.memmaps[column_name]
+
+    def get_column(self, column_name: str) -> np.ndarray:
+        """
+        Returns the whole memory-mapped column file (every round of every demo, one after the other)
+        """
+        for columns in (CELL_COLUMNS, FRAME_COLUMNS, SLOT_COLUMNS):
+            if column_name in columns:
+                return self._get_memmap(column_name, columns[column_name])
+        raise KeyError(f"{column_name} isn't an archived column, the options are {list({**CELL_COLUMNS, **FRAME_COLUMNS, **SLOT_COLUMNS}.keys())}")
+
+    def get_round_arrays(self, match_id: str, round_number: int) -> columnar.RoundFrameArrays:
+        """
+        Returns a round's frame arrays as (read-only) views into the memory-mapped column files
+        """
+        archived_round: ArchivedRound = self.rounds[(match_id, round_number)]
+        shape: tuple[int, int] = (archived_round.frame_count, archived_round.slot_count)
+        cell_start: int = archived_round.cell_offset
+        cell_end: int = cell_start + shape[0] * shape[1]
+
+        def get_cells(column_name: str) -> np.ndarray:
+            return self._get_memmap(column_name, CELL_COLUMNS[column_name])[cell_start:cell_end].reshape(shape)
+
+        return columnar.RoundFrameArrays(
+            ticks=self._get_memmap("ticks", np.int64)[archived_round.frame_offset:archived_round.frame_offset + shape[0]],
+            slot_steam_ids=self._get_memmap("slot_steam_ids", np.int64)[archived_round.slot_offset:archived_round.slot_offset + shape[1]],
+            slot_is_ct=self._get_memmap("slot_is_ct", np.bool_)[archived_round.slot_offset:archived_round.slot_offset + shape[1]],
+            is_present=get_cells("is_present"),
+            floats={name: get_cells(name) for name in columnar.FLOAT_COLUMNS},
+            ints={name: get_cells(name) for name in columnar.INT_COLUMNS},
+            flags=get_cells("flags"),
+        )
+
+    def find_frame(self, match_id: str, round_number: int, tick: int) -> tuple[columnar.RoundFrameArrays, int]:
+        """
+        Returns a round's frame arrays and the index of the last frame at or before the given tick
+        Raises KeyError if the round isn't archived and IndexError if the tick is before the round's first frame
+        """
+        arrays: columnar.RoundFrameArrays = self.get_round_arrays(match_id, round_number)
+        frame_index: int = int(np.searchsorted(arrays.ticks, tick, side="right")) - 1
+        if frame_index < 0:
+            raise IndexError(f"Tick {tick} is before the first frame of round {round_number} of {match_id}")
+        return (arrays, frame_index)
+
+    def iter_rounds(self, match_id: str | None = None) -> Iterator[tuple[ArchivedRound, columnar.RoundFrameArrays]]:
+        """
+        Yields (ArchivedRound, RoundFrameArrays) for every archived round (or every round of one match)
+        """
+        for (archived_match_id, round_number), archived_round in self.rounds.items():
+            if match_id is not None and archived_match_id != match_id:
+                continue
+            yield archived_round, self.get_round_arrays(archived_match_id, round_number)
@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import json
+import os
+from awpy.types import Game
+
+# Parsed demos are stored as gzipped (compact) JSON files named after a hash of the .dem file bytes and the parser parameters,
+# so re-running any analysis on a demo that has already been parsed skips the (very slow) awpy parse entirely.
+DEFAULT_CACHE_DIRECTORY: str = os.environ.get("CSGO_ANALYSIS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".csgo_analysis_cache"))
+DEFAULT_MAX_CACHE_SIZE_BYTES: int = 4 * 1024 * 1024 * 1024 # 4 GB
+CACHE_FILE_EXTENSION: str = ".json.gz"
+HASH_CHUNK_SIZE: int = 1024 * 1024
+
+def get_cache_key(demo_file_name: str, parser_parameters: dict) -> str:
+    """
+    Returns a key that identifies the parsed output of a demo file
+    The key is a hash of the demo file's contents (not its name or location) plus the parameters the parser is run with
+    """
+    hasher = hashlib.sha256()
+    with open(demo_file_name, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+    hasher.update(json.dumps(parser_parameters, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+def get_cache_file_path(cache_key: str, cache_directory: str = DEFAULT_CACHE_DIRECTORY) -> str:
+    """
+    Returns the path the cache entry for the given key is (or would be) stored at
+    """
+    return os.path.join(cache_directory, cache_key + CACHE_FILE_EXTENSION)
+
+def load_cached_game(cache_key: str, cache_directory: str = DEFAULT_CACHE_DIRECTORY) -> Game | None:
+    """
+    Returns the cached parser output for the given key, or None if it isn't cached
+    """
+    cache_file_path: str = get_cache_file_path(cache_key, cache_directory)
+    if os.path.isfile(cache_file_path) is False:
+        return None
+    try:
+        with gzip.open(cache_file_path, "rt", encoding="utf-8") as file:
+            game: Game = json.load(file)
+    except (OSError, EOFError, ValueError):
+        # A partially written or otherwise corrupt entry is treated as a miss (and thrown away)
+        os.remove(cache_file_path)
+        return None
+    # Bump the modification time so eviction treats this entry as recently used
+    os.utime(cache_file_path)
+    return game
+
+def save_game_to_cache(
+    cache_key: str,
+    game: Game,
+    cache_directory: str = DEFAULT_CACHE_DIRECTORY,
+    max_cache_size_bytes: int = DEFAULT_MAX_CACHE_SIZE_BYTES
+    ) -> None:
+    """
+    Stores parser output in the cache, then evicts old entries if the cache has grown past max_cache_size_bytes
+    """
+    os.makedirs(cache_directory, exist_ok=True)
+    cache_file_path: str = get_cache_file_path(cache_key, cache_directory)
+    # Write to a temporary file first so that a crash (or another process reading the cache) never sees a half-written entry
+    temporary_file_path: str = f"{cache_file_path}.{os.getpid()}.tmp"
+    with gzip.open(temporary_file_path, "wt", encoding="utf-8") as file:
+        json.dump(game, file, separators=(",", ":"))
+    os.replace(temporary_file_path, cache_file_path)
+    evict_cache_entries(cache_directory, max_cache_size_bytes)
+
+def evict_cache_entries(cache_directory: str = DEFAULT_CACHE_DIRECTORY, max_cache_size_bytes: int = DEFAULT_MAX_CACHE_SIZE_BYTES) -> None:
+    """
+    Deletes the least recently used cache entries until the total size of the cache is at most max_cache_size_bytes
+    """
+    if os.path.isdir(cache_directory) is False:
+        return
+    # (last used time, size, path) of every entry - another process (i.e. a batch mode worker) can evict an entry at any time,
+    # so entries that are gone by the time they are looked at are skipped
+    entries: list[tuple[float, int, str]] = []
+    for entry in os.scandir(cache_directory):
+        if entry.name.endswith(CACHE_FILE_EXTENSION) is False:
+            continue
+        try:
+            entry_stat: os.stat_result = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+    entries.sort()
+    total_size: int = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total_size <= max_cache_size_bytes:
+            break
+        total_size -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process evicted it first
+            pass
+
+def clear_cache(cache_directory: str = DEFAULT_CACHE_DIRECTORY) -> None:
+    """
+    Deletes every entry in the cache
+    """
+    evict_cache_entries(cache_directory, max_cache_size_bytes=0)
@@ -0,0 +1,97 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+import numpy as np
+
+# The same few dozen strings (player names, team names, "CT"/"T", weapon names and classes) are repeated on every
+# player frame state, kill, damage and weapon fire in a demo.
+# This module dictionary-encodes those columns: each distinct string gets an integer code in a SymbolTable,
+# so a column becomes one small integer array and comparing/grouping rows compares integers instead of strings.
+# The codes are kept where the rows are already columns: RoundFrameArrays.codes (columnar.py, with a DemoSymbols per demo),
+# the string columns of an EventStore (tables.py) and the string table of a snapshot file (snapshots.py).
+# The models objects themselves keep their strings.
+
+# Code used for None (i.e. the assister of an unassisted kill)
+MISSING_CODE: int = -1
+
+# The models fields that hold a player's name
+# (listed rather than matched by a "_name" suffix, since weapon_name, team_name, map_name and client_name aren't player names)
+PLAYER_NAME_FIELDS: set[str] = {
+    "name", "player_name", "attacker_name", "assister_name", "victim_name", "flash_thrower_name", "thrower_name", "player_traded_name",
+}
+
+class SymbolTable:
+    """
+    Two-way map between strings and the integer codes they are stored as
+    Codes are assigned in the order strings are first seen, starting from 0
+    """
+
+    def __init__(self, values: Sequence[str] = ()) -> None:
+        self.values: list[str] = []
+        self.codes: dict[str, int] = {}
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value: str | None) -> int:
+        """
+        Returns the code for the string, adding it to the table if it hasn't been seen before
+        """
+        if value is None:
+            return MISSING_CODE
+        code: int | None = self.codes.get(value, None)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int) -> str | None:
+        if code == MISSING_CODE:
+            return None
+        return self.values[code]
+
+    def get_code(self, value: str) -> int:
+        """
+        Returns the code for a string without adding it to the table (raises KeyError if the string has never been seen)
+        """
+        return self.codes[value]
+
+    def encode_column(self, values: Sequence[str | None]) -> np.ndarray:
+        return np.array([self.encode(value) for value in values], dtype=np.int32)
+
+    def decode_column(self, codes: np.ndarray) -> list[str | None]:
+        return [self.decode(code) for code in codes.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return f"SymbolTable({len(self)} values)"
+
+@dataclass
+class DemoSymbols:
+    """
+    The symbol tables shared by every round of one demo
+    """
+    player_names: SymbolTable = field(default_factory=SymbolTable)
+    team_names: SymbolTable = field(default_factory=SymbolTable)
+    # Seeded so that CT is always 0 and T is always 1
+    sides: SymbolTable = field(default_factory=lambda: SymbolTable(["CT", "T"]))
+    weapons: SymbolTable = field(default_factory=SymbolTable)
+    weapon_classes: SymbolTable = field(default_factory=SymbolTable)
+
+    def get_table(self, field_name: str) -> SymbolTable | None:
+        """
+        Returns the table that a models field is encoded with (None for fields that aren't categorical)
+        i.e. "attacker_name" -> player_names, "victim_side" -> sides, "active_weapon" -> weapons
+        """
+        if field_name in ("weapon", "active_weapon", "weapon_name"):
+            return self.weapons
+        if field_name == "weapon_class":
+            return self.weapon_classes
+        if field_name in PLAYER_NAME_FIELDS:
+            return self.player_names
+        if field_name in ("team", "team_name") or field_name.endswith("_team"):
+            return self.team_names
+        if field_name == "side" or field_name.endswith("_side"):
+            return self.sides
+        return None
@@ -3,17 +3,77 @@ import models
 import timelining
 import plotting
 import mathing
+import resampling
+import streaming
+import tables
+import parallelizing
+import inventories
+import timeline_files
+import windowing
 from tqdm import tqdm
 import networkx as nx
 import tkinter as tk
 from tkinter import filedialog
 import os
+import sys
 import csv
-from dataclasses import fields
+import glob
+import time
+import argparse
+import contextlib
+import typing
+import heapq
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, fields
 import shutil
 from parsing_2 import WritableRoundRow, RoundInfo, PlayerInfo, AvailableUtility, PerformanceScore, FrameInfo
 import awpy.types
 
+class TimelineCsvWriter:
+    """
+    Writes events to events.csv and a human readable description of every event to event_descriptions.csv as they are created,
+    so the whole timeline never has to be held in memory
+    events.csv has a column for every field of every event class (left empty when an event doesn't have that field)
+    """
+
+    def __init__(self, output_directory: str) -> None:
+        self.events_file_name: str = f"{output_directory}/events.csv"
+        self.event_descriptions_file_name: str = f"{output_directory}/event_descriptions.csv"
+        self.field_names: list[str] = timelining.get_event_field_names()
+        self.events_file = open(self.events_file_name, "w")
+        self.event_descriptions_file = open(self.event_descriptions_file_name, "w")
+        self.events_writer = csv.writer(self.events_file)
+        self.event_descriptions_writer = csv.writer(self.event_descriptions_file)
+        self.events_writer.writerow(self.field_names)
+        self.event_descriptions_writer.writerow(["tick", "name", "description"])
+
+    def write_events(self, events: Iterable[timelining.Event]) -> None:
+        for event in events:
+            self.events_writer.writerow([getattr(event, field, None) for field in self.field_names])
+            self.event_descriptions_writer.writerow([event.tick, event.__class__.__name__, str(event)])
+
+    def close(self) -> None:
+        self.events_file.close()
+        self.event_descriptions_file.close()
+
+    def __enter__(self) -> "TimelineCsvWriter":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+def write_timeline_csvs(timeline: timelining.Timeline, output_directory: str, verbose: bool = True) -> None:
+    """
+    Save the event timeline (events.csv) and a human readable description of every event (event_descriptions.csv)
+    """
+    with TimelineCsvWriter(output_directory) as timeline_writer:
+        if verbose:
+            print(f"Saving event timeline to {timeline_writer.events_file_name} and event descriptions to {timeline_writer.event_descriptions_file_name}")
+        timeline_writer.write_events(timeline.events)
+    if verbose:
+        print("Event timeline and event descriptions saved.")
+
 def extract_demo_data() -> None:
     """
     Run the main 'extract data' routine in console mode
@@ -44,34 +104,20 @@ def extract_demo_data() -> None:
 
     print("Beginning data extraction...")
     print(f"Loading demo file at {input_file_path}, please wait...")
-    parsed_demo_data = parsing.parse_demo_file(input_file_path)
-    demo: models.Demo = models.deserialize_demo_data(parsed_demo_data)
+    # The demo is streamed one round at a time (timeline, vision, and .csv writing all happen per round) to keep memory use bounded
+    demo_json_file_path: str = parsing.parse_demo_file_to_json(input_file_path)
+    demo_stream = streaming.DemoStream(demo_json_file_path)
+    demo: models.Demo = demo_stream.get_demo()
     print("Loaded demo file.")
-    print("Creating event timeline.")
-    timeline: timelining.Timeline = timelining.create_timeline(demo)
-    print("Demo analyzed, timeline created.")
 
-    events_file_name: str = f"{output_directory}/events.csv"
-    print(f"Saving event timeline to {events_file_name}")
-    with open(events_file_name, "w") as file:
-        writer = csv.writer(file)
-        all_fields: list[str] = []
-        for event in timeline.events:
-            all_fields.extend([field.name for field in fields(event)])
-        unique_fields = list(dict.fromkeys(all_fields))
-        writer.writerow([field for field in unique_fields])
-        for event in timeline.events:
-            writer.writerow([getattr(event, field, None) for field in unique_fields])
-    print("Event timeline saved.")
-
-    event_descriptions_file_name: str = f"{output_directory}/event_descriptions.csv"
-    print(f"Saving event descriptions to {event_descriptions_file_name}")
-    with open(event_descriptions_file_name, "w") as file:
-        writer = csv.writer(file)
-        writer.writerow(["tick", "name", "description"])
-        for event in timeline.events:
-            writer.writerow([event.tick, event.__class__.__name__, str(event)])
-    print("Event descriptions saved.")
+    timeline_writer = TimelineCsvWriter(output_directory)
+    timeline_file_writer = timeline_files.TimelineFileWriter(
+        f"{output_directory}/events{timeline_files.TIMELINE_FILE_EXTENSION}",
+        {"demo_file_path": input_file_path, "match_id": demo.match_id, "map_name": demo.map_name},
+    )
+    print(f"Saving event timeline to {timeline_writer.events_file_name} (and {timeline_file_writer.file_path} for reloading it) and event descriptions to {timeline_writer.event_descriptions_file_name} as each round is analyzed")
+    # Connection events can happen at any point in the match, so they are merged into each round's events as the rounds go by
+    pending_connection_events: list[timelining.PlayerConnectionEvent] = sorted(timelining.create_connection_events(demo), key=lambda event: event.tick)
 
     print("Calculating frame-specific data and saving frame images for every round in the game.")
     print("This might take a while. Go do something else while you wait!")
@@ -82,11 +128,20 @@ def extract_demo_data() -> None:
     print(f"Saving to {rounds_folder}")
     # Moved this dictionary out here because now it will track controlled_area_sizes for the whole game instead of one round
     controlled_area_sizes: dict[int, dict[str, float]] = {}
-    for round_index, round in enumerate(demo.game_rounds):
+    for round_index, round in enumerate(demo_stream.iter_rounds()):
         round_number = round_index + 1
+
+        round_events: Iterator[timelining.Event] = timelining.iter_round_events(round)
+        round_connection_events: list[timelining.PlayerConnectionEvent] = [event for event in pending_connection_events if event.tick <= round.end_official_tick]
+        pending_connection_events = pending_connection_events[len(round_connection_events):]
+        merged_round_events: list[timelining.Event] = list(heapq.merge(round_connection_events, round_events, key=lambda event: event.tick))
+        timeline_writer.write_events(merged_round_events)
+        timeline_file_writer.write_chunk(merged_round_events)
+        print(f"Saved timeline events for round {round_number}.")
+
         vision_graphs: list[nx.Graph] = []
         vision_traces: list[dict[int, mathing.VisionTraceResults]] = []
-        with tqdm(total=len(round.frames), desc=f"Calculating frame vision information for round {round_index+1}/{len(demo.game_rounds)}: ") as progress_bar:
+        with tqdm(total=len(round.frames), desc=f"Calculating frame vision information for round {round_number}: ") as progress_bar:
             for frame in round.frames:
                 vision_graph: nx.Graph
                 trace_results: dict[int, mathing.VisionTraceResults]
@@ -120,48 +175,35 @@ def extract_demo_data() -> None:
                 writer.writerow([tick, controlled_area_size_dict["CT"], controlled_area_size_dict["T"]])
         print("Area controlled data saved.")
 
+    timeline_writer.write_events(pending_connection_events)
+    timeline_writer.close()
+    timeline_file_writer.write_chunk(pending_connection_events)
+    timeline_file_writer.close()
+    demo_stream.close()
+    print("Event timeline and event descriptions saved.")
+
     print(f"Done saving the game! Check the {output_directory} folder for the output files.")
 
 
-def parsing_2() -> None:
+def write_round_csvs(
+    game_data: awpy.types.Game,
+    output_directory: str,
+    intervals_seconds: list[int] = resampling.DEFAULT_INTERVALS_SECONDS,
+    verbose: bool = True
+    ) -> None:
     """
-    Run the main 'extract data' routine in console mode
+    Save one .csv file per round containing economy, utility, player movement, and player performance data for every frame
+    Also saves a round_N_Xs.csv file per round for each interval in intervals_seconds, containing one frame every X seconds
     """
-
-    root = tk.Tk()
-    # To open file dialog in a new window on top of everything else instead of behind everything else
-    root.wm_attributes('-topmost', 1)
-    root.withdraw()
-
-    print("Select the .dem file from which you would like to extract the data (see new window):")
-    input_file_path = filedialog.askopenfilename(title="Open a .dem file",filetypes=[("demo files", "*.dem")])
-    if input_file_path == "":
-        print("No file selected, cancelling.")
-        return
-    print("Extracting data from file: " + input_file_path)
-
-    print("Select the directory in which you would like to save the .csv files (see new window):")
-    output_directory = filedialog.askdirectory(initialdir=os.getcwd(), title="Choose where you want the .csv and .gif files to be saved:")
-    if output_directory == "":
-        print("No directory selected, cancelling.")
-        return
-    print("Saving data to directory: " + output_directory)
-
-    if os.path.isdir(output_directory) is False:
-        print("Output directory does not exist. Creating directory.")
-        os.mkdir(output_directory)
-
-    print("Beginning data extraction...")
-    print(f"Loading demo file at {input_file_path}, please wait...")
-    game_data = parsing.parse_demo_file(input_file_path)
-    print("Loaded demo file.")
-    print("Compartmentalizing round-specific information.")
+    if verbose:
+        print("Compartmentalizing round-specific information.")
 
     all_round_info: list[RoundInfo] = []
 
-    for round_index, game_round in enumerate(tqdm(game_data["gameRounds"])):
+    for round_index, game_round in enumerate(tqdm(game_data["gameRounds"], disable=not verbose)):
 
-        tqdm.write(f"Processing round {round_index}")
+        if verbose:
+            tqdm.write(f"Processing round {round_index}")
 
         round_info: RoundInfo = {
             "roundNumber": game_round["roundNum"],
@@ -206,7 +248,15 @@ def parsing_2() -> None:
             round_info["performanceScores"].append(performance_info)
             
 
-        for frame_index, frame in enumerate(game_round["frames"]):
+        # Every player's inventory on every frame (in the same order as the loop below goes through them) as count vectors,
+        # to count decoy grenades because AWPY doesn't provide that information
+        round_inventories: inventories.InventoryArrays = inventories.InventoryArrays.from_json_inventories([
+            player_info["inventory"] for frame in game_round["frames"] or [] for player_info in frame["ct"]["players"] + frame["t"]["players"]
+        ])
+        decoy_counts: list[int] = round_inventories.get_utility_count("Decoy Grenade").tolist()
+        player_row: int = 0
+
+        for frame_index, frame in enumerate(game_round["frames"] or []):
             frame_info: FrameInfo = {
                 "frameNumber": frame_index,
                 "tick": frame["tick"],
@@ -244,15 +294,13 @@ def parsing_2() -> None:
                     
                     player_data["availableUtilities"].append(available_utility)
 
-                # Manually check for decoy grenades because AWPY doesn't provide that information
-                if player_info["inventory"] is not None:
-                    for weapon in player_info["inventory"]:
-                        if weapon["weaponName"] == "Decoy Grenade":
-                            available_utility: AvailableUtility = {
-                                "name": "decoyGrenades",
-                                "quantity": weapon["ammoInMagazine"],
-                            }
-                            player_data["availableUtilities"].append(available_utility)
+                if decoy_counts[player_row] > 0:
+                    available_utility: AvailableUtility = {
+                        "name": "decoyGrenades",
+                        "quantity": decoy_counts[player_row],
+                    }
+                    player_data["availableUtilities"].append(available_utility)
+                player_row += 1
 
                 frame_info["playerInfo"].append(player_data)
 
@@ -260,11 +308,13 @@ def parsing_2() -> None:
 
         all_round_info.append(round_info)
 
-    writable_round_rows: list[list[WritableRoundRow]] = []
+    # Rows are grouped by round and then by frame so that coarser interval views can pick out whole frames
+    writable_round_rows: list[list[list[WritableRoundRow]]] = []
     
     for round_info in all_round_info:
-        round_rows: list[WritableRoundRow] = []
+        round_rows: list[list[WritableRoundRow]] = []
         for frame_info in round_info["frameInfo"]:
+            frame_rows: list[WritableRoundRow] = []
             for player_info in frame_info["playerInfo"]:
 
                 performance_score_info = [score_dict for score_dict in round_info["performanceScores"] if score_dict["playerName"] == player_info["playerName"]][0]
@@ -294,25 +344,42 @@ def parsing_2() -> None:
                     "armorDamageDealtInRound": performance_score_info["armorDamageDealt"]
                 }
 
-                round_rows.append(round_row)
+                frame_rows.append(round_row)
+            round_rows.append(frame_rows)
         writable_round_rows.append(round_rows)  
 
-    print("Writing round-specific information to csv files.")
-
-    for round_index, round_rows in enumerate(tqdm(writable_round_rows)):
-        csv_file_name: str = f"{output_directory}/round_{round_index}.csv"
-        with open(csv_file_name, "w", newline="") as file:
-            writer = csv.writer(file)
-            all_fields: list[str] = [key for key in list(WritableRoundRow.__annotations__.keys())]
-            writer.writerow(all_fields)
-            for row in round_rows:
-                writer.writerow([row[key] for key in row])
-        tqdm.write(f"Saved csv file for round {round_index} at {csv_file_name}")
-
-    print("Writing round-specific action information to csv files.")
+    if verbose:
+        print("Writing round-specific information to csv files.")
+
+    all_fields: list[str] = [key for key in list(WritableRoundRow.__annotations__.keys())]
+    for round_index, (round_info, round_rows) in enumerate(tqdm(list(zip(all_round_info, writable_round_rows)), disable=not verbose)):
+        # The coarser intervals are views over the same rows, so they come from the one parse without copying anything
+        round_ticks: list[int] = [frame_info["tick"] for frame_info in round_info["frameInfo"]]
+        round_views: dict[str, Sequence[list[WritableRoundRow]]] = {"": round_rows}
+        for interval_seconds in intervals_seconds:
+            interval_indices: list[int] = resampling.get_interval_frame_indices(round_ticks, game_data["tickRate"], interval_seconds)
+            round_views[f"_{interval_seconds}s"] = resampling.FrameView(round_rows, interval_indices)
+
+        for file_suffix, round_view in round_views.items():
+            csv_file_name: str = f"{output_directory}/round_{round_index}{file_suffix}.csv"
+            with open(csv_file_name, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(all_fields)
+                for frame_rows in round_view:
+                    for row in frame_rows:
+                        writer.writerow([row[key] for key in row])
+            if verbose:
+                tqdm.write(f"Saved csv file for round {round_index} at {csv_file_name}")
+
+def write_round_action_csvs(game_data: awpy.types.Game, output_directory: str, verbose: bool = True) -> None:
+    """
+    Save one .csv file per round containing the kills, damages, bomb events, and start/end ticks of the round
+    """
+    if verbose:
+        print("Writing round-specific action information to csv files.")
 
     # Per round, read kills, damages, bombEvents, startTick, endTick, endOfficialTick (and initial player money if possible)
-    for round_index, game_round in enumerate(tqdm(game_data["gameRounds"])):
+    for round_index, game_round in enumerate(tqdm(game_data["gameRounds"], disable=not verbose)):
         kills: list[awpy.types.KillAction] = game_round["kills"]
         damages: list[awpy.types.DamageAction] = game_round["damages"]
         bomb_events: list[awpy.types.BombAction] = game_round["bombEvents"]
@@ -362,12 +429,249 @@ def parsing_2() -> None:
                 default_dict.update(obj)
                 writer.writerow(default_dict)
 
+def parsing_2(outputs: list[str] = ["round_csvs", "round_action_csvs"]) -> None:
+    """
+    Run the main 'extract data' routine in console mode
+    outputs can be used to only create some of the .csv files - if only round_action_csvs are wanted the demo is parsed without frames
+    """
+
+    root = tk.Tk()
+    # To open file dialog in a new window on top of everything else instead of behind everything else
+    root.wm_attributes('-topmost', 1)
+    root.withdraw()
+
+    print("Select the .dem file from which you would like to extract the data (see new window):")
+    input_file_path = filedialog.askopenfilename(title="Open a .dem file",filetypes=[("demo files", "*.dem")])
+    if input_file_path == "":
+        print("No file selected, cancelling.")
+        return
+    print("Extracting data from file: " + input_file_path)
+
+    print("Select the directory in which you would like to save the .csv files (see new window):")
+    output_directory = filedialog.askdirectory(initialdir=os.getcwd(), title="Choose where you want the .csv and .gif files to be saved:")
+    if output_directory == "":
+        print("No directory selected, cancelling.")
+        return
+    print("Saving data to directory: " + output_directory)
+
+    if os.path.isdir(output_directory) is False:
+        print("Output directory does not exist. Creating directory.")
+        os.mkdir(output_directory)
+
+    print("Beginning data extraction...")
+    print(f"Loading demo file at {input_file_path}, please wait...")
+    game_data = parsing.parse_demo_file(input_file_path, **parsing.get_parser_options(outputs))
+    print("Loaded demo file.")
+    if "round_csvs" in outputs:
+        write_round_csvs(game_data=game_data, output_directory=output_directory)
+    if "round_action_csvs" in outputs:
+        write_round_action_csvs(game_data=game_data, output_directory=output_directory)
+
     print(f"Done writing csv files. Check the {output_directory} folder for the output files.")
     
+# The outputs batch mode can create (see parsing.OUTPUT_SECTIONS) - the vision output is too slow to be worth batching
+BATCH_OUTPUTS: list[str] = ["timeline", "round_csvs", "round_action_csvs", "event_tables", "timeline_file", "windowed_stats"]
+# What batch mode creates when no outputs are chosen
+DEFAULT_BATCH_OUTPUTS: list[str] = ["timeline", "round_csvs", "round_action_csvs"]
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of processing one demo file in batch mode
+    """
+    demo_file_path: str
+    output_directory: str
+    succeeded: bool
+    seconds_taken: float
+    error: str | None = None
+
+def find_demo_files(path_or_pattern: str) -> list[str]:
+    """
+    Returns the .dem files in a directory, or the files matching a glob pattern (i.e. "demos/**/*.dem")
+    """
+    if os.path.isdir(path_or_pattern):
+        return sorted(glob.glob(os.path.join(path_or_pattern, "*.dem")))
+    return sorted(glob.glob(path_or_pattern, recursive=True))
+
+def get_demo_output_directories(demo_file_paths: list[str], output_directory: str) -> dict[str, str]:
+    """
+    Returns the folder inside output_directory that each demo's output is saved to
+    Each folder is named after the demo file, under the same subfolders the demo is in (relative to the folder all of the demos are in),
+    so demos with the same name in different folders (i.e. from a recursive glob) don't overwrite each other's output
+    """
+    if len(demo_file_paths) == 0:
+        return {}
+    demo_directories: list[str] = [os.path.dirname(os.path.abspath(demo_file_path)) for demo_file_path in demo_file_paths]
+    try:
+        root_directory: str | None = os.path.commonpath(demo_directories)
+    except ValueError:
+        # Demos on different drives have no folder in common
+        root_directory = None
+    demo_output_directories: dict[str, str] = {}
+    for demo_file_path, demo_directory in zip(demo_file_paths, demo_directories):
+        relative_directory: str
+        if root_directory is None:
+            drive, path = os.path.splitdrive(demo_directory)
+            relative_directory = os.path.join(drive.strip(":\\/"), path.lstrip("\\/"))
+        else:
+            relative_directory = os.path.relpath(demo_directory, root_directory)
+        demo_name: str = os.path.splitext(os.path.basename(demo_file_path))[0]
+        demo_output_directories[demo_file_path] = os.path.normpath(os.path.join(output_directory, relative_directory, demo_name))
+    return demo_output_directories
+
+def process_demo_headless(demo_file_path: str, output_directory: str, outputs: list[str] = DEFAULT_BATCH_OUTPUTS, round_worker_count: int = 1) -> BatchResult:
+    """
+    Parse a demo file and save the requested outputs (see BATCH_OUTPUTS) to output_directory
+    The parser only parses the parts of the demo the requested outputs need (i.e. no frames for just round_action_csvs)
+    With a round_worker_count above 1 the timeline's rounds are spread over that many worker processes (see parallelizing.iter_timeline_in_parallel)
+    Never opens a dialog or prints progress bars, so it is safe to run in a worker process
+    Exceptions are caught and reported in the returned BatchResult instead of being raised
+    """
+    start_time: float = time.perf_counter()
+    try:
+        os.makedirs(output_directory, exist_ok=True)
+        game_data = parsing.parse_demo_file(demo_file_path, **parsing.get_parser_options(outputs))
+        is_timeline_needed: bool = any(output in outputs for output in ("timeline", "timeline_file", "windowed_stats"))
+        if "event_tables" in outputs or (is_timeline_needed and round_worker_count <= 1):
+            demo: models.Demo = models.deserialize_demo_data(game_data)
+        if is_timeline_needed:
+            timeline_events: Iterator[timelining.Event]
+            if round_worker_count > 1:
+                timeline_events = parallelizing.iter_timeline_in_parallel(game_data, round_worker_count)
+            else:
+                timeline_events = timelining.iter_timeline(demo)
+            # Every timeline output is written from one pass over the events
+            with contextlib.ExitStack() as exit_stack:
+                timeline_consumers: list[typing.Callable[[Iterable[timelining.Event]], None]] = []
+                if "timeline" in outputs:
+                    timeline_consumers.append(exit_stack.enter_context(TimelineCsvWriter(output_directory)).write_events)
+                if "timeline_file" in outputs:
+                    timeline_consumers.append(exit_stack.enter_context(timeline_files.TimelineFileWriter(
+                        f"{output_directory}/events{timeline_files.TIMELINE_FILE_EXTENSION}",
+                        {"demo_file_path": demo_file_path, "match_id": game_data.get("matchID", None), "map_name": game_data.get("mapName", None)},
+                    )).write_events)
+                if "windowed_stats" in outputs:
+                    window_aggregator: windowing.WindowAggregator = windowing.WindowAggregator(game_data["tickRate"])
+                    timeline_consumers.append(window_aggregator.add_events)
+                for event in timeline_events:
+                    for timeline_consumer in timeline_consumers:
+                        timeline_consumer((event,))
+            if "windowed_stats" in outputs:
+                window_aggregator.get_stats().write_csv(f"{output_directory}/windowed_stats.csv")
+        if "event_tables" in outputs:
+            tables.build_event_store(demo).write_csvs(f"{output_directory}/event_tables")
+        if "round_csvs" in outputs:
+            write_round_csvs(game_data=game_data, output_directory=output_directory, verbose=False)
+        if "round_action_csvs" in outputs:
+            write_round_action_csvs(game_data=game_data, output_directory=output_directory, verbose=False)
+    except Exception as error:
+        return BatchResult(
+            demo_file_path=demo_file_path,
+            output_directory=output_directory,
+            succeeded=False,
+            seconds_taken=time.perf_counter() - start_time,
+            error=f"{error.__class__.__name__}: {error}",
+        )
+    return BatchResult(
+        demo_file_path=demo_file_path,
+        output_directory=output_directory,
+        succeeded=True,
+        seconds_taken=time.perf_counter() - start_time,
+    )
+
+def batch_extract_demo_data(
+    demo_file_paths: list[str],
+    output_directory: str,
+    worker_count: int | None = None,
+    outputs: list[str] = DEFAULT_BATCH_OUTPUTS,
+    round_worker_count: int = 1,
+    ) -> list[BatchResult]:
+    """
+    Run the headless extraction routine on many demo files using a pool of worker processes
+    Each demo's timeline can also be spread over round_worker_count processes of its own, which helps when there are fewer demos than CPUs
+    Each demo's output is saved to its own folder inside output_directory (see get_demo_output_directories)
+    A summary of every demo's success or failure is saved to batch_summary.csv in output_directory
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    demo_output_directories: dict[str, str] = get_demo_output_directories(demo_file_paths, output_directory)
+    results: list[BatchResult] = []
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        futures: dict[Future, str] = {
+            executor.submit(process_demo_headless, demo_file_path, demo_output_directories[demo_file_path], outputs, round_worker_count): demo_file_path
+            for demo_file_path in demo_file_paths
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing demo files: "):
+            demo_file_path: str = futures[future]
+            try:
+                result: BatchResult = future.result()
+            except Exception as exception:
+                # process_demo_headless catches its own errors, so this is the worker process itself dying (i.e. running out of memory),
+                # which breaks the pool and fails every demo that hadn't finished yet
+                result = BatchResult(demo_file_path, demo_output_directories[demo_file_path], False, 0.0, f"{type(exception).__name__}: {exception}")
+            if result.succeeded:
+                tqdm.write(f"OK     {result.demo_file_path} ({result.seconds_taken:.1f}s) -> {result.output_directory}")
+            else:
+                tqdm.write(f"FAILED {result.demo_file_path} ({result.seconds_taken:.1f}s): {result.error}")
+            results.append(result)
+
+    # Report in the same order the demos were given in rather than the order they finished in
+    demo_order: dict[str, int] = {demo_file_path: index for index, demo_file_path in enumerate(demo_file_paths)}
+    results.sort(key=lambda result: demo_order[result.demo_file_path])
+    summary_file_name: str = f"{output_directory}/batch_summary.csv"
+    with open(summary_file_name, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([field.name for field in fields(BatchResult)])
+        for result in results:
+            writer.writerow([getattr(result, field.name) for field in fields(BatchResult)])
+
+    failure_count: int = len([result for result in results if result.succeeded is False])
+    print(f"Processed {len(results)} demo files: {len(results) - failure_count} succeeded, {failure_count} failed.")
+    print(f"Summary saved to {summary_file_name}")
+    return results
+
+def batch_main(arguments: list[str]) -> None:
+    """
+    Launch the non-interactive batch version of the program
+    """
+    argument_parser = argparse.ArgumentParser(description="Extract timeline and per-round .csv files from many .dem files without any dialogs.")
+    argument_parser.add_argument("demos", help="A directory containing .dem files, or a glob pattern matching .dem files")
+    argument_parser.add_argument("-o", "--output", required=True, help="The directory to save each demo's output folder in")
+    argument_parser.add_argument("-w", "--workers", type=int, default=None, help="The number of worker processes to use (defaults to the number of CPUs)")
+    argument_parser.add_argument(
+        "--outputs",
+        nargs="+",
+        choices=BATCH_OUTPUTS,
+        default=DEFAULT_BATCH_OUTPUTS,
+        help="Which outputs to create - demos are parsed without frames when none of the outputs need them, which is much faster",
+    )
+    argument_parser.add_argument(
+        "--round-workers",
+        type=int,
+        default=1,
+        help="The number of worker processes each demo's timeline rounds are spread over (worth raising above 1 when there are fewer demos than CPUs, i.e. a single series)",
+    )
+    parsed_arguments = argument_parser.parse_args(arguments)
+
+    demo_file_paths: list[str] = find_demo_files(parsed_arguments.demos)
+    if len(demo_file_paths) == 0:
+        print(f"No .dem files found at {parsed_arguments.demos}")
+        sys.exit(1)
+    print(f"Found {len(demo_file_paths)} demo files.")
+    results: list[BatchResult] = batch_extract_demo_data(
+        demo_file_paths, parsed_arguments.output, parsed_arguments.workers, parsed_arguments.outputs, parsed_arguments.round_workers
+    )
+    if any(result.succeeded is False for result in results):
+        sys.exit(1)
+
 def main() -> None:
     """
     Launch CLI version of the program
+    Passing command line arguments (see batch_main) runs the non-interactive batch mode instead
     """
+    if len(sys.argv) > 1:
+        batch_main(sys.argv[1:])
+        return
+
     print("Welcome to the CS:GO Demo File Player Data Extractor!")
     do_quit: bool = False
     while do_quit is False:
@@ -375,16 +679,20 @@ def main() -> None:
         print("""1. Extract data from a .dem file, creating .csv files for game events and team area controlled, 
         as well as .gifs for visualizing the area controlled by each team.""")
         print("""2. Extract data from a .dem file, creating a .csv file per round of the game that contains 
-        economy, utility, player movement, and player performance data.""")
+        economy, utility, player movement, and player performance data (also at 5, 10, and 15 second intervals).""")
+        print("""3. Extract data from a .dem file, creating only the .csv file per round of the game that contains 
+        kills, damages, and bomb events (much faster, as player movement doesn't need to be parsed).""")
         print("Q. Quit")
         user_input = input("Enter your choice: ").upper()
-        if user_input not in ["1", "2", "Q"]:
+        if user_input not in ["1", "2", "3", "Q"]:
             print("Invalid input. Please try again.")
             continue
         if user_input == "1":
             extract_demo_data()
         elif user_input == "2":
             parsing_2()
+        elif user_input == "3":
+            parsing_2(outputs=["round_action_csvs"])
         elif user_input == "Q":
             do_quit = True
             input("Closing. Press ENTER to continue.")
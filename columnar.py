@@ -0,0 +1,209 @@
+from dataclasses import dataclass, field, fields
+from collections.abc import Collection
+import operator
+import typing
+import numpy as np
+import categories
+import models
+
+# A round's frames as a handful of (frame x player slot) NumPy arrays instead of nested Frame -> TeamFrameState -> PlayerFrameState objects,
+# so that per-player work over a whole round (who moved, who died, who got blinded, ...) can be done with array operations.
+# Each player in the round gets a slot (a column) - slot_steam_ids maps slots back to players.
+# Bots all have steam id 0, so they are told apart by name instead (see get_slot_key).
+
+FLOAT_COLUMNS: list[str] = [
+    "x", "y", "z",
+    "velocity_x", "velocity_y", "velocity_z",
+    "view_x", "view_y",
+]
+INT_COLUMNS: list[str] = [
+    "hp",
+    "armor",
+    "cash",
+    "cash_spend_this_round",
+    "cash_spend_total",
+    "equipment_value",
+    "equipment_value_freeze_time_end",
+    "equipment_value_round_start",
+    "total_utility",
+    "ping",
+    "zoom_level",
+]
+# Every bool field of PlayerFrameState (is_alive, is_blinded, ..., has_bomb) - stored as bits of one integer per player per frame
+FLAG_COLUMNS: list[str] = [f.name for f in fields(models.PlayerFrameState) if typing.get_type_hints(models.PlayerFrameState)[f.name] is bool]
+FLAG_BITS: dict[str, int] = {name: bit for bit, name in enumerate(FLAG_COLUMNS)}
+FLAG_DTYPE: type = np.uint64 if len(FLAG_COLUMNS) > 32 else np.uint32
+
+# Written to the cells of slots that have no player in a frame (i.e. a player that disconnected mid round)
+MISSING_FLOAT: float = np.nan
+MISSING_INT: int = -1
+
+# PlayerFrameState's string fields, stored as codes when build_round_frame_arrays is given the demo's symbol tables (see categories.py)
+CATEGORY_COLUMNS: list[str] = ["name", "team", "side", "active_weapon"]
+
+@dataclass
+class RoundFrameArrays:
+    """
+    The player state of every frame of a round, as arrays indexed by [frame index, player slot]
+    Frame index i is round.frames[i], and slot j is the player with steam id slot_steam_ids[j] (and name slot_names[j])
+    """
+    ticks: np.ndarray # (frame count,) int64
+    slot_steam_ids: np.ndarray # (slot count,) int64
+    slot_is_ct: np.ndarray # (slot count,) bool - which side the player was on the first time they appeared in the round
+    is_present: np.ndarray # (frame count, slot count) bool - False where the player wasn't in the frame
+    floats: dict[str, np.ndarray] # FLOAT_COLUMNS -> (frame count, slot count) float64
+    ints: dict[str, np.ndarray] # INT_COLUMNS -> (frame count, slot count) int32
+    flags: np.ndarray # (frame count, slot count) FLAG_DTYPE - bit FLAG_BITS[name] is the value of that bool field
+    codes: dict[str, np.ndarray] = field(default_factory=dict) # CATEGORY_COLUMNS -> (frame count, slot count) int32 (categories.MISSING_CODE where missing)
+    slot_names: list[str] = field(default_factory=list) # The name each slot's player had the first time they appeared (empty for archived rounds)
+    # Not archived either (None for archived rounds):
+    frame_positions: np.ndarray | None = None # (frame count, slot count) int32 - the player's index in frame.ct.players + frame.t.players (MISSING_INT where missing)
+    null_flags: np.ndarray | None = None # (frame count, slot count) FLAG_DTYPE - bit FLAG_BITS[name] is set where that bool field was None
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.ticks)
+
+    @property
+    def slot_count(self) -> int:
+        return len(self.slot_steam_ids)
+
+    def get_slot(self, steam_id: int, name: str | None = None) -> int:
+        """
+        Returns the slot (column) of the player with the given steam id
+        Bots all have steam id 0, so a bot's name has to be given too
+        """
+        is_slot: np.ndarray = self.slot_steam_ids == steam_id
+        if steam_id == 0:
+            if name is None or len(self.slot_names) == 0:
+                raise KeyError("Bots all have steam id 0, so they can only be found by name (which archived rounds don't keep)")
+            is_slot &= np.array([slot_name == name for slot_name in self.slot_names], dtype=bool)
+        slots: np.ndarray = np.flatnonzero(is_slot)
+        if len(slots) == 0:
+            raise KeyError(f"Player {steam_id} {'' if name is None else name + ' '}isn't in this round")
+        return int(slots[0])
+
+    def get_column(self, name: str) -> np.ndarray:
+        """
+        Returns the (frame count, slot count) array of one PlayerFrameState field
+        Flags are returned as bool arrays (False where the player wasn't in the frame)
+        """
+        if name in self.floats:
+            return self.floats[name]
+        if name in self.ints:
+            return self.ints[name]
+        if name in self.codes:
+            return self.codes[name]
+        if name in FLAG_BITS:
+            return ((self.flags >> FLAG_DTYPE(FLAG_BITS[name])) & FLAG_DTYPE(1)).astype(bool)
+        raise KeyError(f"{name} isn't one of the stored columns, the options are {FLOAT_COLUMNS + INT_COLUMNS + FLAG_COLUMNS + list(self.codes.keys())}")
+
+    def is_none(self, name: str) -> np.ndarray:
+        """
+        Where a bool field was None (awpy leaves some flags as None, which get_column counts as False)
+        """
+        if self.null_flags is None:
+            raise KeyError("Archived rounds don't keep which flags were None")
+        return ((self.null_flags >> FLAG_DTYPE(FLAG_BITS[name])) & FLAG_DTYPE(1)).astype(bool)
+
+    def is_moving(self) -> np.ndarray:
+        """
+        The array version of PlayerFrameState.is_moving (False where the player wasn't in the frame)
+        """
+        # The missing cells are nan, which != 0 counts as moving
+        return self.is_present & ((self.floats["velocity_x"] != 0) | (self.floats["velocity_y"] != 0) | (self.floats["velocity_z"] != 0))
+
+def get_slot_key(player: models.PlayerFrameState) -> int | tuple[int, str]:
+    """
+    What a player's slot is looked up by - their steam id, or (0, name) for bots, which all have steam id 0
+    """
+    if player.steam_id == 0:
+        return (0, player.name)
+    return player.steam_id
+
+def get_round_slots(round: models.Round) -> tuple[list[int], list[bool], list[str], dict[int | tuple[int, str], int]]:
+    """
+    Returns the steam ids of every player that appears in any of the round's frames (in order of first appearance),
+    whether each of them was on CT when they first appeared, their names when they first appeared, and a map of get_slot_key -> slot
+    """
+    slot_steam_ids: list[int] = []
+    slot_is_ct: list[bool] = []
+    slot_names: list[str] = []
+    slots: dict[int | tuple[int, str], int] = {}
+    for frame in round.frames:
+        for is_ct, team in ((True, frame.ct), (False, frame.t)):
+            for player in team.players:
+                slot_key: int | tuple[int, str] = get_slot_key(player)
+                if slot_key not in slots:
+                    slots[slot_key] = len(slot_steam_ids)
+                    slot_steam_ids.append(player.steam_id)
+                    slot_is_ct.append(is_ct)
+                    slot_names.append(player.name)
+    return (slot_steam_ids, slot_is_ct, slot_names, slots)
+
+def build_round_frame_arrays(round: models.Round, symbols: categories.DemoSymbols | None = None, columns: Collection[str] | None = None) -> RoundFrameArrays:
+    """
+    Copies the player state of every frame of the round into a RoundFrameArrays
+    If the demo's symbol tables are given, the CATEGORY_COLUMNS are stored too (as codes)
+    If columns is given, only those fields are copied (i.e. the frame diff checks only look at the velocities and a few flags),
+    and the bits of the flags that weren't copied are left as 0
+    """
+    slot_steam_ids, slot_is_ct, slot_names, slots = get_round_slots(round)
+    shape: tuple[int, int] = (len(round.frames), len(slot_steam_ids))
+
+    # Every player frame of the round in one list (frame by frame, CT players then T players),
+    # with the flat index of its [frame, slot] cell and its position in frame.ct.players + frame.t.players
+    players: list[models.PlayerFrameState] = []
+    cells: list[int] = []
+    frame_positions: list[int] = []
+    for frame_index, frame in enumerate(round.frames):
+        frame_players: list[models.PlayerFrameState] = frame.ct.players + frame.t.players
+        row_start: int = frame_index * shape[1]
+        players.extend(frame_players)
+        cells.extend([row_start + slots[get_slot_key(player)] for player in frame_players])
+        frame_positions.extend(range(len(frame_players)))
+    cell_indices: np.ndarray = np.array(cells, dtype=np.int64)
+
+    # Each field is read from every player frame at once (attrgetter does the reading in C) and written into its cells with one assignment,
+    # which is a lot quicker than going through the player frames one field at a time
+    def to_cells(values: typing.Sequence, dtype: type, missing_value: typing.Any) -> np.ndarray:
+        array: np.ndarray = np.full(shape[0] * shape[1], missing_value, dtype=dtype)
+        array[cell_indices] = np.array(values, dtype=dtype)
+        return array.reshape(shape)
+
+    def get_values(name: str) -> list:
+        return list(map(operator.attrgetter(name), players))
+
+    def get_int_values(name: str) -> list[int]:
+        values: list[int | None] = get_values(name)
+        return [MISSING_INT if value is None else value for value in values] if None in values else values
+
+    flags: np.ndarray = np.zeros(len(players), dtype=FLAG_DTYPE)
+    null_flags: np.ndarray = np.zeros(len(players), dtype=FLAG_DTYPE)
+    for name, bit in FLAG_BITS.items():
+        if columns is not None and name not in columns:
+            continue
+        values: list[bool | None] = get_values(name)
+        # (None counts as False, and is also kept in null_flags)
+        flags |= np.array(values, dtype=bool).astype(FLAG_DTYPE) << FLAG_DTYPE(bit)
+        if None in values:
+            null_flags |= np.array([value is None for value in values], dtype=bool).astype(FLAG_DTYPE) << FLAG_DTYPE(bit)
+    category_tables: dict[str, categories.SymbolTable] = {name: symbols.get_table(name) for name in CATEGORY_COLUMNS} if symbols is not None else {}
+    float_columns: list[str] = FLOAT_COLUMNS if columns is None else [name for name in FLOAT_COLUMNS if name in columns]
+    int_columns: list[str] = INT_COLUMNS if columns is None else [name for name in INT_COLUMNS if name in columns]
+    if columns is not None:
+        category_tables = {name: table for name, table in category_tables.items() if name in columns}
+
+    return RoundFrameArrays(
+        ticks=np.array([frame.tick for frame in round.frames], dtype=np.int64),
+        slot_steam_ids=np.array(slot_steam_ids, dtype=np.int64),
+        slot_is_ct=np.array(slot_is_ct, dtype=bool),
+        is_present=to_cells([True] * len(players), bool, False),
+        floats={name: to_cells(get_values(name), np.float64, MISSING_FLOAT) for name in float_columns},
+        ints={name: to_cells(get_int_values(name), np.int32, MISSING_INT) for name in int_columns},
+        flags=to_cells(flags, FLAG_DTYPE, 0),
+        codes={name: to_cells(list(map(table.encode, get_values(name))), np.int32, categories.MISSING_CODE) for name, table in category_tables.items()},
+        slot_names=slot_names,
+        frame_positions=to_cells(frame_positions, np.int32, MISSING_INT),
+        null_flags=to_cells(null_flags, FLAG_DTYPE, 0),
+    )
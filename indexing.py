@@ -0,0 +1,195 @@
+import bisect
+import functools
+import heapq
+import types
+import typing
+from collections.abc import Sequence
+from dataclasses import dataclass
+import models
+import timelining
+
+# Indexes over a timeline's events so that questions like "every event of player X between tick a and b" don't have to scan the whole timeline.
+# Every index is a list of event positions in tick order, alongside the ticks of those events, so a tick range is two bisects.
+
+@functools.cache
+def get_player_field_names(event_class: type) -> tuple[str, ...]:
+    """
+    The fields of an event class that hold a timelining.Player (i.e. ("attacker", "victim", "assister", ...) for KillEvent)
+    """
+    player_field_names: list[str] = []
+    for field_name, annotation in typing.get_type_hints(event_class).items():
+        options: tuple = typing.get_args(annotation) if typing.get_origin(annotation) in (typing.Union, types.UnionType) else (annotation,)
+        if any(isinstance(option, type) and issubclass(option, timelining.Player) for option in options):
+            player_field_names.append(field_name)
+    return tuple(player_field_names)
+
+def get_event_steam_ids(event: typing.Any) -> list[int]:
+    """
+    The steam ids of every player an event is about (each only once, i.e. the attacker of a suicide is also the victim)
+    """
+    steam_ids: list[int] = []
+    for field_name in get_player_field_names(event.__class__):
+        player: timelining.Player | None = getattr(event, field_name)
+        if player is not None:
+            steam_ids.append(player.steam_id)
+    if isinstance(event, timelining.PlayerConnectionEvent):
+        steam_ids.append(event.steam_id)
+    return list(dict.fromkeys(steam_ids))
+
+@dataclass
+class RoundBoundary:
+    round_number: int
+    start_tick: int
+    end_tick: int # Inclusive
+
+class PostingList:
+    """
+    Positions of some of a timeline's events (in tick order) and the ticks of those events
+    """
+
+    def __init__(self) -> None:
+        self.positions: list[int] = []
+        self.ticks: list[int] = []
+
+    def append(self, position: int, tick: int) -> None:
+        self.positions.append(position)
+        self.ticks.append(tick)
+
+    def get_positions(self, start_tick: int | None = None, end_tick: int | None = None) -> list[int]:
+        """
+        The positions of the events with start_tick <= tick <= end_tick (None for no limit)
+        """
+        start: int = 0 if start_tick is None else bisect.bisect_left(self.ticks, start_tick)
+        end: int = len(self.ticks) if end_tick is None else bisect.bisect_right(self.ticks, end_tick)
+        return self.positions[start:end]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+class TimelineIndex:
+    """
+    Indexes of a timeline's events by tick, player (steam id), event class and round, built once when the index is made
+    Every query takes logarithmic time (plus the time to return the events it finds)
+    The timeline shouldn't be changed after it is indexed
+
+    Usage:
+        index = TimelineIndex(timelining.create_timeline(demo), demo.game_rounds)
+        kills = index.get_events(steam_id=steam_id, event_class=timelining.KillEvent, round_number=3)
+    """
+
+    def __init__(self, timeline: timelining.Timeline, rounds: Sequence[models.Round] | None = None) -> None:
+        """
+        Round boundaries are taken from the rounds if they are given (from start_tick to end_official_tick),
+        otherwise from the RoundStartEvents in the timeline (numbering the rounds from 1)
+        """
+        # Stable, so events with the same tick stay in timeline order
+        self.events: list = sorted(timeline.events, key=lambda event: event.tick)
+        self.ticks: list[int] = [event.tick for event in self.events]
+        self.player_postings: dict[int, PostingList] = {}
+        self.class_postings: dict[type, PostingList] = {}
+        self.player_class_postings: dict[tuple[int, type], PostingList] = {}
+        for position, event in enumerate(self.events):
+            tick: int = event.tick
+            for steam_id in get_event_steam_ids(event):
+                if steam_id not in self.player_postings:
+                    self.player_postings[steam_id] = PostingList()
+                    self.player_class_postings[(steam_id, event.__class__)] = PostingList()
+                elif (steam_id, event.__class__) not in self.player_class_postings:
+                    self.player_class_postings[(steam_id, event.__class__)] = PostingList()
+                self.player_postings[steam_id].append(position, tick)
+                self.player_class_postings[(steam_id, event.__class__)].append(position, tick)
+            if event.__class__ not in self.class_postings:
+                self.class_postings[event.__class__] = PostingList()
+            self.class_postings[event.__class__].append(position, tick)
+
+        self.rounds: dict[int, RoundBoundary] = {}
+        if rounds is not None:
+            for round in rounds:
+                self.rounds[round.round_number] = RoundBoundary(round.round_number, round.start_tick, round.end_official_tick)
+        else:
+            start_ticks: list[int] = [event.tick for event in self.events if isinstance(event, timelining.RoundStartEvent)]
+            for round_index, start_tick in enumerate(start_ticks):
+                end_tick: int = start_ticks[round_index + 1] - 1 if round_index + 1 < len(start_ticks) else self.ticks[-1]
+                self.rounds[round_index + 1] = RoundBoundary(round_index + 1, start_tick, end_tick)
+        self.rounds_by_start: list[RoundBoundary] = sorted(self.rounds.values(), key=lambda boundary: boundary.start_tick)
+        self.round_start_ticks: list[int] = [boundary.start_tick for boundary in self.rounds_by_start]
+
+    def get_round_numbers(self) -> list[int]:
+        return list(self.rounds.keys())
+
+    def get_steam_ids(self) -> list[int]:
+        return list(self.player_postings.keys())
+
+    def get_round_number(self, tick: int) -> int | None:
+        """
+        The number of the round a tick is in (None if it is between rounds)
+        """
+        round_index: int = bisect.bisect_right(self.round_start_ticks, tick) - 1
+        if round_index < 0 or tick > self.rounds_by_start[round_index].end_tick:
+            return None
+        return self.rounds_by_start[round_index].round_number
+
+    def _get_class_positions(self, event_class: type, start_tick: int | None, end_tick: int | None, steam_id: int | None = None) -> list[int]:
+        """
+        Positions of the events of a class (or any of its subclasses), optionally only the ones about one player
+        """
+        position_lists: list[list[int]]
+        if steam_id is None:
+            position_lists = [
+                postings.get_positions(start_tick, end_tick) for posting_class, postings in self.class_postings.items() if issubclass(posting_class, event_class)
+            ]
+        else:
+            position_lists = [
+                self.player_class_postings[(steam_id, posting_class)].get_positions(start_tick, end_tick)
+                for posting_class in self.class_postings.keys()
+                if issubclass(posting_class, event_class) and (steam_id, posting_class) in self.player_class_postings
+            ]
+        if len(position_lists) == 1:
+            return position_lists[0]
+        return list(heapq.merge(*position_lists))
+
+    def get_events(
+        self,
+        start_tick: int | None = None,
+        end_tick: int | None = None,
+        steam_id: int | None = None,
+        event_class: type | None = None,
+        round_number: int | None = None,
+    ) -> list:
+        """
+        The events (in tick order) that match every given filter
+        start_tick and end_tick are inclusive, and are narrowed to the round if round_number is given
+        steam_id matches any event about that player (as attacker, victim, thrower, ...)
+        event_class also matches subclasses
+        """
+        if round_number is not None:
+            boundary: RoundBoundary = self.rounds[round_number]
+            start_tick = boundary.start_tick if start_tick is None else max(start_tick, boundary.start_tick)
+            end_tick = boundary.end_tick if end_tick is None else min(end_tick, boundary.end_tick)
+
+        positions: list[int]
+        if event_class is not None:
+            positions = self._get_class_positions(event_class, start_tick, end_tick, steam_id)
+        elif steam_id is not None:
+            postings: PostingList | None = self.player_postings.get(steam_id, None)
+            positions = [] if postings is None else postings.get_positions(start_tick, end_tick)
+        else:
+            start: int = 0 if start_tick is None else bisect.bisect_left(self.ticks, start_tick)
+            end: int = len(self.ticks) if end_tick is None else bisect.bisect_right(self.ticks, end_tick)
+            return self.events[start:end]
+        return [self.events[position] for position in positions]
+
+    def get_round_events(self, round_number: int) -> list:
+        return self.get_events(round_number=round_number)
+
+    def get_player_events(self, steam_id: int, start_tick: int | None = None, end_tick: int | None = None) -> list:
+        return self.get_events(start_tick, end_tick, steam_id=steam_id)
+
+    def count_events(self, event_class: type, start_tick: int | None = None, end_tick: int | None = None) -> int:
+        return len(self._get_class_positions(event_class, start_tick, end_tick))
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __repr__(self) -> str:
+        return f"TimelineIndex({len(self)} events, {len(self.player_postings)} players, {len(self.rounds)} rounds)"
@@ -0,0 +1,195 @@
+import itertools
+import operator
+import typing
+from functools import cached_property
+from collections.abc import Iterable, Sequence
+import numpy as np
+import models
+
+# Inventories as fixed size vectors over a catalog of weapon names, so that comparing two inventories (or counting a player's grenades)
+# is an array operation instead of a scan over a list of weapons.
+# Each row of an InventoryArrays is one inventory (i.e. one player frame), and each column is one weapon of the catalog.
+
+# The weapon names awpy gives (the names demoinfocs gives each equipment type)
+WEAPON_NAMES: tuple[str, ...] = (
+    "Knife", "C4", "Zeus x27", "Kevlar Vest", "Kevlar + Helmet", "Defuse Kit", "World",
+    "Glock-18", "USP-S", "P2000", "P250", "Dual Berettas", "Five-SeveN", "Tec-9", "CZ75 Auto", "Desert Eagle", "R8 Revolver",
+    "MAC-10", "MP9", "MP7", "MP5-SD", "UMP-45", "P90", "PP-Bizon",
+    "Nova", "XM1014", "Sawed-Off", "MAG-7", "M249", "Negev",
+    "Galil AR", "FAMAS", "AK-47", "M4A4", "M4A1", "SG 553", "AUG",
+    "SSG 08", "AWP", "G3SG1", "SCAR-20",
+    "Decoy Grenade", "Flashbang", "HE Grenade", "Incendiary Grenade", "Molotov", "Smoke Grenade",
+)
+# Grenades are in an inventory once, with how many of them the player has as the ammo in the magazine
+UTILITY_NAMES: tuple[str, ...] = ("Decoy Grenade", "Flashbang", "HE Grenade", "Incendiary Grenade", "Molotov", "Smoke Grenade")
+
+# Getters of a weapon's (name, ammo in magazine, ammo in reserve)
+MODELS_WEAPON_GETTERS: tuple[typing.Callable, ...] = tuple(map(operator.attrgetter, ("weapon_name", "ammo_in_magazine", "ammo_in_reserve")))
+JSON_WEAPON_GETTERS: tuple[typing.Callable, ...] = tuple(map(operator.itemgetter, ("weaponName", "ammoInMagazine", "ammoInReserve")))
+
+class WeaponCatalog:
+    """
+    The column of every weapon name
+    Names that aren't in the catalog yet (i.e. weapons added to the game after WEAPON_NAMES was written) are given the next free column,
+    so arrays made before a new name was added are just narrower, and a missing column counts as 0 of that weapon
+    """
+
+    def __init__(self, weapon_names: Iterable[str] = WEAPON_NAMES) -> None:
+        self.weapon_names: list[str] = []
+        self.indices: dict[str, int] = {}
+        for weapon_name in weapon_names:
+            self.get_index(weapon_name)
+
+    def get_index(self, weapon_name: str) -> int:
+        index: int | None = self.indices.get(weapon_name, None)
+        if index is None:
+            index = len(self.weapon_names)
+            self.indices[weapon_name] = index
+            self.weapon_names.append(weapon_name)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.weapon_names)
+
+DEFAULT_CATALOG: WeaponCatalog = WeaponCatalog()
+
+def _to_ammo_array(values: Sequence) -> np.ndarray:
+    # awpy can leave the ammo of some weapons as None, which becomes nan
+    return np.array(values, dtype=np.float64)
+
+class InventoryArrays:
+    """
+    For n inventories and a catalog of w weapons:
+        counts: [n, w] how many of each weapon the inventory holds
+        ammo_in_magazine, ammo_in_reserve: [n, w] the ammo of each weapon (added up if an inventory holds the weapon more than once)
+        has_weapon: [n] whether the inventory holds anything
+        active_weapon: [n] the column of the active weapon (the first weapon of the inventory), -1 for an empty inventory
+        active_ammo_in_magazine, active_ammo_in_reserve: [n] the ammo of the active weapon (nan for an empty inventory)
+
+    Usage:
+        arrays = InventoryArrays.from_player_frames(player_frames)
+        decoys = arrays.get_utility_count("Decoy Grenade")
+    """
+
+    def __init__(
+        self,
+        inventory_lengths: Sequence[int],
+        weapon_names: Sequence[str],
+        ammo_in_magazine: Sequence,
+        ammo_in_reserve: Sequence,
+        catalog: WeaponCatalog = DEFAULT_CATALOG,
+    ) -> None:
+        """
+        Takes the weapons of every inventory one after another as columns, and how many weapons each inventory has
+        """
+        self.catalog: WeaponCatalog = catalog
+        for weapon_name in set(weapon_names).difference(catalog.indices.keys()):
+            catalog.get_index(weapon_name)
+        self.row_count: int = len(inventory_lengths)
+        self.width: int = len(catalog)
+
+        lengths: np.ndarray = np.array(inventory_lengths, dtype=np.int64)
+        rows: np.ndarray = np.repeat(np.arange(self.row_count, dtype=np.int64), lengths)
+        columns: np.ndarray = np.array(list(map(catalog.indices.__getitem__, weapon_names)), dtype=np.int64)
+        magazine_column: np.ndarray = _to_ammo_array(ammo_in_magazine)
+        reserve_column: np.ndarray = _to_ammo_array(ammo_in_reserve)
+
+        size: int = self.row_count * self.width
+        shape: tuple[int, int] = (self.row_count, self.width)
+        cells: np.ndarray = rows * self.width + columns
+        self.counts: np.ndarray = np.bincount(cells, minlength=size).astype(np.int32).reshape(shape)
+        self.ammo_in_magazine: np.ndarray = np.bincount(cells, weights=np.nan_to_num(magazine_column), minlength=size).reshape(shape)
+        self.ammo_in_reserve: np.ndarray = np.bincount(cells, weights=np.nan_to_num(reserve_column), minlength=size).reshape(shape)
+
+        # The active weapon is the first weapon of each inventory
+        self.has_weapon: np.ndarray = lengths > 0
+        first_weapons: np.ndarray = (np.cumsum(lengths) - lengths)[self.has_weapon]
+        self.active_weapon: np.ndarray = np.full(self.row_count, -1, dtype=np.int32)
+        self.active_weapon[self.has_weapon] = columns[first_weapons]
+        self.active_ammo_in_magazine: np.ndarray = np.full(self.row_count, np.nan)
+        self.active_ammo_in_magazine[self.has_weapon] = magazine_column[first_weapons]
+        self.active_ammo_in_reserve: np.ndarray = np.full(self.row_count, np.nan)
+        self.active_ammo_in_reserve[self.has_weapon] = reserve_column[first_weapons]
+
+        # Inventories where the count vectors can't tell every change apart (see is_exact)
+        self.has_duplicates: np.ndarray = np.any(self.counts > 1, axis=1)
+        self.has_missing_ammo: np.ndarray = np.bincount(rows, weights=np.isnan(magazine_column) | np.isnan(reserve_column), minlength=self.row_count) > 0
+
+    @classmethod
+    def from_weapons(cls, inventories: Sequence[Sequence | None], weapon_getters: tuple[typing.Callable, ...], catalog: WeaponCatalog = DEFAULT_CATALOG) -> "InventoryArrays":
+        """
+        Takes every inventory as a list of weapons (None for no inventory), reading each weapon's name and ammo with weapon_getters
+        """
+        inventories = [[] if inventory is None else inventory for inventory in inventories]
+        weapons: list = list(itertools.chain.from_iterable(inventories))
+        weapon_names, ammo_in_magazine, ammo_in_reserve = [list(map(getter, weapons)) for getter in weapon_getters]
+        return cls(list(map(len, inventories)), weapon_names, ammo_in_magazine, ammo_in_reserve, catalog)
+
+    @classmethod
+    def from_player_frames(cls, player_frames: Sequence[models.PlayerFrameState], catalog: WeaponCatalog = DEFAULT_CATALOG) -> "InventoryArrays":
+        return cls.from_weapons([player_frame.inventory for player_frame in player_frames], MODELS_WEAPON_GETTERS, catalog)
+
+    @classmethod
+    def from_json_inventories(cls, inventories: Sequence[list[dict] | None], catalog: WeaponCatalog = DEFAULT_CATALOG) -> "InventoryArrays":
+        """
+        For the "inventory" lists of the parser's JSON output
+        """
+        return cls.from_weapons(inventories, JSON_WEAPON_GETTERS, catalog)
+
+    def get_column(self, array: np.ndarray, weapon_name: str) -> np.ndarray:
+        index: int | None = self.catalog.indices.get(weapon_name, None)
+        if index is None or index >= self.width:
+            return np.zeros(self.row_count, dtype=array.dtype)
+        return array[:, index]
+
+    def get_weapon_count(self, weapon_name: str) -> np.ndarray:
+        return self.get_column(self.counts, weapon_name)
+
+    def get_utility_count(self, utility_name: str) -> np.ndarray:
+        return self.get_column(self.ammo_in_magazine, utility_name).astype(np.int64)
+
+    def get_utility_counts(self) -> dict[str, np.ndarray]:
+        return {utility_name: self.get_utility_count(utility_name) for utility_name in UTILITY_NAMES}
+
+    @cached_property
+    def contents(self) -> np.ndarray:
+        """
+        [n, 3u] the counts and ammo of each inventory side by side, so inventories can be compared with one comparison
+        Only the u weapons that some inventory holds are kept (every other column is 0 in every row, and a round only has a few of the catalog's weapons)
+        """
+        held: np.ndarray = np.flatnonzero(np.any(self.counts > 0, axis=0))
+        return np.concatenate([self.counts[:, held], self.ammo_in_magazine[:, held], self.ammo_in_reserve[:, held]], axis=1)
+
+    def is_exact(self, previous_rows: np.ndarray, current_rows: np.ndarray) -> np.ndarray:
+        """
+        Whether is_changed is the same as comparing each pair's inventories as sets of weapons
+        It isn't when an inventory holds a weapon more than once (the count changes without the set changing, and the ammo of the copies is added up)
+        or is missing some ammo (which counts as 0)
+        """
+        is_ambiguous: np.ndarray = self.has_duplicates | self.has_missing_ammo
+        return ~(is_ambiguous[previous_rows] | is_ambiguous[current_rows])
+
+    def is_changed(self, previous_rows: np.ndarray, current_rows: np.ndarray) -> np.ndarray:
+        """
+        Whether each pair of inventories holds different weapons (a weapon with different ammo counts as a different weapon)
+        Only the same as comparing the inventories as sets of weapons where is_exact is True
+        """
+        contents: np.ndarray = self.contents
+        return np.any(contents[previous_rows] != contents[current_rows], axis=-1)
+
+    def is_same_active_weapon(self, previous_rows: np.ndarray, current_rows: np.ndarray) -> np.ndarray:
+        """
+        Whether each pair of inventories has the same active weapon with the same ammo (two missing ammo counts are the same)
+        """
+        def is_same_ammo(ammo: np.ndarray) -> np.ndarray:
+            previous_ammo: np.ndarray = ammo[previous_rows]
+            current_ammo: np.ndarray = ammo[current_rows]
+            return (previous_ammo == current_ammo) | (np.isnan(previous_ammo) & np.isnan(current_ammo))
+        return (
+            (self.active_weapon[previous_rows] == self.active_weapon[current_rows])
+            & is_same_ammo(self.active_ammo_in_magazine)
+            & is_same_ammo(self.active_ammo_in_reserve)
+        )
+
+    def __len__(self) -> int:
+        return self.row_count
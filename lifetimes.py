@@ -0,0 +1,143 @@
+import bisect
+import typing
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+import models
+import timelining
+
+# When each smoke and fire was in the world, as intervals of ticks.
+# Smokes and fires are told apart by their ids (see timelining.SMOKE_ID_GETTER and timelining.FIRE_ID_GETTER),
+# so one sweep over a round's frames with a dict of the ones that are currently active is enough to find every interval.
+
+SMOKE: str = "smoke"
+FIRE: str = "fire"
+
+@dataclass
+class UtilityLifetime:
+    kind: str # SMOKE or FIRE
+    id: int # Smoke.grenade_entity_id or Fire.unique_id
+    round_number: int
+    start_tick: int # The tick of the first frame it was in
+    end_tick: int | None # The tick of the first frame it was gone from (None if it was still there in the round's last frame)
+    x: float # Where it was when it appeared
+    y: float
+    z: float
+
+    def get_end_tick(self, last_tick: int) -> int:
+        """
+        The (exclusive) end tick, counting a lifetime that lasted until the end of the round as ending just after last_tick
+        """
+        return last_tick + 1 if self.end_tick is None else self.end_tick
+
+    def is_active(self, tick: int) -> bool:
+        return self.start_tick <= tick and (self.end_tick is None or tick < self.end_tick)
+
+def _sweep_lifetimes(
+    kind: str,
+    round_number: int,
+    frames: Sequence[models.Frame],
+    get_objects: typing.Callable[[models.Frame], list],
+    get_id: typing.Callable,
+) -> list[UtilityLifetime]:
+    lifetimes: list[UtilityLifetime] = []
+    active: dict[int, UtilityLifetime] = {}
+    for frame in frames:
+        frame_ids: set[int] = set()
+        for utility in get_objects(frame):
+            utility_id: int = get_id(utility)
+            frame_ids.add(utility_id)
+            if utility_id not in active:
+                lifetime: UtilityLifetime = UtilityLifetime(kind, utility_id, round_number, frame.tick, None, utility.x, utility.y, utility.z)
+                active[utility_id] = lifetime
+                lifetimes.append(lifetime)
+        # Only the ones that just went away need to be looked at, so this is skipped for most frames
+        if len(frame_ids) != len(active) or frame_ids.issuperset(active.keys()) is False:
+            for utility_id in [utility_id for utility_id in active.keys() if utility_id not in frame_ids]:
+                active.pop(utility_id).end_tick = frame.tick
+    return lifetimes
+
+def get_round_utility_lifetimes(round: models.Round) -> list[UtilityLifetime]:
+    """
+    The lifetimes of every smoke and fire in a round, in order of when they appeared (smokes before fires on the same tick)
+    """
+    smokes: list[UtilityLifetime] = _sweep_lifetimes(SMOKE, round.round_number, round.frames, lambda frame: frame.smokes, timelining.SMOKE_ID_GETTER)
+    fires: list[UtilityLifetime] = _sweep_lifetimes(FIRE, round.round_number, round.frames, lambda frame: frame.fires, timelining.FIRE_ID_GETTER)
+    return sorted(smokes + fires, key=lambda lifetime: lifetime.start_tick)
+
+def get_demo_utility_lifetimes(demo: models.Demo) -> list[UtilityLifetime]:
+    return [lifetime for round in demo.game_rounds for lifetime in get_round_utility_lifetimes(round)]
+
+class UtilityIntervalIndex:
+    """
+    Answers "which smokes and fires were active at tick t" without going back over the frames
+    The ticks where any lifetime starts or ends split the demo into segments where the same smokes and fires are active,
+    so the active lifetimes of every segment are worked out once (in one sweep) and a query is a bisect to find its segment
+    A lifetime is active from its start_tick up to (but not including) its end_tick
+
+    Usage:
+        index = UtilityIntervalIndex.from_demo(demo)
+        smokes = index.get_active(tick, kind=lifetimes.SMOKE)
+    """
+
+    def __init__(self, lifetimes: Iterable[UtilityLifetime], last_ticks: dict[int, int] | None = None) -> None:
+        """
+        last_ticks is the tick of each round's last frame, used to end the lifetimes that lasted until the end of their round
+        (without it they are counted as ending just after they started)
+        """
+        self.lifetimes: list[UtilityLifetime] = list(lifetimes)
+        self.end_ticks: list[int] = [
+            lifetime.get_end_tick(lifetime.start_tick if last_ticks is None else last_ticks.get(lifetime.round_number, lifetime.start_tick))
+            for lifetime in self.lifetimes
+        ]
+
+        changes: dict[int, tuple[list[int], list[int]]] = {}
+        for position, lifetime in enumerate(self.lifetimes):
+            changes.setdefault(lifetime.start_tick, ([], []))[0].append(position)
+            changes.setdefault(self.end_ticks[position], ([], []))[1].append(position)
+
+        # segment_active[i] is every lifetime active from boundary_ticks[i] up to boundary_ticks[i + 1]
+        self.boundary_ticks: list[int] = sorted(changes.keys())
+        self.segment_active: list[tuple[int, ...]] = []
+        active: dict[int, None] = {} # A dict rather than a set, so the positions stay in the order they were added
+        for tick in self.boundary_ticks:
+            started, ended = changes[tick]
+            for position in ended:
+                active.pop(position, None)
+            for position in started:
+                if self.end_ticks[position] > tick:
+                    active[position] = None
+            self.segment_active.append(tuple(active.keys()))
+
+    @classmethod
+    def from_demo(cls, demo: models.Demo) -> "UtilityIntervalIndex":
+        last_ticks: dict[int, int] = {round.round_number: round.frames[-1].tick for round in demo.game_rounds if len(round.frames) > 0}
+        return cls(get_demo_utility_lifetimes(demo), last_ticks)
+
+    def _get_segment(self, tick: int) -> int:
+        return bisect.bisect_right(self.boundary_ticks, tick) - 1
+
+    def get_active(self, tick: int, kind: str | None = None) -> list[UtilityLifetime]:
+        """
+        The lifetimes active at a tick (only smokes or only fires if kind is given)
+        """
+        segment: int = self._get_segment(tick)
+        if segment < 0:
+            return []
+        return [self.lifetimes[position] for position in self.segment_active[segment] if kind is None or self.lifetimes[position].kind == kind]
+
+    def get_active_between(self, start_tick: int, end_tick: int, kind: str | None = None) -> list[UtilityLifetime]:
+        """
+        The lifetimes active at any tick with start_tick <= tick <= end_tick, in the order they appeared
+        """
+        first_segment: int = max(self._get_segment(start_tick), 0)
+        last_segment: int = self._get_segment(end_tick)
+        positions: set[int] = set()
+        for segment in range(first_segment, last_segment + 1):
+            positions.update(self.segment_active[segment])
+        return [self.lifetimes[position] for position in sorted(positions) if kind is None or self.lifetimes[position].kind == kind]
+
+    def __len__(self) -> int:
+        return len(self.lifetimes)
+
+    def __repr__(self) -> str:
+        return f"UtilityIntervalIndex({len(self)} lifetimes, {len(self.boundary_ticks)} boundaries)"
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+from collections.abc import Callable, Iterator, Sequence
 from dataclasses import dataclass
 
 # NOTE: Most of this file has become obsolete because awpy has added type information to the library.
@@ -229,14 +231,16 @@ class Flash:
     player_view_y: float
     flash_duration: float
 
-@dataclass
+# The per-frame classes below are created once per player (or item) per frame, so they use __slots__ instead of a per-instance __dict__
+# The ones nothing needs to modify after parsing are also frozen (which makes them hashable)
+@dataclass(slots=True, frozen=True)
 class Weapon:
     weapon_name: str
     weapon_class: str
     ammo_in_magazine: int
     ammo_in_reserve: int
 
-@dataclass
+@dataclass(slots=True)
 class PlayerFrameState:
     """
     Data about a player, a snapshot of their metrics during one frame.
@@ -292,7 +296,7 @@ class PlayerFrameState:
         """
         return self.velocity_x != 0 or self.velocity_y != 0 or self.velocity_z != 0
 
-@dataclass
+@dataclass(slots=True)
 class TeamFrameState:
     """
     Data about a team, a snapshot of their metrics during one frame.
@@ -304,20 +308,20 @@ class TeamFrameState:
     total_utility: int # The amount of utility items the team owns
     players: list[PlayerFrameState]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Bomb:
     x: float
     y: float
     z: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Projectile:
     projectile_type: str # i.e. "Smoke Grenade"
     x: float
     y: float
     z: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Smoke:
     grenade_entity_id: int
     start_tick: int
@@ -325,14 +329,14 @@ class Smoke:
     y: float
     z: float
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Fire:
     unique_id: int
     x: float
     y: float
     z: float
 
-@dataclass
+@dataclass(slots=True)
 class Frame:
     is_kill_frame: bool
     tick: int
@@ -398,446 +402,552 @@ class Demo:
     match_phases: MatchPhases
     matchmaking_ranks: list # Not sure what the type of is so not specifying
     player_connections: list[PlayerConnection]
-    game_rounds: list[Round]
+    game_rounds: list[Round] # Or a LazyRoundList (see deserialize_demo_data_lazily)
 
-def deserialize_demo_data(demo_file_data: dict) -> Demo:
-    player_connections: list[PlayerConnection] = []
-    for connection in demo_file_data["playerConnections"]:
-        player_connections.append(
-            PlayerConnection(
-                tick=connection["tick"],
-                action=connection["action"],
-                steam_id=connection["steamID"],
-            )
-        )
+def deserialize_round(round: dict) -> Round:
+    """
+    Turns one entry of the parsed demo file's "gameRounds" list into a Round
+    """
+    ct_side: Team
+    t_side: Team
 
-    game_rounds: list[Round] = []
-    for round in demo_file_data["gameRounds"]:
-        ct_side: Team
-        t_side: Team
+    ct_players: list[Player] = []
+    for player in round["ctSide"]["players"]:
+        ct_players.append(Player(
+            player_name=player["playerName"],
+            steam_id=player["steamID"],
+        ))
+    ct_side = Team(
+        team_name=round["ctSide"]["teamName"],
+        players=ct_players,
+    )
 
-        ct_players: list[Player] = []
-        for player in round["ctSide"]["players"]:
-            ct_players.append(Player(
-                player_name=player["playerName"],
-                steam_id=player["steamID"],
-            ))
-        ct_side = Team(
-            team_name=round["ctSide"]["teamName"],
-            players=ct_players,
-        )
+    t_players: list[Player] = []
+    for player in round["tSide"]["players"]:
+        t_players.append(Player(
+            player_name=player["playerName"],
+            steam_id=player["steamID"],
+        ))
+    t_side = Team(
+        team_name=round["tSide"]["teamName"],
+        players=t_players,
+    )
+
+    kills: list[Kill] = []
+    for kill in round["kills"]:
+        kills.append(Kill(
+            tick=kill["tick"],
+            seconds=kill["seconds"],
+            clock_time=kill["clockTime"],
+            attacker_steam_id=kill["attackerSteamID"],
+            attacker_name=kill["attackerName"],
+            attacker_team=kill["attackerTeam"],
+            attacker_side=kill["attackerSide"],
+            attacker_x=kill["attackerX"],
+            attacker_y=kill["attackerY"],
+            attacker_z=kill["attackerZ"],
+            attacker_view_x=kill["attackerViewX"],
+            attacker_view_y=kill["attackerViewY"],
+            victim_steam_id=kill["victimSteamID"],
+            victim_name=kill["victimName"],
+            victim_team=kill["victimTeam"],
+            victim_side=kill["victimSide"],
+            victim_x=kill["victimX"],
+            victim_y=kill["victimY"],
+            victim_z=kill["victimZ"],
+            victim_view_x=kill["victimViewX"],
+            victim_view_y=kill["victimViewY"],
+            assister_steam_id=kill["assisterSteamID"],
+            assister_name=kill["assisterName"],
+            assister_team=kill["assisterTeam"],
+            assister_side=kill["assisterSide"],
+            is_suicide=kill["isSuicide"],
+            is_teamkill=kill["isTeamkill"],
+            is_wallbang=kill["isWallbang"],
+            penetrated_objects=kill["penetratedObjects"],
+            is_first_kill=kill["isFirstKill"],
+            is_headshot=kill["isHeadshot"],
+            is_victim_blinded=kill["victimBlinded"],
+            is_attacker_blinded=kill["attackerBlinded"],
+            flash_thrower_steam_id=kill["flashThrowerSteamID"],
+            flash_thrower_name=kill["flashThrowerName"],
+            flash_thrower_team=kill["flashThrowerTeam"],
+            flash_thrower_side=kill["flashThrowerSide"],
+            is_no_scope=kill["noScope"],
+            is_through_smoke=kill["thruSmoke"],
+            distance=kill["distance"],
+            is_trade=kill["isTrade"],
+            player_traded_name=kill["playerTradedName"],
+            player_traded_team=kill["playerTradedTeam"],
+            player_traded_steam_id=kill["playerTradedSteamID"],
+            weapon=kill["weapon"],
+            weapon_class=kill["weaponClass"],
+        ))
+
+    damages: list[Damage] = []
+    for damage in round["damages"]:
+        damages.append(Damage(
+            tick=damage["tick"],
+            seconds=damage["seconds"],
+            clock_time=damage["clockTime"],
+            attacker_steam_id=damage["attackerSteamID"],
+            attacker_name=damage["attackerName"],
+            attacker_team=damage["attackerTeam"],
+            attacker_side=damage["attackerSide"],
+            attacker_x=damage["attackerX"],
+            attacker_y=damage["attackerY"],
+            attacker_z=damage["attackerZ"],
+            attacker_view_x=damage["attackerViewX"],
+            attacker_view_y=damage["attackerViewY"],
+            is_attacker_strafe=damage["attackerStrafe"],
+            victim_steam_id=damage["victimSteamID"],
+            victim_name=damage["victimName"],
+            victim_team=damage["victimTeam"],
+            victim_side=damage["victimSide"],
+            victim_x=damage["victimX"],
+            victim_y=damage["victimY"],
+            victim_z=damage["victimZ"],
+            victim_view_x=damage["victimViewX"],
+            victim_view_y=damage["victimViewY"],
+            weapon=damage["weapon"],
+            weapon_class=damage["weaponClass"],
+            hp_damage=damage["hpDamage"],
+            hp_damage_taken=damage["hpDamageTaken"],
+            armor_damage=damage["armorDamage"],
+            armor_damage_taken=damage["armorDamageTaken"],
+            hit_group=damage["hitGroup"],
+            is_friendly_fire=damage["isFriendlyFire"],
+            distance=damage["distance"],
+            zoom_level=damage["zoomLevel"],
+        ))
+
+    grenades: list[Grenade] = []
+    for grenade in round["grenades"]:
+        grenades.append(Grenade(
+            throw_tick=grenade["throwTick"],
+            destroy_tick=grenade["destroyTick"],
+            throw_seconds=grenade["throwSeconds"],
+            throw_clock_time=grenade["throwClockTime"],
+            destroy_seconds=grenade["destroySeconds"],
+            destroy_clock_time=grenade["destroyClockTime"],
+            thrower_steam_id=grenade["throwerSteamID"],
+            thrower_name=grenade["throwerName"],
+            thrower_team=grenade["throwerTeam"],
+            thrower_side=grenade["throwerSide"],
+            thrower_x=grenade["throwerX"],
+            thrower_y=grenade["throwerY"],
+            thrower_z=grenade["throwerZ"],
+            grenade_type=grenade["grenadeType"],
+            grenade_x=grenade["grenadeX"],
+            grenade_y=grenade["grenadeY"],
+            grenade_z=grenade["grenadeZ"],
+            entity_id=grenade["entityId"],
+        ))
+
+    bomb_events: list[BombEvent] = []
+    for bomb_event in round["bombEvents"]:
+        bomb_events.append(BombEvent(
+            tick=bomb_event["tick"],
+            seconds=bomb_event["seconds"],
+            clock_time=bomb_event["clockTime"],
+            player_steam_id=bomb_event["playerSteamID"],
+            player_name=bomb_event["playerName"],
+            player_team=bomb_event["playerTeam"],
+            player_x=bomb_event["playerX"],
+            player_y=bomb_event["playerY"],
+            player_z=bomb_event["playerZ"],
+            bomb_action=bomb_event["bombAction"],
+            bomb_site=bomb_event["bombSite"],
+        ))
+
+    weapon_fires: list[WeaponFire] = []
+    for weapon_fire in round["weaponFires"]:
+        weapon_fires.append(WeaponFire(
+            tick=weapon_fire["tick"],
+            seconds=weapon_fire["seconds"],
+            clock_time=weapon_fire["clockTime"],
+            player_steam_id=weapon_fire["playerSteamID"],
+            player_name=weapon_fire["playerName"],
+            player_team=weapon_fire["playerTeam"],
+            player_side=weapon_fire["playerSide"],
+            player_x=weapon_fire["playerX"],
+            player_y=weapon_fire["playerY"],
+            player_z=weapon_fire["playerZ"],
+            player_view_x=weapon_fire["playerViewX"],
+            player_view_y=weapon_fire["playerViewY"],
+            is_player_strafe=weapon_fire["playerStrafe"],
+            weapon=weapon_fire["weapon"],
+            weapon_class=weapon_fire["weaponClass"],
+            ammo_in_magazine=weapon_fire["ammoInMagazine"],
+            ammo_in_reserve=weapon_fire["ammoInReserve"],
+            zoom_level=weapon_fire["zoomLevel"],
+        ))
 
-        t_players: list[Player] = []
-        for player in round["tSide"]["players"]:
-            t_players.append(Player(
-                player_name=player["playerName"],
+    flashes: list[Flash] = []
+    for flash in round["flashes"]:
+        flashes.append(Flash(
+            tick=flash["tick"],
+            seconds=flash["seconds"],
+            clock_time=flash["clockTime"],
+            attacker_steam_id=flash["attackerSteamID"],
+            attacker_name=flash["attackerName"],
+            attacker_team=flash["attackerTeam"],
+            attacker_side=flash["attackerSide"],
+            attacker_x=flash["attackerX"],
+            attacker_y=flash["attackerY"],
+            attacker_z=flash["attackerZ"],
+            attacker_view_x=flash["attackerViewX"],
+            attacker_view_y=flash["attackerViewY"],
+            player_steam_id=flash["playerSteamID"],
+            player_name=flash["playerName"],
+            player_team=flash["playerTeam"],
+            player_side=flash["playerSide"],
+            player_x=flash["playerX"],
+            player_y=flash["playerY"],
+            player_z=flash["playerZ"],
+            player_view_x=flash["playerViewX"],
+            player_view_y=flash["playerViewY"],
+            flash_duration=flash["flashDuration"],
+        ))
+
+    frames: list[Frame] = []
+    # "frames" is empty (or null) when the demo was parsed without frames
+    for frame in round["frames"] or []:
+        t: TeamFrameState
+        
+        t_players: list[PlayerFrameState] = []
+        for player in frame["t"]["players"]:
+            inventory: list[Weapon] = []
+            for weapon in player["inventory"] or []:
+                inventory.append(Weapon(
+                    weapon_name=weapon["weaponName"],
+                    weapon_class=weapon["weaponClass"],
+                    ammo_in_magazine=weapon["ammoInMagazine"],
+                    ammo_in_reserve=weapon["ammoInReserve"],
+                ))
+
+            t_players.append(PlayerFrameState(
                 steam_id=player["steamID"],
+                name=player["name"],
+                team=player["team"],
+                side=player["side"],
+                x=player["x"],
+                y=player["y"],
+                z=player["z"],
+                velocity_x=player["velocityX"],
+                velocity_y=player["velocityY"],
+                velocity_z=player["velocityZ"],
+                view_x=player["viewX"],
+                view_y=player["viewY"],
+                hp=player["hp"],
+                armor=player["armor"],
+                active_weapon=player["activeWeapon"],
+                total_utility=player["totalUtility"],
+                is_alive=player["isAlive"],
+                is_blinded=player["isBlinded"],
+                is_airborne=player["isAirborne"],
+                is_ducking=player["isDucking"],
+                is_ducking_in_progress=player["isDuckingInProgress"],
+                is_unducking_in_progress=player["isUnDuckingInProgress"],
+                is_defusing=player["isDefusing"],
+                is_planting=player["isPlanting"],
+                is_reloading=player["isReloading"],
+                is_in_bomb_zone=player["isInBombZone"],
+                is_in_buy_zone=player["isInBuyZone"],
+                is_standing=player["isStanding"],
+                is_scoped=player["isScoped"],
+                is_walking=player["isWalking"],
+                is_unknown=player["isUnknown"],
+                inventory=inventory,
+                spotters=player["spotters"],
+                equipment_value=player["equipmentValue"],
+                equipment_value_freeze_time_end=player["equipmentValueFreezetimeEnd"],
+                equipment_value_round_start=player["equipmentValueRoundStart"],
+                cash=player["cash"],
+                cash_spend_this_round=player["cashSpendThisRound"],
+                cash_spend_total=player["cashSpendTotal"],
+                has_helmet=player["hasHelmet"],
+                has_defuse_kit=player["hasDefuse"],
+                has_bomb=player["hasBomb"],
+                ping=player["ping"],
+                zoom_level=player["zoomLevel"],
             ))
-        t_side = Team(
-            team_name=round["tSide"]["teamName"],
+
+        t = TeamFrameState(
+            side=frame["t"]["side"],
+            team_name=frame["t"]["teamName"],
+            team_eq_val=frame["t"]["teamEqVal"],
+            alive_players=frame["t"]["alivePlayers"],
+            total_utility=frame["t"]["totalUtility"],
             players=t_players,
         )
 
-        kills: list[Kill] = []
-        for kill in round["kills"]:
-            kills.append(Kill(
-                tick=kill["tick"],
-                seconds=kill["seconds"],
-                clock_time=kill["clockTime"],
-                attacker_steam_id=kill["attackerSteamID"],
-                attacker_name=kill["attackerName"],
-                attacker_team=kill["attackerTeam"],
-                attacker_side=kill["attackerSide"],
-                attacker_x=kill["attackerX"],
-                attacker_y=kill["attackerY"],
-                attacker_z=kill["attackerZ"],
-                attacker_view_x=kill["attackerViewX"],
-                attacker_view_y=kill["attackerViewY"],
-                victim_steam_id=kill["victimSteamID"],
-                victim_name=kill["victimName"],
-                victim_team=kill["victimTeam"],
-                victim_side=kill["victimSide"],
-                victim_x=kill["victimX"],
-                victim_y=kill["victimY"],
-                victim_z=kill["victimZ"],
-                victim_view_x=kill["victimViewX"],
-                victim_view_y=kill["victimViewY"],
-                assister_steam_id=kill["assisterSteamID"],
-                assister_name=kill["assisterName"],
-                assister_team=kill["assisterTeam"],
-                assister_side=kill["assisterSide"],
-                is_suicide=kill["isSuicide"],
-                is_teamkill=kill["isTeamkill"],
-                is_wallbang=kill["isWallbang"],
-                penetrated_objects=kill["penetratedObjects"],
-                is_first_kill=kill["isFirstKill"],
-                is_headshot=kill["isHeadshot"],
-                is_victim_blinded=kill["victimBlinded"],
-                is_attacker_blinded=kill["attackerBlinded"],
-                flash_thrower_steam_id=kill["flashThrowerSteamID"],
-                flash_thrower_name=kill["flashThrowerName"],
-                flash_thrower_team=kill["flashThrowerTeam"],
-                flash_thrower_side=kill["flashThrowerSide"],
-                is_no_scope=kill["noScope"],
-                is_through_smoke=kill["thruSmoke"],
-                distance=kill["distance"],
-                is_trade=kill["isTrade"],
-                player_traded_name=kill["playerTradedName"],
-                player_traded_team=kill["playerTradedTeam"],
-                player_traded_steam_id=kill["playerTradedSteamID"],
-                weapon=kill["weapon"],
-                weapon_class=kill["weaponClass"],
-            ))
+        ct: TeamFrameState
+        
+        ct_players: list[PlayerFrameState] = []
+        for player in frame["ct"]["players"]:
+            inventory: list[Weapon] = []
+            for weapon in player["inventory"] or []:
+                inventory.append(Weapon(
+                    weapon_name=weapon["weaponName"],
+                    weapon_class=weapon["weaponClass"],
+                    ammo_in_magazine=weapon["ammoInMagazine"],
+                    ammo_in_reserve=weapon["ammoInReserve"],
+                ))
 
-        damages: list[Damage] = []
-        for damage in round["damages"]:
-            damages.append(Damage(
-                tick=damage["tick"],
-                seconds=damage["seconds"],
-                clock_time=damage["clockTime"],
-                attacker_steam_id=damage["attackerSteamID"],
-                attacker_name=damage["attackerName"],
-                attacker_team=damage["attackerTeam"],
-                attacker_side=damage["attackerSide"],
-                attacker_x=damage["attackerX"],
-                attacker_y=damage["attackerY"],
-                attacker_z=damage["attackerZ"],
-                attacker_view_x=damage["attackerViewX"],
-                attacker_view_y=damage["attackerViewY"],
-                is_attacker_strafe=damage["attackerStrafe"],
-                victim_steam_id=damage["victimSteamID"],
-                victim_name=damage["victimName"],
-                victim_team=damage["victimTeam"],
-                victim_side=damage["victimSide"],
-                victim_x=damage["victimX"],
-                victim_y=damage["victimY"],
-                victim_z=damage["victimZ"],
-                victim_view_x=damage["victimViewX"],
-                victim_view_y=damage["victimViewY"],
-                weapon=damage["weapon"],
-                weapon_class=damage["weaponClass"],
-                hp_damage=damage["hpDamage"],
-                hp_damage_taken=damage["hpDamageTaken"],
-                armor_damage=damage["armorDamage"],
-                armor_damage_taken=damage["armorDamageTaken"],
-                hit_group=damage["hitGroup"],
-                is_friendly_fire=damage["isFriendlyFire"],
-                distance=damage["distance"],
-                zoom_level=damage["zoomLevel"],
+            ct_players.append(PlayerFrameState(
+                steam_id=player["steamID"],
+                name=player["name"],
+                team=player["team"],
+                side=player["side"],
+                x=player["x"],
+                y=player["y"],
+                z=player["z"],
+                velocity_x=player["velocityX"],
+                velocity_y=player["velocityY"],
+                velocity_z=player["velocityZ"],
+                view_x=player["viewX"],
+                view_y=player["viewY"],
+                hp=player["hp"],
+                armor=player["armor"],
+                active_weapon=player["activeWeapon"],
+                total_utility=player["totalUtility"],
+                is_alive=player["isAlive"],
+                is_blinded=player["isBlinded"],
+                is_airborne=player["isAirborne"],
+                is_ducking=player["isDucking"],
+                is_ducking_in_progress=player["isDuckingInProgress"],
+                is_unducking_in_progress=player["isUnDuckingInProgress"],
+                is_defusing=player["isDefusing"],
+                is_planting=player["isPlanting"],
+                is_reloading=player["isReloading"],
+                is_in_bomb_zone=player["isInBombZone"],
+                is_in_buy_zone=player["isInBuyZone"],
+                is_standing=player["isStanding"],
+                is_scoped=player["isScoped"],
+                is_walking=player["isWalking"],
+                is_unknown=player["isUnknown"],
+                inventory=inventory,
+                spotters=player["spotters"],
+                equipment_value=player["equipmentValue"],
+                equipment_value_freeze_time_end=player["equipmentValueFreezetimeEnd"],
+                equipment_value_round_start=player["equipmentValueRoundStart"],
+                cash=player["cash"],
+                cash_spend_this_round=player["cashSpendThisRound"],
+                cash_spend_total=player["cashSpendTotal"],
+                has_helmet=player["hasHelmet"],
+                has_defuse_kit=player["hasDefuse"],
+                has_bomb=player["hasBomb"],
+                ping=player["ping"],
+                zoom_level=player["zoomLevel"],
             ))
 
-        grenades: list[Grenade] = []
-        for grenade in round["grenades"]:
-            grenades.append(Grenade(
-                throw_tick=grenade["throwTick"],
-                destroy_tick=grenade["destroyTick"],
-                throw_seconds=grenade["throwSeconds"],
-                throw_clock_time=grenade["throwClockTime"],
-                destroy_seconds=grenade["destroySeconds"],
-                destroy_clock_time=grenade["destroyClockTime"],
-                thrower_steam_id=grenade["throwerSteamID"],
-                thrower_name=grenade["throwerName"],
-                thrower_team=grenade["throwerTeam"],
-                thrower_side=grenade["throwerSide"],
-                thrower_x=grenade["throwerX"],
-                thrower_y=grenade["throwerY"],
-                thrower_z=grenade["throwerZ"],
-                grenade_type=grenade["grenadeType"],
-                grenade_x=grenade["grenadeX"],
-                grenade_y=grenade["grenadeY"],
-                grenade_z=grenade["grenadeZ"],
-                entity_id=grenade["entityId"],
-            ))
+        ct = TeamFrameState(
+            side=frame["ct"]["side"],
+            team_name=frame["ct"]["teamName"],
+            team_eq_val=frame["ct"]["teamEqVal"],
+            alive_players=frame["ct"]["alivePlayers"],
+            total_utility=frame["ct"]["totalUtility"],
+            players=ct_players,
+        )
 
-        bomb_events: list[BombEvent] = []
-        for bomb_event in round["bombEvents"]:
-            bomb_events.append(BombEvent(
-                tick=bomb_event["tick"],
-                seconds=bomb_event["seconds"],
-                clock_time=bomb_event["clockTime"],
-                player_steam_id=bomb_event["playerSteamID"],
-                player_name=bomb_event["playerName"],
-                player_team=bomb_event["playerTeam"],
-                player_x=bomb_event["playerX"],
-                player_y=bomb_event["playerY"],
-                player_z=bomb_event["playerZ"],
-                bomb_action=bomb_event["bombAction"],
-                bomb_site=bomb_event["bombSite"],
+        projectiles: list[Projectile] = []
+        for projectile in frame["projectiles"]:
+            projectiles.append(Projectile(
+                projectile_type=projectile["projectileType"],
+                x=projectile["x"],
+                y=projectile["y"],
+                z=projectile["z"],
             ))
 
-        weapon_fires: list[WeaponFire] = []
-        for weapon_fire in round["weaponFires"]:
-            weapon_fires.append(WeaponFire(
-                tick=weapon_fire["tick"],
-                seconds=weapon_fire["seconds"],
-                clock_time=weapon_fire["clockTime"],
-                player_steam_id=weapon_fire["playerSteamID"],
-                player_name=weapon_fire["playerName"],
-                player_team=weapon_fire["playerTeam"],
-                player_side=weapon_fire["playerSide"],
-                player_x=weapon_fire["playerX"],
-                player_y=weapon_fire["playerY"],
-                player_z=weapon_fire["playerZ"],
-                player_view_x=weapon_fire["playerViewX"],
-                player_view_y=weapon_fire["playerViewY"],
-                is_player_strafe=weapon_fire["playerStrafe"],
-                weapon=weapon_fire["weapon"],
-                weapon_class=weapon_fire["weaponClass"],
-                ammo_in_magazine=weapon_fire["ammoInMagazine"],
-                ammo_in_reserve=weapon_fire["ammoInReserve"],
-                zoom_level=weapon_fire["zoomLevel"],
+        smokes: list[Smoke] = []
+        for smoke in frame["smokes"]:
+            smokes.append(Smoke(
+                grenade_entity_id=smoke["grenadeEntityID"],
+                start_tick=smoke["startTick"],
+                x=smoke["x"],
+                y=smoke["y"],
+                z=smoke["z"],
             ))
 
-        flashes: list[Flash] = []
-        for flash in round["flashes"]:
-            flashes.append(Flash(
-                tick=flash["tick"],
-                seconds=flash["seconds"],
-                clock_time=flash["clockTime"],
-                attacker_steam_id=flash["attackerSteamID"],
-                attacker_name=flash["attackerName"],
-                attacker_team=flash["attackerTeam"],
-                attacker_side=flash["attackerSide"],
-                attacker_x=flash["attackerX"],
-                attacker_y=flash["attackerY"],
-                attacker_z=flash["attackerZ"],
-                attacker_view_x=flash["attackerViewX"],
-                attacker_view_y=flash["attackerViewY"],
-                player_steam_id=flash["playerSteamID"],
-                player_name=flash["playerName"],
-                player_team=flash["playerTeam"],
-                player_side=flash["playerSide"],
-                player_x=flash["playerX"],
-                player_y=flash["playerY"],
-                player_z=flash["playerZ"],
-                player_view_x=flash["playerViewX"],
-                player_view_y=flash["playerViewY"],
-                flash_duration=flash["flashDuration"],
+        fires: list[Fire] = []
+        for fire in frame["fires"]:
+            fires.append(Fire(
+                unique_id=fire["uniqueID"],
+                x=fire["x"],
+                y=fire["y"],
+                z=fire["z"],
             ))
 
-        frames: list[Frame] = []
-        for frame in round["frames"]:
-            t: TeamFrameState
-            
-            t_players: list[PlayerFrameState] = []
-            for player in frame["t"]["players"]:
-                inventory: list[Weapon] = []
-                for weapon in player["inventory"] or []:
-                    inventory.append(Weapon(
-                        weapon_name=weapon["weaponName"],
-                        weapon_class=weapon["weaponClass"],
-                        ammo_in_magazine=weapon["ammoInMagazine"],
-                        ammo_in_reserve=weapon["ammoInReserve"],
-                    ))
-
-                t_players.append(PlayerFrameState(
-                    steam_id=player["steamID"],
-                    name=player["name"],
-                    team=player["team"],
-                    side=player["side"],
-                    x=player["x"],
-                    y=player["y"],
-                    z=player["z"],
-                    velocity_x=player["velocityX"],
-                    velocity_y=player["velocityY"],
-                    velocity_z=player["velocityZ"],
-                    view_x=player["viewX"],
-                    view_y=player["viewY"],
-                    hp=player["hp"],
-                    armor=player["armor"],
-                    active_weapon=player["activeWeapon"],
-                    total_utility=player["totalUtility"],
-                    is_alive=player["isAlive"],
-                    is_blinded=player["isBlinded"],
-                    is_airborne=player["isAirborne"],
-                    is_ducking=player["isDucking"],
-                    is_ducking_in_progress=player["isDuckingInProgress"],
-                    is_unducking_in_progress=player["isUnDuckingInProgress"],
-                    is_defusing=player["isDefusing"],
-                    is_planting=player["isPlanting"],
-                    is_reloading=player["isReloading"],
-                    is_in_bomb_zone=player["isInBombZone"],
-                    is_in_buy_zone=player["isInBuyZone"],
-                    is_standing=player["isStanding"],
-                    is_scoped=player["isScoped"],
-                    is_walking=player["isWalking"],
-                    is_unknown=player["isUnknown"],
-                    inventory=inventory,
-                    spotters=player["spotters"],
-                    equipment_value=player["equipmentValue"],
-                    equipment_value_freeze_time_end=player["equipmentValueFreezetimeEnd"],
-                    equipment_value_round_start=player["equipmentValueRoundStart"],
-                    cash=player["cash"],
-                    cash_spend_this_round=player["cashSpendThisRound"],
-                    cash_spend_total=player["cashSpendTotal"],
-                    has_helmet=player["hasHelmet"],
-                    has_defuse_kit=player["hasDefuse"],
-                    has_bomb=player["hasBomb"],
-                    ping=player["ping"],
-                    zoom_level=player["zoomLevel"],
-                ))
+        frames.append(Frame(
+            is_kill_frame = frame["isKillFrame"],
+            tick=frame["tick"],
+            seconds=frame["seconds"],
+            clock_time=frame["clockTime"],
+            t=t,
+            ct=ct,
+            bomb_planted=frame["bombPlanted"],
+            bomb_site=frame["bombsite"],
+            bomb=Bomb(
+                x=frame["bomb"]["x"],
+                y=frame["bomb"]["y"],
+                z=frame["bomb"]["z"],
+            ),
+            projectiles=projectiles,
+            smokes=smokes,
+            fires=fires
+        ))
 
-            t = TeamFrameState(
-                side=frame["t"]["side"],
-                team_name=frame["t"]["teamName"],
-                team_eq_val=frame["t"]["teamEqVal"],
-                alive_players=frame["t"]["alivePlayers"],
-                total_utility=frame["t"]["totalUtility"],
-                players=t_players,
-            )
+    return Round(
+        round_number=round["roundNum"],
+        is_warmup=round["isWarmup"],
+        start_tick=round["startTick"],
+        freeze_time_end_tick=round["freezeTimeEndTick"],
+        end_tick=round["endTick"],
+        end_official_tick=round["endOfficialTick"],
+        bomb_plant_tick=round["bombPlantTick"],
+        t_score=round["tScore"],
+        ct_score=round["ctScore"],
+        end_t_score=round["endTScore"],
+        end_ct_score=round["endCTScore"],
+        ct_team=round["ctTeam"],
+        t_team=round["tTeam"],
+        winning_side=round["winningSide"],
+        winning_team=round["winningTeam"],
+        losing_team=round["losingTeam"],
+        round_end_reason=round["roundEndReason"],
+        ct_freeze_time_end_eq_val=round["ctFreezeTimeEndEqVal"],
+        ct_round_start_eq_val=round["ctRoundStartEqVal"],
+        ct_round_spend_money=round["ctRoundSpendMoney"],
+        ct_buy_type=round["ctBuyType"],
+        t_freeze_time_end_eq_val=round["tFreezeTimeEndEqVal"],
+        t_round_start_eq_val=round["tRoundStartEqVal"],
+        t_round_spend_money=round["tRoundSpendMoney"],
+        t_buy_type=round["tBuyType"],
+        ct_side=ct_side,
+        t_side=t_side,
+        kills=kills,
+        damages=damages,
+        grenades=grenades,
+        bomb_events=bomb_events,
+        weapon_fires=weapon_fires,
+        flashes=flashes,
+        frames=frames,
+    )
 
-            ct: TeamFrameState
-            
-            ct_players: list[PlayerFrameState] = []
-            for player in frame["ct"]["players"]:
-                inventory: list[Weapon] = []
-                for weapon in player["inventory"] or []:
-                    inventory.append(Weapon(
-                        weapon_name=weapon["weaponName"],
-                        weapon_class=weapon["weaponClass"],
-                        ammo_in_magazine=weapon["ammoInMagazine"],
-                        ammo_in_reserve=weapon["ammoInReserve"],
-                    ))
-
-                ct_players.append(PlayerFrameState(
-                    steam_id=player["steamID"],
-                    name=player["name"],
-                    team=player["team"],
-                    side=player["side"],
-                    x=player["x"],
-                    y=player["y"],
-                    z=player["z"],
-                    velocity_x=player["velocityX"],
-                    velocity_y=player["velocityY"],
-                    velocity_z=player["velocityZ"],
-                    view_x=player["viewX"],
-                    view_y=player["viewY"],
-                    hp=player["hp"],
-                    armor=player["armor"],
-                    active_weapon=player["activeWeapon"],
-                    total_utility=player["totalUtility"],
-                    is_alive=player["isAlive"],
-                    is_blinded=player["isBlinded"],
-                    is_airborne=player["isAirborne"],
-                    is_ducking=player["isDucking"],
-                    is_ducking_in_progress=player["isDuckingInProgress"],
-                    is_unducking_in_progress=player["isUnDuckingInProgress"],
-                    is_defusing=player["isDefusing"],
-                    is_planting=player["isPlanting"],
-                    is_reloading=player["isReloading"],
-                    is_in_bomb_zone=player["isInBombZone"],
-                    is_in_buy_zone=player["isInBuyZone"],
-                    is_standing=player["isStanding"],
-                    is_scoped=player["isScoped"],
-                    is_walking=player["isWalking"],
-                    is_unknown=player["isUnknown"],
-                    inventory=inventory,
-                    spotters=player["spotters"],
-                    equipment_value=player["equipmentValue"],
-                    equipment_value_freeze_time_end=player["equipmentValueFreezetimeEnd"],
-                    equipment_value_round_start=player["equipmentValueRoundStart"],
-                    cash=player["cash"],
-                    cash_spend_this_round=player["cashSpendThisRound"],
-                    cash_spend_total=player["cashSpendTotal"],
-                    has_helmet=player["hasHelmet"],
-                    has_defuse_kit=player["hasDefuse"],
-                    has_bomb=player["hasBomb"],
-                    ping=player["ping"],
-                    zoom_level=player["zoomLevel"],
-                ))
+def deserialize_demo_data(demo_file_data: dict) -> Demo:
+    game_rounds: list[Round] = []
+    for round in demo_file_data["gameRounds"]:
+        game_rounds.append(deserialize_round(round))
 
-            ct = TeamFrameState(
-                side=frame["ct"]["side"],
-                team_name=frame["ct"]["teamName"],
-                team_eq_val=frame["ct"]["teamEqVal"],
-                alive_players=frame["ct"]["alivePlayers"],
-                total_utility=frame["ct"]["totalUtility"],
-                players=ct_players,
-            )
+    return deserialize_demo_metadata(demo_file_data, game_rounds)
 
-            projectiles: list[Projectile] = []
-            for projectile in frame["projectiles"]:
-                projectiles.append(Projectile(
-                    projectile_type=projectile["projectileType"],
-                    x=projectile["x"],
-                    y=projectile["y"],
-                    z=projectile["z"],
-                ))
+class LazyRoundList(Sequence):
+    """
+    A read-only list of Rounds that only decodes a round the first time it is accessed
+    sources holds whatever decode_round needs to build each round (i.e. the round's entry of "gameRounds")
+    Decoded rounds are kept around until a cap is reached, then the least recently used ones are dropped
+    (and decoded again if they are accessed again), so looping over every round only ever holds a few in memory:
+        max_decoded_rounds caps how many rounds are kept
+        max_decoded_bytes caps the total size of the kept rounds' sources (i.e. their JSON), which a round's memory use grows with
+        (a decoded round takes up several times the size of its JSON, so this is a budget rather than an exact amount of memory)
+    The size of a source is get_source_size(source), which is len(source) by default (the number of bytes of raw JSON)
+    The round that was just accessed is always kept, even if it is bigger than max_decoded_bytes on its own
+    """
 
-            smokes: list[Smoke] = []
-            for smoke in frame["smokes"]:
-                smokes.append(Smoke(
-                    grenade_entity_id=smoke["grenadeEntityID"],
-                    start_tick=smoke["startTick"],
-                    x=smoke["x"],
-                    y=smoke["y"],
-                    z=smoke["z"],
-                ))
+    def __init__(
+        self,
+        sources: Sequence,
+        decode_round: Callable[..., Round] = deserialize_round,
+        max_decoded_rounds: int | None = None,
+        max_decoded_bytes: int | None = None,
+        get_source_size: Callable[..., int] = len,
+    ) -> None:
+        if max_decoded_rounds is not None and max_decoded_rounds < 1:
+            raise ValueError(f"max_decoded_rounds must be at least 1, got {max_decoded_rounds}")
+        if max_decoded_bytes is not None and max_decoded_bytes < 0:
+            raise ValueError(f"max_decoded_bytes can't be negative, got {max_decoded_bytes}")
+        self.sources: Sequence = sources
+        self.decode_round: Callable[..., Round] = decode_round
+        self.max_decoded_rounds: int | None = max_decoded_rounds
+        self.max_decoded_bytes: int | None = max_decoded_bytes
+        self.get_source_size: Callable[..., int] = get_source_size
+        self.decoded_rounds: OrderedDict[int, Round] = OrderedDict()
+        # Round index -> get_source_size of its source, for the rounds in decoded_rounds (only kept track of with max_decoded_bytes)
+        self.decoded_sizes: dict[int, int] = {}
+        self.decoded_byte_count: int = 0
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def _is_over_cap(self) -> bool:
+        if self.max_decoded_rounds is not None and len(self.decoded_rounds) > self.max_decoded_rounds:
+            return True
+        return self.max_decoded_bytes is not None and self.decoded_byte_count > self.max_decoded_bytes
+
+    def _get_round(self, index: int) -> Round:
+        if index in self.decoded_rounds:
+            self.decoded_rounds.move_to_end(index)
+            return self.decoded_rounds[index]
+        round: Round = self.decode_round(self.sources[index])
+        self.decoded_rounds[index] = round
+        if self.max_decoded_bytes is not None:
+            self.decoded_sizes[index] = self.get_source_size(self.sources[index])
+            self.decoded_byte_count += self.decoded_sizes[index]
+        while len(self.decoded_rounds) > 1 and self._is_over_cap():
+            dropped_index, _ = self.decoded_rounds.popitem(last=False)
+            self.decoded_byte_count -= self.decoded_sizes.pop(dropped_index, 0)
+        return round
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_round(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("round index out of range")
+        return self._get_round(index)
+
+    def __iter__(self) -> Iterator[Round]:
+        for index in range(len(self)):
+            yield self._get_round(index)
+
+    def is_decoded(self, index: int) -> bool:
+        return index in self.decoded_rounds
+
+    def drop_decoded_rounds(self) -> None:
+        """
+        Forgets every decoded round (they will be decoded again when next accessed)
+        """
+        self.decoded_rounds.clear()
+        self.decoded_sizes.clear()
+        self.decoded_byte_count = 0
 
-            fires: list[Fire] = []
-            for fire in frame["fires"]:
-                fires.append(Fire(
-                    unique_id=fire["uniqueID"],
-                    x=fire["x"],
-                    y=fire["y"],
-                    z=fire["z"],
-                ))
+    def __repr__(self) -> str:
+        return f"LazyRoundList({len(self)} rounds, {len(self.decoded_rounds)} decoded)"
 
-            frames.append(Frame(
-                is_kill_frame = frame["isKillFrame"],
-                tick=frame["tick"],
-                seconds=frame["seconds"],
-                clock_time=frame["clockTime"],
-                t=t,
-                ct=ct,
-                bomb_planted=frame["bombPlanted"],
-                bomb_site=frame["bombsite"],
-                bomb=Bomb(
-                    x=frame["bomb"]["x"],
-                    y=frame["bomb"]["y"],
-                    z=frame["bomb"]["z"],
-                ),
-                projectiles=projectiles,
-                smokes=smokes,
-                fires=fires
-            ))
+def deserialize_demo_data_lazily(demo_file_data: dict, max_decoded_rounds: int | None = None) -> Demo:
+    """
+    Like deserialize_demo_data, but demo.game_rounds is a LazyRoundList - each round is only deserialized when it is first accessed,
+    so i.e. only looking at round 16 doesn't pay for deserializing the other 29
+    The rounds are already parsed dicts, which have no size to cap memory by, so only the number of decoded rounds can be capped
+    (decoding.decode_demo_data_lazily can cap the bytes too)
+    """
+    return deserialize_demo_metadata(demo_file_data, LazyRoundList(demo_file_data["gameRounds"], deserialize_round, max_decoded_rounds))
 
-        game_rounds.append(Round(
-            round_number=round["roundNum"],
-            is_warmup=round["isWarmup"],
-            start_tick=round["startTick"],
-            freeze_time_end_tick=round["freezeTimeEndTick"],
-            end_tick=round["endTick"],
-            end_official_tick=round["endOfficialTick"],
-            bomb_plant_tick=round["bombPlantTick"],
-            t_score=round["tScore"],
-            ct_score=round["ctScore"],
-            end_t_score=round["endTScore"],
-            end_ct_score=round["endCTScore"],
-            ct_team=round["ctTeam"],
-            t_team=round["tTeam"],
-            winning_side=round["winningSide"],
-            winning_team=round["winningTeam"],
-            losing_team=round["losingTeam"],
-            round_end_reason=round["roundEndReason"],
-            ct_freeze_time_end_eq_val=round["ctFreezeTimeEndEqVal"],
-            ct_round_start_eq_val=round["ctRoundStartEqVal"],
-            ct_round_spend_money=round["ctRoundSpendMoney"],
-            ct_buy_type=round["ctBuyType"],
-            t_freeze_time_end_eq_val=round["tFreezeTimeEndEqVal"],
-            t_round_start_eq_val=round["tRoundStartEqVal"],
-            t_round_spend_money=round["tRoundSpendMoney"],
-            t_buy_type=round["tBuyType"],
-            ct_side=ct_side,
-            t_side=t_side,
-            kills=kills,
-            damages=damages,
-            grenades=grenades,
-            bomb_events=bomb_events,
-            weapon_fires=weapon_fires,
-            flashes=flashes,
-            frames=frames,
-        ))
+def deserialize_demo_metadata(demo_file_data: dict, game_rounds: Sequence[Round]) -> Demo:
+    """
+    Turns everything in the parsed demo file except for "gameRounds" into a Demo with the given rounds
+    """
+    player_connections: list[PlayerConnection] = []
+    for connection in demo_file_data["playerConnections"]:
+        player_connections.append(
+            PlayerConnection(
+                tick=connection["tick"],
+                action=connection["action"],
+                steam_id=connection["steamID"],
+            )
+        )
 
     structured_demo = Demo(
         match_id=demo_file_data["matchID"],
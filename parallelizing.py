@@ -0,0 +1,315 @@
+import enum
+import functools
+import gc
+import heapq
+import itertools
+import json
+import os
+import pickle
+import time
+import types
+import typing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, fields, is_dataclass
+import msgspec
+import numpy as np
+import decoding
+import models
+import snapshots
+import timelining
+
+# Deserializing a demo is mostly the per-round frame loops of models.deserialize_round, and every round is independent of the others,
+# so the rounds can be spread over a process pool.
+# Pickling a deserialized Round back to the parent costs about as much as deserializing it in the first place (it is a very deep object graph),
+# so workers send back the round's snapshot columns (see snapshots.py) - a few dozen flat arrays - and the parent builds the objects from those.
+
+ROUNDS_KEY: str = "gameRounds"
+
+def _deserialize_round_to_columns(round_json: bytes) -> tuple[dict, dict[str, str], list[str]]:
+    """
+    Runs in a worker process - deserializes one round's JSON and returns it as snapshot columns
+    """
+    writer: snapshots.SnapshotWriter = snapshots.SnapshotWriter()
+    writer.write_rows([models.deserialize_round(json.loads(round_json))], models.Round, "")
+    return (writer.arrays, writer.kinds, writer.strings.values)
+
+def split_demo_json(demo_json: bytes | str) -> tuple[dict, list[bytes]]:
+    """
+    Splits the parser's JSON output into everything except the rounds (decoded) and each round's JSON (not decoded)
+    """
+    top_level: dict[str, msgspec.Raw] = msgspec.json.decode(demo_json, type=dict[str, msgspec.Raw])
+    rounds_json: list[msgspec.Raw] = msgspec.json.decode(top_level.pop(ROUNDS_KEY), type=list[msgspec.Raw])
+    header: dict = {key: json.loads(bytes(value)) for key, value in top_level.items()}
+    return (header, [bytes(round_json) for round_json in rounds_json])
+
+def deserialize_demo_data_in_parallel(demo_json: bytes | str, worker_count: int | None = None, executor: Executor | None = None) -> models.Demo:
+    """
+    Equivalent to models.deserialize_demo_data(json.loads(demo_json)), but the rounds are deserialized by a pool of worker processes
+    The rounds come back in the same order as in the JSON
+    Pass an existing executor to reuse its workers (i.e. when deserializing many demos), otherwise a pool of worker_count processes is made
+    """
+    header, rounds_json = split_demo_json(demo_json)
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+    if executor is None and worker_count <= 1:
+        game_rounds: list[models.Round] = [models.deserialize_round(json.loads(round_json)) for round_json in rounds_json]
+        return models.deserialize_demo_metadata(header, game_rounds)
+
+    owns_executor: bool = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=min(worker_count, max(len(rounds_json), 1)))
+    try:
+        game_rounds = [
+            snapshots.SnapshotReader(arrays, kinds, strings).read_rows(models.Round, "", 1)[0]
+            for arrays, kinds, strings in executor.map(_deserialize_round_to_columns, rounds_json)
+        ]
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    return models.deserialize_demo_metadata(header, game_rounds)
+
+def deserialize_demo_file_in_parallel(json_file_path: str, worker_count: int | None = None, executor: Executor | None = None) -> models.Demo:
+    """
+    deserialize_demo_data_in_parallel for a parser output file (or a gzipped one from the parse cache)
+    """
+    return deserialize_demo_data_in_parallel(decoding.read_demo_file(json_file_path), worker_count, executor)
+
+def time_deserialization(json_file_path: str, worker_counts: Iterable[int] | None = None, repeat_count: int = 3) -> dict[int, float]:
+    """
+    The best wall-clock seconds (of repeat_count tries) it takes to deserialize a parser output file with each number of worker processes
+    1 worker is the serial models.deserialize_demo_data, and the pools are started before the clock starts (as they are when reused across demos)
+    Only worth running on a machine with several CPUs - with one CPU the workers just take turns
+
+    Usage:
+        print(parallelizing.time_deserialization("match.json", [1, 2, 4, 8]))
+    """
+    demo_json: bytes = decoding.read_demo_file(json_file_path)
+    if worker_counts is None:
+        worker_counts = sorted({1, os.cpu_count() or 1})
+    seconds_taken: dict[int, float] = {}
+    for worker_count in worker_counts:
+        executor: ProcessPoolExecutor | None = None if worker_count <= 1 else ProcessPoolExecutor(max_workers=worker_count)
+        try:
+            if executor is not None:
+                # Makes the pool start every worker
+                list(executor.map(abs, range(worker_count * 4)))
+            tries: list[float] = []
+            for _ in range(repeat_count):
+                start_time: float = time.perf_counter()
+                if executor is None:
+                    models.deserialize_demo_data(json.loads(demo_json))
+                else:
+                    deserialize_demo_data_in_parallel(demo_json, worker_count, executor)
+                tries.append(time.perf_counter() - start_time)
+            seconds_taken[worker_count] = min(tries)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    return seconds_taken
+
+# Building a timeline is mostly creating every round's events, and apart from the previous frame carried through a round
+# (see timelining.iter_round_events) the rounds don't depend on each other, so they can be spread over a process pool as well.
+# Pickling events back to the parent takes longer than creating them, so workers send each round's events msgpack encoded,
+# one list per event class (which msgspec decodes straight into the event dataclasses) plus the order the classes came in.
+
+# (event classes, the index into the event classes of every event in order, one encoded list of events per event class)
+EventBatch = tuple[list[type], bytes, list[bytes]]
+# The dtype of the indexes into the event classes
+CLASS_CODE_DTYPE: type = np.uint16
+
+def _get_decoded_annotation(annotation: typing.Any, is_frame_event: bool) -> typing.Any:
+    """
+    float -> int | float (so ints that were given as floats stay ints), for frame diff events timelining.Weapon -> models.Weapon,
+    and every dataclass (i.e. an event's Player, Position or Weapon) -> its _get_decoded_class, including inside of lists and unions
+    """
+    if annotation is float:
+        return int | float
+    if annotation is timelining.Weapon and is_frame_event:
+        annotation = models.Weapon
+    if is_dataclass(annotation) and issubclass(annotation, enum.Enum) is False:
+        return _get_decoded_class(annotation)
+    arguments: tuple = typing.get_args(annotation)
+    if typing.get_origin(annotation) is list:
+        return list[_get_decoded_annotation(arguments[0], is_frame_event)]
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        return typing.Union[tuple(_get_decoded_annotation(argument, is_frame_event) for argument in arguments)]
+    return annotation
+
+def _has_decoded_class(annotation: typing.Any) -> bool:
+    """
+    Whether a _get_decoded_annotation annotation holds any of the _get_decoded_class classes
+    """
+    return getattr(annotation, "__decoded_from__", None) is not None or any(_has_decoded_class(argument) for argument in typing.get_args(annotation))
+
+@functools.cache
+def _get_decoded_class(model_class: type) -> type:
+    """
+    msgspec decodes into the classes' annotations, which don't always match what the events hold
+    (i.e. the frame diff events hold the player's models.Weapon where their classes say timelining.Weapon, some of them have a PositionedPlayerWithView
+    where their classes say PositionedPlayer, an UnscopeEvent's weapon can be None, and a kill by the world has a Player whose every field is None),
+    so events and every object inside of them are decoded as a subclass that allows what they really hold
+    (and then given back their own class, see _restore_class)
+    """
+    is_frame_event: bool = any(
+        model_class in detector.event_classes for detector in timelining.get_default_detectors() if detector.kind == "player"
+    )
+    type_hints: dict[str, typing.Any] = typing.get_type_hints(model_class)
+    if is_frame_event:
+        type_hints["player"] = timelining.get_frame_event_player_class(model_class)
+    decoded_fields: list[tuple[str, typing.Any]] = [
+        (f.name, _get_decoded_annotation(type_hints[f.name], is_frame_event) | None) for f in fields(model_class)
+    ]
+    namespace: dict[str, typing.Any] = {"__annotations__": dict(decoded_fields), "__module__": __name__}
+    if "__slots__" in model_class.__dict__:
+        # No slots of its own, so it has the same layout as model_class (which _restore_class needs to change the objects' class)
+        namespace["__slots__"] = ()
+    decoded_class: type = dataclass(frozen=model_class.__dataclass_params__.frozen)(type(model_class.__name__, (model_class,), namespace))
+    decoded_class.__decoded_from__ = model_class
+    # The fields that can hold other decoded objects, which _restore_class has to go into
+    decoded_class.__nested_fields__ = tuple(name for name, annotation in decoded_fields if _has_decoded_class(annotation))
+    return decoded_class
+
+def _restore_class(value: typing.Any) -> None:
+    """
+    Gives a decoded object (and every object inside of it, see _get_decoded_class) back its own class
+    """
+    if isinstance(value, list):
+        for item in value:
+            _restore_class(item)
+        return
+    model_class: type | None = getattr(value.__class__, "__decoded_from__", None)
+    if model_class is None:
+        return
+    for name in value.__class__.__nested_fields__:
+        _restore_class(getattr(value, name))
+    # (object.__setattr__ gets past the __setattr__ of frozen dataclasses)
+    object.__setattr__(value, "__class__", model_class)
+
+def _encode_hook(value: typing.Any) -> typing.Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise NotImplementedError(f"Can't encode objects of type {value.__class__.__name__}")
+
+def encode_events(events: Iterable[timelining.Event]) -> EventBatch:
+    """
+    Encodes a list of events so they can be sent between processes (see decode_events)
+    """
+    class_codes: dict[type, int] = {}
+    class_events: list[list[timelining.Event]] = []
+    codes: list[int] = []
+    for event in events:
+        code: int | None = class_codes.get(event.__class__, None)
+        if code is None:
+            code = len(class_codes)
+            class_codes[event.__class__] = code
+            class_events.append([])
+        codes.append(code)
+        class_events[code].append(event)
+    encoder: msgspec.msgpack.Encoder = msgspec.msgpack.Encoder(enc_hook=_encode_hook)
+    return (list(class_codes.keys()), np.array(codes, dtype=CLASS_CODE_DTYPE).tobytes(), [encoder.encode(events) for events in class_events])
+
+def decode_class_events(event_class: type, encoded: bytes) -> list[timelining.Event]:
+    """
+    Decodes one of the encoded lists of events of an EventBatch (every event of one class)
+    """
+    # Making tens of thousands of objects keeps setting off the garbage collector, which then goes over every object in memory each time
+    # (events can't refer back to themselves, so there's nothing for it to find anyway)
+    was_gc_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        events: list[timelining.Event] = msgspec.msgpack.decode(encoded, type=list[_get_decoded_class(event_class)])
+        for event in events:
+            _restore_class(event)
+    finally:
+        if was_gc_enabled:
+            gc.enable()
+    return events
+
+def decode_events(batch: EventBatch) -> list[timelining.Event]:
+    """
+    The events encode_events was given, in the same order
+    Numbers that were NumPy scalars come back as plain Python numbers
+    """
+    event_classes, codes, encoded_events = batch
+    class_events: list[Iterator[timelining.Event]] = [
+        iter(decode_class_events(event_class, encoded)) for event_class, encoded in zip(event_classes, encoded_events)
+    ]
+    return [next(class_events[code]) for code in np.frombuffer(codes, dtype=CLASS_CODE_DTYPE).tolist()]
+
+def _deserialize_round_data(round_data: bytes | dict) -> models.Round:
+    return models.deserialize_round(json.loads(round_data) if isinstance(round_data, bytes) else round_data)
+
+def _create_round_event_batch(round_data: bytes | dict, pickled_registry: bytes) -> EventBatch:
+    """
+    Runs in a worker process - creates one round's events (from the round's JSON or its already decoded JSON) and encodes them
+    """
+    return encode_events(timelining.iter_round_events(_deserialize_round_data(round_data), pickle.loads(pickled_registry)))
+
+def _split_game_data(game_data: dict | bytes | str) -> tuple[dict, list]:
+    """
+    Splits the parser's output (as JSON or as the decoded JSON) into everything except the rounds and each round's data
+    """
+    if isinstance(game_data, dict):
+        return ({key: value for key, value in game_data.items() if key != ROUNDS_KEY}, game_data.get(ROUNDS_KEY, None) or [])
+    return split_demo_json(game_data)
+
+def iter_timeline_in_parallel(
+    game_data: dict | bytes | str,
+    worker_count: int | None = None,
+    executor: Executor | None = None,
+    registry: timelining.DetectorRegistry | None = None,
+) -> Iterator[timelining.Event]:
+    """
+    Yields the same events as timelining.iter_timeline(models.deserialize_demo_data(game_data)), but every round is deserialized
+    and has its events created by a pool of worker processes
+    Each round's events are yielded once that round (and every round before it) is done
+    game_data is the parser's output, either as JSON (i.e. decoding.read_demo_file) or as the decoded JSON (i.e. parsing.parse_demo_file)
+    Pass an existing executor to reuse its workers, otherwise a pool of worker_count processes is made
+    The workers get their own copy of the registry (so it has to be picklable), and its detector timings don't include the rounds' detectors
+    """
+    header, rounds_data = _split_game_data(game_data)
+    if registry is None:
+        registry = timelining.DetectorRegistry()
+    demo_events: list[timelining.Event] = sorted(
+        timelining.create_demo_events(models.deserialize_demo_metadata(header, []), registry), key=lambda event: event.tick
+    )
+    if worker_count is None:
+        worker_count = os.cpu_count() or 1
+
+    owns_executor: bool = False
+    round_events: Iterator[timelining.Event]
+    if executor is None and worker_count <= 1:
+        round_events = (event for round_data in rounds_data for event in timelining.iter_round_events(_deserialize_round_data(round_data), registry))
+    else:
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=min(worker_count, max(len(rounds_data), 1)))
+            owns_executor = True
+        # Pickled once up front, so a registry that can't be pickled (i.e. one with a lambda detector) fails here rather than in the pool
+        pickled_registry: bytes = pickle.dumps(registry)
+        # map hands out every round straight away and gives back the batches in round order
+        round_batches: Iterator[EventBatch] = executor.map(_create_round_event_batch, rounds_data, itertools.repeat(pickled_registry))
+        round_events = (event for batch in round_batches for event in decode_events(batch))
+    try:
+        yield from heapq.merge(demo_events, round_events, key=lambda event: event.tick)
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+def create_timeline_in_parallel(
+    game_data: dict | bytes | str,
+    worker_count: int | None = None,
+    executor: Executor | None = None,
+    registry: timelining.DetectorRegistry | None = None,
+) -> timelining.Timeline:
+    """
+    Equivalent to timelining.create_timeline(models.deserialize_demo_data(game_data)), with the rounds spread over worker processes
+    (see iter_timeline_in_parallel)
+    """
+    return timelining.Timeline(events=list(iter_timeline_in_parallel(game_data, worker_count, executor, registry)))
+
+def create_timeline_file_in_parallel(json_file_path: str, worker_count: int | None = None, executor: Executor | None = None) -> timelining.Timeline:
+    """
+    create_timeline_in_parallel for a parser output file (or a gzipped one from the parse cache)
+    """
+    return create_timeline_in_parallel(decoding.read_demo_file(json_file_path), worker_count, executor)
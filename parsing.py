@@ -1,13 +1,99 @@
+import json
+import os
 from awpy.parser import DemoParser
 from awpy.types import Game
+import caching
 
+# 128 parse_rate ideally matches with the 128 ticks per second of the demo file to mean player position is polled every second
+DEFAULT_PARSE_RATE: int = 128
 
-def parse_demo_file(demo_file_name: str) -> Game:
+# The sections of each round in awpy's output that each of the program's outputs needs
+# "frames" is by far the slowest (and largest) section to parse, so outputs that don't need it let the parser skip it
+OUTPUT_SECTIONS: dict[str, set[str]] = {
+    "timeline": {"kills", "damages", "grenades", "bombEvents", "weaponFires", "flashes", "frames"}, # events.csv and event_descriptions.csv
+    "round_csvs": {"damages", "frames"}, # round_N.csv (and the interval versions)
+    "round_action_csvs": {"kills", "damages", "bombEvents"}, # round_N_actions.csv
+    "vision": {"frames"}, # round_visualizations and area_controlled.csv
+    "event_tables": {"kills", "damages", "grenades", "bombEvents", "weaponFires", "flashes", "frames"}, # event_tables/<event class>.csv
+    "timeline_file": {"kills", "damages", "grenades", "bombEvents", "weaponFires", "flashes", "frames"}, # events.timeline (see timeline_files.py)
+    "windowed_stats": {"kills", "damages", "grenades", "bombEvents", "weaponFires", "flashes", "frames"}, # windowed_stats.csv (see windowing.py)
+}
+ALL_OUTPUTS: list[str] = list(OUTPUT_SECTIONS.keys())
+
+def get_parser_options(outputs: list[str]) -> dict:
+    """
+    Works out which sections of the demo the parser needs to parse to create the given outputs (see OUTPUT_SECTIONS)
+    Returns the frame related parse_demo_file keyword arguments
+    """
+    unknown_outputs: list[str] = [output for output in outputs if output not in OUTPUT_SECTIONS]
+    if len(unknown_outputs) > 0:
+        raise ValueError(f"Unknown outputs {unknown_outputs}, the options are {ALL_OUTPUTS}")
+    required_sections: set[str] = set()
+    for output in outputs:
+        required_sections |= OUTPUT_SECTIONS[output]
+    return {
+        "parse_frames": "frames" in required_sections,
+    }
+
+def parse_demo_file(demo_file_name: str, use_cache: bool = True, parse_frames: bool = True) -> Game:
     """
     Given a demo file name, parse it and return the data
+    If use_cache is True, the parsed data is read from (or saved to) the on-disk parse cache
+    parse_frames=False skips the per-frame player/world state (every round's "frames" list will be empty), which is much faster
+    (see get_parser_options for working out whether the frames are needed)
     """
-    # 128 parse_rate ideally matches with the 128 ticks per second of the demo file to mean player position is polled every second
-    p = DemoParser(demofile=demo_file_name, parse_rate=128, parse_frames=True)
+    parser_parameters: dict = {
+        "parse_rate": DEFAULT_PARSE_RATE,
+        "parse_frames": parse_frames,
+    }
+
+    cache_key: str | None = None
+    if use_cache:
+        cache_key = caching.get_cache_key(demo_file_name, parser_parameters)
+        cached_data: Game | None = caching.load_cached_game(cache_key)
+        if cached_data is not None:
+            return cached_data
+        if parse_frames is False:
+            # A cached parse that includes every frame has everything a frameless parse would have
+            cached_data = caching.load_cached_game(caching.get_cache_key(demo_file_name, {**parser_parameters, "parse_frames": True}))
+            if cached_data is not None:
+                return cached_data
+
+    p = DemoParser(demofile=demo_file_name, **parser_parameters)
     data = p.parse()
+
+    if cache_key is not None:
+        caching.save_game_to_cache(cache_key, data)
     return data
-   
\ No newline at end of file
+
+def parse_demo_file_to_json(demo_file_name: str, use_cache: bool = True) -> str:
+    """
+    Given a demo file name, parse it and return the path of the parser's JSON output (gzipped if it is in the parse cache)
+    instead of the data, so that streaming.DemoStream can read it round by round
+    The rounds are cleaned by awpy (knife, warmup and restarted rounds removed) just like parse_demo_file's, and it shares parse_demo_file's cache entries
+    Cleaning needs the whole match in memory, so the first parse of a demo still loads it once - reading it back from the cache doesn't
+    """
+    parser_parameters: dict = {
+        "parse_rate": DEFAULT_PARSE_RATE,
+        "parse_frames": True,
+    }
+
+    cache_key: str | None = None
+    if use_cache:
+        cache_key = caching.get_cache_key(demo_file_name, parser_parameters)
+        cache_file_path: str = caching.get_cache_file_path(cache_key)
+        if os.path.isfile(cache_file_path):
+            os.utime(cache_file_path)
+            return cache_file_path
+
+    p = DemoParser(demofile=demo_file_name, **parser_parameters)
+    data: Game = p.parse()
+
+    if cache_key is not None:
+        caching.save_game_to_cache(cache_key, data)
+        return caching.get_cache_file_path(cache_key)
+    # The parser's own output file is from before cleaning, so it is overwritten with the cleaned rounds
+    json_file_path: str = os.path.join(p.outpath, p.output_file)
+    with open(json_file_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    return json_file_path
@@ -0,0 +1,71 @@
+from collections.abc import Sequence
+from typing import Generic, TypeVar, overload
+import models
+
+# The coarser intervals (in seconds) asked for alongside the 1 second frames (see parsing_2.parse)
+DEFAULT_INTERVALS_SECONDS: list[int] = [5, 10, 15]
+
+T = TypeVar("T")
+
+class FrameView(Sequence, Generic[T]):
+    """
+    A read-only view of every n-th item of a list of frames (or anything else that is one-to-one with frames)
+    Indexing the view returns the original objects, so no frame or player state is copied
+    """
+
+    def __init__(self, frames: Sequence[T], indices: list[int]) -> None:
+        self.frames: Sequence[T] = frames
+        self.indices: list[int] = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+    @overload
+    def __getitem__(self, index: slice) -> "FrameView[T]": ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FrameView(self.frames, self.indices[index])
+        return self.frames[self.indices[index]]
+
+    def __repr__(self) -> str:
+        return f"FrameView({len(self)} of {len(self.frames)} frames)"
+
+def get_interval_frame_indices(ticks: Sequence[int], tick_rate: int, interval_seconds: float) -> list[int]:
+    """
+    Given the (ascending) ticks of a round's frames, returns the indices of the frames that start each interval
+    Intervals are measured from the first frame - for each interval the first frame at or after its start tick is used
+    """
+    interval_ticks: float = interval_seconds * tick_rate
+    if interval_ticks <= 0:
+        raise ValueError(f"The interval must be a positive amount of time, got {interval_seconds} seconds")
+
+    indices: list[int] = []
+    if len(ticks) == 0:
+        return indices
+    next_interval_start: float = ticks[0]
+    for index, tick in enumerate(ticks):
+        if tick >= next_interval_start:
+            indices.append(index)
+            # Skip over any intervals that had no frames in them (i.e. a gap in the parse)
+            while next_interval_start <= tick:
+                next_interval_start += interval_ticks
+    return indices
+
+def resample_frames(frames: Sequence[models.Frame], tick_rate: int, interval_seconds: float) -> FrameView[models.Frame]:
+    """
+    Returns a view of the frames that has one frame per interval_seconds
+    """
+    return FrameView(frames, get_interval_frame_indices([frame.tick for frame in frames], tick_rate, interval_seconds))
+
+def resample_round(round: models.Round, tick_rate: int, intervals_seconds: list[float] = DEFAULT_INTERVALS_SECONDS) -> dict[float, FrameView[models.Frame]]:
+    """
+    Returns a map of interval (in seconds) to a view of the round's frames at that interval
+    All of the views share the round's frame objects, so asking for more intervals doesn't need another parse (or copy)
+    """
+    ticks: list[int] = [frame.tick for frame in round.frames]
+    return {
+        interval_seconds: FrameView(round.frames, get_interval_frame_indices(ticks, tick_rate, interval_seconds))
+        for interval_seconds in intervals_seconds
+    }
@@ -0,0 +1,266 @@
+import json
+import types
+import typing
+from collections.abc import Mapping, Sequence
+from dataclasses import fields, is_dataclass
+import numpy as np
+import categories
+import models
+
+# Saves a models.Demo to a single .npz file (and loads it back) so that an analysis session doesn't have to start from awpy again.
+# Loading only needs NumPy - not awpy or the Go parser.
+#
+# Every list of models objects is stored as a table with one array per field, i.e. every kill of round 3 is stored as the arrays
+# "rounds/3/kills.tick", "rounds/3/kills.attacker_name", ... (one element per kill).
+# Nested objects get their own tables under a longer prefix ("rounds/3/frames.t.players.hp" is every player's hp in every frame of round 3),
+# with a "#count" array on the parent recording how many children each row has (-1 for None).
+# Strings are stored as codes into one string table for the whole file (see categories.SymbolTable).
+
+SNAPSHOT_VERSION: int = 1
+SNAPSHOT_FILE_EXTENSION: str = ".npz"
+METADATA_PREFIX: str = "demo/"
+ROUND_PREFIX: str = "rounds/{round_index}/"
+COUNT_SUFFIX: str = "#count"
+NULL_SUFFIX: str = "#null"
+STRINGS_KEY: str = "__strings__"
+SCHEMA_KEY: str = "__schema__"
+
+def _strip_none(annotation: typing.Any) -> typing.Any:
+    """
+    int | None -> int
+    """
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        arguments: list = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            return arguments[0]
+    return annotation
+
+def get_field_layouts(model_class: type) -> list[tuple[str, str, type | None]]:
+    """
+    Returns (field name, layout, child class) for each field of a models class, where layout is
+    "object" for a nested models object, "objects" for a list of models objects, "values" for any other list and "value" for everything else
+    """
+    type_hints: dict[str, typing.Any] = typing.get_type_hints(model_class)
+    layouts: list[tuple[str, str, type | None]] = []
+    for f in fields(model_class):
+        annotation: typing.Any = _strip_none(type_hints[f.name])
+        arguments: tuple = typing.get_args(annotation)
+        if is_dataclass(annotation):
+            layouts.append((f.name, "object", annotation))
+        elif (annotation is list or typing.get_origin(annotation) is list) and len(arguments) > 0 and is_dataclass(arguments[0]):
+            layouts.append((f.name, "objects", arguments[0]))
+        elif annotation is list or typing.get_origin(annotation) is list:
+            layouts.append((f.name, "values", None))
+        else:
+            layouts.append((f.name, "value", None))
+    return layouts
+
+def _to_bytes_array(value: typing.Any) -> np.ndarray:
+    return np.frombuffer(json.dumps(value, separators=(",", ":")).encode("utf-8"), dtype=np.uint8)
+
+def _from_bytes_array(array: np.ndarray) -> typing.Any:
+    return json.loads(array.tobytes().decode("utf-8"))
+
+class SnapshotWriter:
+    """
+    Collects the arrays of a snapshot file (see save_demo_snapshot)
+    """
+
+    def __init__(self) -> None:
+        self.arrays: dict[str, np.ndarray] = {}
+        self.kinds: dict[str, str] = {}
+        self.strings: categories.SymbolTable = categories.SymbolTable()
+
+    def write_values(self, key: str, values: list) -> None:
+        """
+        Stores one column of plain values as the smallest array type that holds all of them exactly
+        """
+        present_values: list = [value for value in values if value is not None]
+        value_types: set[type] = {type(value) for value in present_values}
+        has_nulls: bool = len(present_values) < len(values)
+        kind: str
+        if len(present_values) == 0:
+            kind = "none"
+        elif value_types == {bool}:
+            kind = "bool"
+            self.arrays[key] = np.array([value is True for value in values], dtype=bool)
+        elif value_types == {int}:
+            kind = "int"
+            self.arrays[key] = np.array([0 if value is None else value for value in values], dtype=np.int64)
+        elif value_types <= {int, float}:
+            kind = "float"
+            self.arrays[key] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        elif value_types == {str}:
+            kind = "str"
+            self.arrays[key] = np.array([self.strings.encode(value) for value in values], dtype=np.int32)
+            # None is already stored as categories.MISSING_CODE
+            has_nulls = False
+        else:
+            # Anything else (i.e. awpy's untyped matchmakingRanks) is stored as JSON text in the string table
+            kind = "json"
+            self.arrays[key] = np.array([self.strings.encode(None if value is None else json.dumps(value)) for value in values], dtype=np.int32)
+            has_nulls = False
+        if has_nulls and kind != "none":
+            self.arrays[key + NULL_SUFFIX] = np.array([value is None for value in values], dtype=bool)
+        self.kinds[key] = kind
+
+    def write_rows(self, rows: Sequence, model_class: type, prefix: str, skip_fields: tuple[str, ...] = ()) -> None:
+        """
+        Stores a list of model_class objects (or decoding's structs) as one array per field under the given prefix
+        """
+        for field_name, layout, child_class in get_field_layouts(model_class):
+            if field_name in skip_fields:
+                continue
+            key: str = prefix + field_name
+            values: list = [getattr(row, field_name) for row in rows]
+            if layout == "value":
+                self.write_values(key, values)
+                continue
+            self.kinds[key] = layout
+            if layout == "object":
+                self.arrays[key + NULL_SUFFIX] = np.array([value is None for value in values], dtype=bool)
+                self.write_rows([value for value in values if value is not None], child_class, key + ".")
+                continue
+            self.arrays[key + COUNT_SUFFIX] = np.array([-1 if value is None else len(value) for value in values], dtype=np.int32)
+            children: list = [child for value in values if value is not None for child in value]
+            if layout == "objects":
+                self.write_rows(children, child_class, key + ".")
+            else:
+                self.write_values(key + ".", children)
+
+    def save(self, file_path: str, compress: bool = False) -> None:
+        self.arrays[STRINGS_KEY] = _to_bytes_array(self.strings.values)
+        self.arrays[SCHEMA_KEY] = _to_bytes_array({"version": SNAPSHOT_VERSION, "kinds": self.kinds})
+        save_function = np.savez_compressed if compress else np.savez
+        with open(file_path, "wb") as file:
+            save_function(file, **self.arrays)
+
+def save_demo_snapshot(demo: models.Demo, file_path: str, compress: bool = False) -> None:
+    """
+    Saves a demo (and all of its rounds) to a snapshot file that load_demo_snapshot can read back
+    compress=True makes the file several times smaller but loading it slower
+    """
+    writer: SnapshotWriter = SnapshotWriter()
+    writer.write_rows([demo], models.Demo, METADATA_PREFIX, skip_fields=("game_rounds",))
+    writer.arrays[METADATA_PREFIX + "round_count"] = np.array([len(demo.game_rounds)], dtype=np.int64)
+    for round_index, round in enumerate(demo.game_rounds):
+        writer.write_rows([round], models.Round, ROUND_PREFIX.format(round_index=round_index))
+    writer.save(file_path, compress)
+
+class SnapshotReader:
+    """
+    Builds models objects back from the arrays a SnapshotWriter collected (whether they were saved to a file or not)
+    """
+
+    def __init__(self, arrays: Mapping[str, np.ndarray], kinds: dict[str, str], strings: list[str]) -> None:
+        self.arrays: Mapping[str, np.ndarray] = arrays
+        self.kinds: dict[str, str] = kinds
+        self.strings: list[str] = strings
+        self.keys: set[str] = set(arrays.keys())
+
+    def get_column(self, key: str) -> np.ndarray:
+        """
+        Returns one stored array, i.e. get_column("rounds/0/frames.t.players.hp")
+        """
+        return self.arrays[key]
+
+    def read_values(self, key: str, row_count: int) -> list:
+        kind: str = self.kinds[key]
+        if kind == "none":
+            return [None] * row_count
+        codes_or_values: list = self.arrays[key].tolist()
+        if kind == "str":
+            return [None if code == categories.MISSING_CODE else self.strings[code] for code in codes_or_values]
+        if kind == "json":
+            return [None if code == categories.MISSING_CODE else json.loads(self.strings[code]) for code in codes_or_values]
+        if key + NULL_SUFFIX in self.keys:
+            is_null: list[bool] = self.arrays[key + NULL_SUFFIX].tolist()
+            return [None if null else value for value, null in zip(codes_or_values, is_null)]
+        return codes_or_values
+
+    def read_rows(self, model_class: type, prefix: str, row_count: int, skip_fields: tuple[str, ...] = ()) -> list:
+        """
+        Builds row_count model_class objects back from the arrays stored under prefix
+        """
+        columns: list[list] = []
+        for field_name, layout, child_class in get_field_layouts(model_class):
+            if field_name in skip_fields:
+                columns.append([None] * row_count)
+                continue
+            key: str = prefix + field_name
+            if layout == "value":
+                columns.append(self.read_values(key, row_count))
+            elif layout == "object":
+                is_null: list[bool] = self.arrays[key + NULL_SUFFIX].tolist()
+                children: list = self.read_rows(child_class, key + ".", row_count - sum(is_null))
+                child_iterator = iter(children)
+                columns.append([None if null else next(child_iterator) for null in is_null])
+            else:
+                counts: list[int] = self.arrays[key + COUNT_SUFFIX].tolist()
+                child_count: int = sum(count for count in counts if count > 0)
+                if layout == "objects":
+                    children = self.read_rows(child_class, key + ".", child_count)
+                else:
+                    children = self.read_values(key + ".", child_count)
+                column: list = []
+                start: int = 0
+                for count in counts:
+                    if count < 0:
+                        column.append(None)
+                        continue
+                    column.append(children[start:start + count])
+                    start += count
+                columns.append(column)
+        return [model_class(*values) for values in zip(*columns)]
+
+class DemoSnapshot(SnapshotReader):
+    """
+    An open snapshot file - arrays are only read from the file when they are first needed
+    get_demo() returns a models.Demo whose rounds are only read (and turned back into models objects) when accessed,
+    and get_column() returns a single stored array (i.e. every player's x position in every frame of a round) without building any objects
+
+    Usage:
+        with DemoSnapshot(file_path) as snapshot:
+            demo = snapshot.get_demo()
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path: str = file_path
+        self.npz_file = np.load(file_path, allow_pickle=False)
+        schema: dict = _from_bytes_array(self.npz_file[SCHEMA_KEY])
+        if schema["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"{file_path} is a version {schema['version']} snapshot, only version {SNAPSHOT_VERSION} can be read")
+        super().__init__(self.npz_file, schema["kinds"], _from_bytes_array(self.npz_file[STRINGS_KEY]))
+        self.round_count: int = int(self.npz_file[METADATA_PREFIX + "round_count"][0])
+
+    def get_round(self, round_index: int) -> models.Round:
+        if round_index < 0 or round_index >= self.round_count:
+            raise IndexError(f"Round index {round_index} is out of range, the snapshot has {self.round_count} rounds")
+        return self.read_rows(models.Round, ROUND_PREFIX.format(round_index=round_index), 1)[0]
+
+    def get_demo(self, max_decoded_rounds: int | None = None) -> models.Demo:
+        """
+        Returns the saved demo, with game_rounds as a models.LazyRoundList that reads each round from the file when it is accessed
+        """
+        demo: models.Demo = self.read_rows(models.Demo, METADATA_PREFIX, 1, skip_fields=("game_rounds",))[0]
+        demo.game_rounds = models.LazyRoundList(range(self.round_count), self.get_round, max_decoded_rounds)
+        return demo
+
+    def close(self) -> None:
+        self.npz_file.close()
+
+    def __enter__(self) -> "DemoSnapshot":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+def load_demo_snapshot(file_path: str) -> models.Demo:
+    """
+    Loads a demo saved with save_demo_snapshot - every round is read straight away and the file is closed
+    (to only read the rounds that are used, open a DemoSnapshot instead, which keeps the file open until it is closed)
+    """
+    with DemoSnapshot(file_path) as snapshot:
+        demo: models.Demo = snapshot.get_demo()
+        demo.game_rounds = list(demo.game_rounds)
+    return demo
@@ -0,0 +1,186 @@
+import gzip
+import json
+from collections.abc import Iterator
+from typing import Any, TextIO
+import models
+
+# awpy's parse() loads the parser's whole JSON output into one dict (and deserialize_demo_data then copies it into dataclasses),
+# so memory use peaks at roughly twice the size of a very large JSON tree.
+# This module reads that JSON output incrementally instead, decoding one entry of "gameRounds" at a time.
+
+ROUNDS_KEY: str = "gameRounds"
+READ_SIZE: int = 1024 * 1024
+WHITESPACE: str = " \t\n\r"
+
+class IncrementalJsonReader:
+    """
+    Reads the top-level object of a JSON file piece by piece, only holding the value currently being decoded in memory
+    """
+
+    def __init__(self, file: TextIO) -> None:
+        self.file: TextIO = file
+        self.decoder: json.JSONDecoder = json.JSONDecoder()
+        self.buffer: str = ""
+        self.position: int = 0
+        self.is_end_of_file: bool = False
+
+    def _read_more(self, minimum_size: int = READ_SIZE) -> bool:
+        """
+        Reads more of the file into the buffer, dropping whatever has already been consumed
+        Returns False if there was nothing left to read
+        """
+        if self.is_end_of_file:
+            return False
+        chunk: str = self.file.read(max(minimum_size, READ_SIZE))
+        if chunk == "":
+            self.is_end_of_file = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Returns the next non-whitespace character without consuming it ("" at the end of the file)
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self._read_more() is False:
+                return ""
+
+    def _expect(self, character: str) -> None:
+        """
+        Consumes the next non-whitespace character, which must be the one given
+        """
+        next_character: str = self._peek()
+        if next_character != character:
+            raise ValueError(f"Expected '{character}' at offset {self.position} of the JSON buffer but found '{next_character}'")
+        self.position += 1
+
+    def _decode_value(self) -> Any:
+        """
+        Decodes the next complete JSON value, reading more of the file until the value fits in the buffer
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value continues past the end of the buffer - double the buffer so large values don't take many retries
+                if self._read_more(len(self.buffer)) is False:
+                    raise
+                continue
+            # A number that ends right at the end of the buffer might have been cut off, so make sure it is really finished
+            if end == len(self.buffer) and self.is_end_of_file is False:
+                self._read_more()
+                continue
+            self.position = end
+            return value
+
+    def iter_items(self, streamed_key: str) -> Iterator[tuple[str, Any]]:
+        """
+        Yields (key, value) pairs for the top-level object
+        The array under streamed_key is not decoded all at once - a (streamed_key, element) pair is yielded for each of its elements
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key: str = self._decode_value()
+            self._expect(":")
+            if key == streamed_key and self._peek() == "[":
+                self._expect("[")
+                if self._peek() != "]":
+                    while True:
+                        yield key, self._decode_value()
+                        if self._peek() == ",":
+                            self._expect(",")
+                            continue
+                        break
+                self._expect("]")
+            else:
+                yield key, self._decode_value()
+            if self._peek() == ",":
+                self._expect(",")
+                continue
+            self._expect("}")
+            return
+
+def open_json_file(json_file_path: str) -> TextIO:
+    """
+    Opens a parser output file for reading, whether or not it is gzipped (like the files in the parse cache)
+    """
+    if json_file_path.endswith(".gz"):
+        return gzip.open(json_file_path, "rt", encoding="utf-8")
+    return open(json_file_path, "r", encoding="utf-8")
+
+class DemoStream:
+    """
+    Streams the rounds of a parsed demo file one models.Round at a time
+    The non-round data (match metadata, server vars, player connections, etc.) is read up front and available as `header`
+    (awpy writes "gameRounds" last - anything after it only ends up in `header` once every round has been read)
+
+    Note: awpy's parse() also "cleans" the rounds, which needs the whole match at once.
+    Streamed rounds are as the parser wrote them, except that warmup rounds are skipped.
+
+    Usage:
+        with DemoStream(json_file_path) as stream:
+            for round in stream.iter_rounds():
+                ...
+    """
+
+    def __init__(self, json_file_path: str, skip_warmup_rounds: bool = True) -> None:
+        self.json_file_path: str = json_file_path
+        self.skip_warmup_rounds: bool = skip_warmup_rounds
+        self.file: TextIO = open_json_file(json_file_path)
+        self.items: Iterator[tuple[str, Any]] = IncrementalJsonReader(self.file).iter_items(ROUNDS_KEY)
+        self.header: dict = {}
+        self.pending_round_data: dict | None = None
+        for key, value in self.items:
+            if key == ROUNDS_KEY:
+                self.pending_round_data = value
+                break
+            self.header[key] = value
+
+    def iter_round_data(self) -> Iterator[dict]:
+        """
+        Yields the raw parser output for each round
+        """
+        round_data: dict | None = self.pending_round_data
+        self.pending_round_data = None
+        if round_data is not None:
+            if not (self.skip_warmup_rounds and round_data["isWarmup"]):
+                yield round_data
+            del round_data
+        for key, value in self.items:
+            if key != ROUNDS_KEY:
+                self.header[key] = value
+                continue
+            if self.skip_warmup_rounds and value["isWarmup"]:
+                continue
+            yield value
+
+    def iter_rounds(self) -> Iterator[models.Round]:
+        """
+        Yields each round as a models.Round, decoding the next round only once the previous one has been handled
+        """
+        for round_data in self.iter_round_data():
+            yield models.deserialize_round(round_data)
+
+    def get_demo(self) -> models.Demo:
+        """
+        Returns the demo's metadata as a models.Demo without any rounds in it (game_rounds is an empty list)
+        """
+        return models.deserialize_demo_metadata(self.header, game_rounds=[])
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "DemoStream":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
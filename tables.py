@@ -0,0 +1,534 @@
+import csv
+import enum
+import functools
+import os
+import types
+import typing
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, fields, is_dataclass
+import numpy as np
+import categories
+import columnar
+import models
+import timelining
+
+# A columnar alternative to a timeline's list of event objects.
+# Every KillEvent holds two PositionedPlayerWithViews, two Positions, two Views and a Weapon (and weapon fires and the frame diff events
+# are much the same), so a whole match's timeline is millions of small objects.
+# An EventStore keeps one EventTable per event class instead, with one array per (flattened) field of the class,
+# i.e. KillEvent's table has "attacker.steam_id", "attacker.position.x", "attacker.view.x", "weapon.name", ... columns.
+# The frame diff events are written straight into their tables from the frame diff arrays without creating any event objects.
+# EventRow is a lightweight proxy (row.attacker.position.x works) for code that still wants something that looks like an event.
+
+# The frame diff checks put the player's models.Weapon straight into their events, which names the weapon's name field differently
+MODELS_WEAPON_FIELDS: dict[str, str] = {"name": "weapon_name"}
+# Where each column of an event's player is read from on the PlayerFrameState (for the frame diff events)
+PLAYER_FRAME_ATTRIBUTES: dict[tuple[str, ...], str] = {
+    ("steam_id",): "steam_id",
+    ("team",): "team",
+    ("name",): "name",
+    ("position", "x"): "x",
+    ("position", "y"): "y",
+    ("position", "z"): "z",
+    ("view", "x"): "view_x",
+    ("view", "y"): "view_y",
+}
+
+@dataclass
+class ColumnSpec:
+    path: tuple[str, ...]
+    kind: str # "int", "float", "bool", "str", "side" or "object" (anything else, i.e. an inventory)
+
+    @property
+    def name(self) -> str:
+        return ".".join(self.path)
+
+@dataclass
+class TableSchema:
+    """
+    The columns of an event class's table
+    """
+    event_class: type
+    columns: list[ColumnSpec]
+    # Path -> class of every nested object (i.e. ("attacker",) -> PositionedPlayerWithView, ("attacker", "position") -> Position)
+    nested_classes: dict[tuple[str, ...], type]
+    # Nested objects that can be None (i.e. ("assister",)) - their columns are all missing when they are
+    # (this is every nested object, as awpy leaves some None even where the annotation doesn't allow it, i.e. the weapon of an UnscopeEvent)
+    optional_paths: list[tuple[str, ...]]
+    # Fixed length tuples, which are stored as one column per element (i.e. ("old_velocity",) -> 3 is "old_velocity.0", "old_velocity.1", ...)
+    tuple_lengths: dict[tuple[str, ...], int]
+
+def _strip_none(annotation: typing.Any) -> typing.Any:
+    """
+    int | None -> int
+    """
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        arguments: list = [argument for argument in typing.get_args(annotation) if argument is not type(None)]
+        if len(arguments) == 1:
+            return arguments[0]
+    return annotation
+
+def _get_scalar_kind(annotation: typing.Any) -> str:
+    if annotation is bool:
+        return "bool"
+    if annotation is int:
+        return "int"
+    if annotation is float:
+        return "float"
+    if annotation is str:
+        return "str"
+    if annotation is timelining.Side:
+        return "side"
+    return "object"
+
+@functools.cache
+def get_frame_event_classes() -> frozenset[type]:
+    """
+    The event classes found by the frame diff ("player") detectors
+    """
+    return frozenset(event_class for detector in timelining.get_default_detectors() if detector.kind == "player" for event_class in detector.event_classes)
+
+@functools.cache
+def get_table_schema(event_class: type) -> TableSchema:
+    schema: TableSchema = TableSchema(event_class, [], {}, [], {})
+
+    def add_fields(model_class: type, prefix: tuple[str, ...]) -> None:
+        for field_name, annotation in typing.get_type_hints(model_class).items():
+            path: tuple[str, ...] = prefix + (field_name,)
+            annotation = _strip_none(annotation)
+            if path == ("player",) and event_class in get_frame_event_classes():
+                annotation = timelining.get_frame_event_player_class(event_class)
+            arguments: tuple = typing.get_args(annotation)
+            if isinstance(annotation, type) and is_dataclass(annotation) and issubclass(annotation, enum.Enum) is False:
+                schema.nested_classes[path] = annotation
+                schema.optional_paths.append(path)
+                add_fields(annotation, path)
+            elif typing.get_origin(annotation) is tuple and len(arguments) > 0 and Ellipsis not in arguments:
+                schema.tuple_lengths[path] = len(arguments)
+                for element_index, argument in enumerate(arguments):
+                    schema.columns.append(ColumnSpec(path + (str(element_index),), _get_scalar_kind(argument)))
+            else:
+                schema.columns.append(ColumnSpec(path, _get_scalar_kind(annotation)))
+
+    add_fields(event_class, ())
+    return schema
+
+def _get_path_value(value: typing.Any, path: tuple[str, ...]) -> typing.Any:
+    """
+    Follows a column's path from an event (or a dict of fields) to the column's value (None if anything on the way is None)
+    """
+    for name in path:
+        if value is None:
+            return None
+        if isinstance(value, dict):
+            value = value.get(name, None)
+        elif isinstance(value, tuple):
+            value = value[int(name)]
+        elif isinstance(value, models.Weapon):
+            value = getattr(value, MODELS_WEAPON_FIELDS.get(name, name))
+        else:
+            value = getattr(value, name)
+    return value
+
+def _get_column_path_values(values: list, path: tuple[str, ...]) -> list:
+    """
+    _get_path_value for a whole column at once
+    """
+    for name in path:
+        if any(isinstance(value, tuple) for value in values):
+            values = [None if value is None else value[int(name)] for value in values]
+        else:
+            attribute_name: str = MODELS_WEAPON_FIELDS.get(name, name)
+            values = [None if value is None else getattr(value, attribute_name if isinstance(value, models.Weapon) else name) for value in values]
+    return values
+
+def _get_frame_event_field_columns(event_class: type, player_frame_pairs: list[tuple[models.PlayerFrameState, models.PlayerFrameState]]) -> dict[str, list]:
+    """
+    The fields of the frame diff events other than tick, seconds, clock_time and player (see timelining.get_frame_event_fields),
+    as field name -> every event's value
+    """
+    rows: list[dict] = [timelining.get_frame_event_fields(event_class, previous, current) for previous, current in player_frame_pairs]
+    field_names: list[str] = [f.name for f in fields(event_class) if f.name not in ("tick", "seconds", "clock_time", "player")]
+    return {field_name: [row.get(field_name, None) for row in rows] for field_name in field_names}
+
+class EventTable:
+    """
+    Every event of one class as one array per column (see TableSchema)
+    Strings and sides are stored as codes into the store's string table (categories.MISSING_CODE for None),
+    and nulls holds a mask for every column that has any None values (where ints are columnar.MISSING_INT, floats are nan and bools are False)
+    """
+
+    def __init__(self, schema: TableSchema, columns: dict[str, typing.Any], nulls: dict[str, np.ndarray], strings: categories.SymbolTable, length: int) -> None:
+        self.schema: TableSchema = schema
+        self.event_class: type = schema.event_class
+        self.columns: dict[str, typing.Any] = columns
+        self.nulls: dict[str, np.ndarray] = nulls
+        self.strings: categories.SymbolTable = strings
+        self.length: int = length
+        self.kinds: dict[str, str] = {column.name: column.kind for column in schema.columns}
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        return f"EventTable({self.event_class.__name__}, {self.length} rows, {len(self.columns)} columns)"
+
+    def get_column_names(self) -> list[str]:
+        return list(self.columns.keys())
+
+    def get_column(self, name: str) -> typing.Any:
+        """
+        The stored array of a column (codes for strings and sides, a list for "object" columns)
+        """
+        return self.columns[name]
+
+    def _decode(self, name: str, value: typing.Any) -> typing.Any:
+        kind: str = self.kinds[name]
+        if kind == "str":
+            return self.strings.decode(value)
+        if kind == "side":
+            side_name: str | None = self.strings.decode(value)
+            return None if side_name is None else timelining.Side[side_name]
+        return value
+
+    def get_values(self, name: str) -> list:
+        """
+        A column as a list of the values the events would have (None where they would be None)
+        """
+        column: typing.Any = self.columns[name]
+        values: list = column.tolist() if isinstance(column, np.ndarray) else list(column)
+        if self.kinds[name] in ("str", "side"):
+            values = [self._decode(name, value) for value in values]
+        if name in self.nulls:
+            values = [None if is_null else value for value, is_null in zip(values, self.nulls[name].tolist())]
+        return values
+
+    def get_value(self, name: str, index: int) -> typing.Any:
+        if name in self.nulls and self.nulls[name][index]:
+            return None
+        column: typing.Any = self.columns[name]
+        value: typing.Any = column[index].item() if isinstance(column, np.ndarray) else column[index]
+        return self._decode(name, value)
+
+    def is_null(self, path: tuple[str, ...], index: int) -> bool:
+        name: str = ".".join(path)
+        return name in self.nulls and bool(self.nulls[name][index])
+
+    def get_row(self, index: int) -> "EventRow":
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError(f"Row {index} is out of range, the table has {self.length} rows")
+        return EventRow(self, index)
+
+    def __getitem__(self, index: int) -> "EventRow":
+        return self.get_row(index)
+
+    def __iter__(self) -> Iterator["EventRow"]:
+        for index in range(self.length):
+            yield EventRow(self, index)
+
+    def build_object(self, model_class: type, path: tuple[str, ...], index: int) -> typing.Any:
+        """
+        Builds the (nested) object at path of a row, i.e. build_object(Position, ("attacker", "position"), 0)
+        """
+        if path in self.schema.optional_paths and self.is_null(path, index):
+            return None
+        values: dict[str, typing.Any] = {}
+        for f in fields(model_class):
+            values[f.name] = self.get_field(path + (f.name,), index)
+        return model_class(**values)
+
+    def get_field(self, path: tuple[str, ...], index: int) -> typing.Any:
+        if path in self.schema.nested_classes:
+            return self.build_object(self.schema.nested_classes[path], path, index)
+        if path in self.schema.tuple_lengths:
+            return tuple(self.get_value(".".join(path + (str(element_index),)), index) for element_index in range(self.schema.tuple_lengths[path]))
+        return self.get_value(".".join(path), index)
+
+    def to_event(self, index: int) -> typing.Any:
+        """
+        Builds the event object of a row
+        (the weapons of frame diff events come back as timelining.Weapons rather than the models.Weapons create_timeline puts in them)
+        """
+        return self.build_object(self.event_class, (), index)
+
+    def to_events(self) -> list:
+        return [self.to_event(index) for index in range(self.length)]
+
+    def take(self, indices: typing.Sequence[int] | np.ndarray) -> "EventTable":
+        """
+        A new table of some of the rows (i.e. table.take(np.nonzero(table.get_column("is_headshot"))[0]))
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        columns: dict[str, typing.Any] = {
+            name: column[indices] if isinstance(column, np.ndarray) else [column[index] for index in indices.tolist()]
+            for name, column in self.columns.items()
+        }
+        nulls: dict[str, np.ndarray] = {name: mask[indices] for name, mask in self.nulls.items()}
+        return EventTable(self.schema, columns, nulls, self.strings, len(indices))
+
+    def write_csv(self, file_path: str) -> None:
+        """
+        Writes the table with one column per (flattened) field
+        """
+        column_values: list[list] = [self.get_values(name) for name in self.columns.keys()]
+        with open(file_path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.columns.keys())
+            writer.writerows(zip(*column_values))
+
+def concatenate_tables(first: EventTable, second: EventTable) -> EventTable:
+    """
+    The rows of two tables of the same event class (sharing a string table), one after the other
+    """
+    columns: dict[str, typing.Any] = {
+        name: np.concatenate([column, second.columns[name]]) if isinstance(column, np.ndarray) else column + second.columns[name]
+        for name, column in first.columns.items()
+    }
+    nulls: dict[str, np.ndarray] = {}
+    for name in dict.fromkeys(list(first.nulls.keys()) + list(second.nulls.keys())):
+        nulls[name] = np.concatenate([first.nulls.get(name, np.zeros(len(first), dtype=bool)), second.nulls.get(name, np.zeros(len(second), dtype=bool))])
+    return EventTable(first.schema, columns, nulls, first.strings, len(first) + len(second))
+
+class EventRow:
+    """
+    A lightweight stand-in for one event of an EventTable - attributes are read from the table's columns when they are accessed,
+    so row.attacker.position.x is just one array lookup (row.attacker is another EventRow, or None if the event's attacker would be)
+    """
+    __slots__ = ("_table", "_index", "_path")
+
+    def __init__(self, table: EventTable, index: int, path: tuple[str, ...] = ()) -> None:
+        self._table: EventTable = table
+        self._index: int = index
+        self._path: tuple[str, ...] = path
+
+    def __getattr__(self, name: str) -> typing.Any:
+        path: tuple[str, ...] = self._path + (name,)
+        table: EventTable = self._table
+        if path in table.schema.nested_classes:
+            if path in table.schema.optional_paths and table.is_null(path, self._index):
+                return None
+            return EventRow(table, self._index, path)
+        if path in table.schema.tuple_lengths or ".".join(path) in table.columns:
+            return table.get_field(path, self._index)
+        raise AttributeError(f"{self.get_class().__name__} has no field {name}")
+
+    def get_class(self) -> type:
+        return self._table.schema.nested_classes.get(self._path, self._table.event_class)
+
+    def to_object(self) -> typing.Any:
+        """
+        Builds the real object (the event, or the nested object this row stands in for)
+        """
+        return self._table.build_object(self.get_class(), self._path, self._index)
+
+    def __str__(self) -> str:
+        return str(self.to_object())
+
+    def __repr__(self) -> str:
+        return f"EventRow({self.get_class().__name__}, row {self._index})"
+
+class EventTableBuilder:
+    """
+    Collects an event class's rows (from event objects or straight from column values) until the table is built
+    """
+
+    def __init__(self, event_class: type, strings: categories.SymbolTable) -> None:
+        self.schema: TableSchema = get_table_schema(event_class)
+        self.strings: categories.SymbolTable = strings
+        self.values: dict[str, list] = {column.name: [] for column in self.schema.columns}
+        # Whether each optional nested object (see TableSchema.optional_paths) is None
+        self.optional_nulls: dict[str, list[bool]] = {".".join(path): [] for path in self.schema.optional_paths}
+        self.length: int = 0
+
+    def append_event(self, event: typing.Any) -> None:
+        for column in self.schema.columns:
+            self.values[column.name].append(_get_path_value(event, column.path))
+        for path in self.schema.optional_paths:
+            self.optional_nulls[".".join(path)].append(_get_path_value(event, path) is None)
+        self.length += 1
+
+    def extend(self, values: dict[str, list], row_count: int) -> None:
+        """
+        Adds row_count rows given as column name -> values (optional nested objects that aren't given are assumed to not be None)
+        """
+        for name, column_values in self.values.items():
+            column_values.extend(values[name])
+        for name, nulls in self.optional_nulls.items():
+            nulls.extend(values.get(name, [False] * row_count))
+        self.length += row_count
+
+    def build(self) -> EventTable:
+        columns: dict[str, typing.Any] = {}
+        nulls: dict[str, np.ndarray] = {}
+        for column in self.schema.columns:
+            values: list = self.values[column.name]
+            is_null: list[bool] = [value is None for value in values]
+            has_nulls: bool = any(is_null)
+            if column.kind == "int":
+                columns[column.name] = np.array([columnar.MISSING_INT if value is None else value for value in values] if has_nulls else values, dtype=np.int64)
+            elif column.kind == "float":
+                columns[column.name] = np.array([np.nan if value is None else value for value in values] if has_nulls else values, dtype=np.float64)
+            elif column.kind == "bool":
+                columns[column.name] = np.array([value is True for value in values], dtype=bool)
+            elif column.kind == "str":
+                columns[column.name] = np.array([self.strings.encode(value) for value in values], dtype=np.int32)
+                # None is already stored as categories.MISSING_CODE
+                has_nulls = False
+            elif column.kind == "side":
+                columns[column.name] = np.array([self.strings.encode(None if value is None else value.name) for value in values], dtype=np.int32)
+                has_nulls = False
+            else:
+                columns[column.name] = list(values)
+                has_nulls = False
+            if has_nulls:
+                nulls[column.name] = np.array(is_null, dtype=bool)
+        for name, optional_nulls in self.optional_nulls.items():
+            nulls[name] = np.array(optional_nulls, dtype=bool)
+        return EventTable(self.schema, columns, nulls, self.strings, self.length)
+
+class EventStore:
+    """
+    One EventTable per event class, for a whole demo (or any number of rounds)
+
+    Usage:
+        store = build_event_store(demo)
+        kills = store.get_table(timelining.KillEvent)
+        headshot_distances = kills.get_column("distance")[kills.get_column("is_headshot")]
+        for kill in kills:
+            print(kill.attacker.name, kill.victim.position.x)
+    """
+
+    def __init__(self, registry: timelining.DetectorRegistry | None = None) -> None:
+        self.registry: timelining.DetectorRegistry = timelining.DetectorRegistry() if registry is None else registry
+        self.strings: categories.SymbolTable = categories.SymbolTable()
+        self.builders: dict[type, EventTableBuilder] = {}
+        self.tables: dict[type, EventTable] = {}
+
+    def get_builder(self, event_class: type) -> EventTableBuilder:
+        """
+        The builder of the rows of an event class that haven't been added to its table yet
+        """
+        if event_class not in self.builders:
+            self.builders[event_class] = EventTableBuilder(event_class, self.strings)
+        return self.builders[event_class]
+
+    def add_events(self, events: Iterable) -> None:
+        for event in events:
+            self.get_builder(event.__class__).append_event(event)
+
+    def add_demo(self, demo: models.Demo) -> None:
+        # Sorted by tick like create_timeline does (so i.e. the PlayerConnectionEvent rows are in the same order as its events)
+        self.add_events(sorted(timelining.create_demo_events(demo, self.registry), key=lambda event: event.tick))
+        for round in demo.game_rounds:
+            self.add_round(round)
+
+    def add_round(self, round: models.Round) -> None:
+        """
+        Adds every event of the round (rows of each table are in the same order as create_timeline puts their events in)
+        """
+        for detector in self.registry.get_detectors("round"):
+            self.add_events(sorted(self.registry.run_round_detector(detector, round), key=lambda event: event.tick))
+        if len(round.frames) < 2:
+            return
+        self.add_player_frame_events(round)
+        for detector in self.registry.get_detectors("world"):
+            for previous_frame, frame in zip(round.frames[:-1], round.frames[1:]):
+                self.add_events(detector.run(previous_frame, frame))
+
+    def add_player_frame_events(self, round: models.Round) -> None:
+        """
+        Writes what the "player" detectors find into the tables without creating any event objects
+        """
+        detectors: list[timelining.Detector] = self.registry.get_detectors("player")
+        if len(detectors) == 0:
+            return
+        diff: timelining.RoundFrameDiff = timelining.RoundFrameDiff(round)
+        # Ordered by (frame, position in the frame, detector) like create_frame_events
+        check_count: int = len(detectors)
+        keys: list[np.ndarray] = []
+        all_cells: list[np.ndarray] = [] # The [frame index - 1, slot] cell of each hit, as a flat index
+        for check_index, detector in enumerate(detectors):
+            pair_indices, slots, order_keys = diff.get_hits(detector.run(diff))
+            keys.append(order_keys * check_count + check_index)
+            all_cells.append(pair_indices * diff.arrays.slot_count + slots)
+        all_keys: np.ndarray = np.concatenate(keys)
+        order: np.ndarray = np.argsort(all_keys, kind="stable")
+        check_indices: np.ndarray = all_keys[order] % check_count
+        cells: np.ndarray = np.concatenate(all_cells)[order]
+
+        hits_by_class: dict[type, list[int]] = {}
+        for event_class in dict.fromkeys(detector.event_classes[0] for detector in detectors):
+            class_check_indices: list[int] = [check_index for check_index, detector in enumerate(detectors) if detector.event_classes[0] is event_class]
+            hits_by_class[event_class] = cells[np.isin(check_indices, class_check_indices)].tolist()
+
+        for event_class, class_cells in hits_by_class.items():
+            if len(class_cells) == 0:
+                continue
+            pair_indices: list[int] = [cell // diff.arrays.slot_count for cell in class_cells]
+            player_frame_pairs: list[tuple[models.PlayerFrameState, models.PlayerFrameState]] = [
+                diff.get_player_frames(cell // diff.arrays.slot_count, cell % diff.arrays.slot_count) for cell in class_cells
+            ]
+            frames: list[models.Frame] = [round.frames[pair_index + 1] for pair_index in pair_indices]
+            player_frames: list[models.PlayerFrameState] = [player_frame for _, player_frame in player_frame_pairs]
+            builder: EventTableBuilder = self.get_builder(event_class)
+            # The other fields, as field name -> every row's value (only made if the class has other fields)
+            event_fields: dict[str, list] | None = None
+            values: dict[str, list] = {}
+            for column in builder.schema.columns:
+                if column.path in (("tick",), ("seconds",), ("clock_time",)):
+                    values[column.name] = [getattr(frame, column.path[0]) for frame in frames]
+                elif column.path == ("player", "side"):
+                    values[column.name] = [timelining.Side.from_acronym(player_frame.side) for player_frame in player_frames]
+                elif column.path[0] == "player":
+                    attribute_name: str = PLAYER_FRAME_ATTRIBUTES[column.path[1:]]
+                    values[column.name] = [getattr(player_frame, attribute_name) for player_frame in player_frames]
+                else:
+                    if event_fields is None:
+                        event_fields = _get_frame_event_field_columns(event_class, player_frame_pairs)
+                    values[column.name] = _get_column_path_values(event_fields[column.path[0]], column.path[1:])
+            for path in builder.schema.optional_paths:
+                if path[0] != "player":
+                    if event_fields is None:
+                        event_fields = _get_frame_event_field_columns(event_class, player_frame_pairs)
+                    values[".".join(path)] = [value is None for value in _get_column_path_values(event_fields[path[0]], path[1:])]
+            builder.extend(values, len(class_cells))
+
+    def get_event_classes(self) -> list[type]:
+        return list(self.builders.keys())
+
+    def get_table(self, event_class: type) -> EventTable:
+        """
+        The table of an event class (an empty one if there were no events of that class)
+        """
+        builder: EventTableBuilder = self.get_builder(event_class)
+        if event_class not in self.tables or builder.length > 0:
+            # Rows are only kept as lists until the table is asked for, then they are moved into the table's arrays
+            new_rows: EventTable = builder.build()
+            self.builders[event_class] = EventTableBuilder(event_class, self.strings)
+            self.tables[event_class] = new_rows if event_class not in self.tables else concatenate_tables(self.tables[event_class], new_rows)
+        return self.tables[event_class]
+
+    def __len__(self) -> int:
+        return sum(builder.length for builder in self.builders.values()) + sum(len(table) for table in self.tables.values())
+
+    def write_csvs(self, directory: str) -> list[str]:
+        """
+        Writes every table to <directory>/<event class name>.csv and returns the file paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        file_paths: list[str] = []
+        for event_class in self.get_event_classes():
+            file_path: str = os.path.join(directory, f"{event_class.__name__}.csv")
+            self.get_table(event_class).write_csv(file_path)
+            file_paths.append(file_path)
+        return file_paths
+
+def build_event_store(demo: models.Demo, registry: timelining.DetectorRegistry | None = None) -> EventStore:
+    """
+    The columnar equivalent of create_timeline(demo, registry)
+    """
+    store: EventStore = EventStore(registry)
+    store.add_demo(demo)
+    return store
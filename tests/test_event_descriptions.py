@@ -0,0 +1,35 @@
+import csv
+import cli
+import timelining
+
+def create_player(steam_id: int, side: timelining.Side) -> timelining.PositionedPlayerWithView:
+    return timelining.PositionedPlayerWithView(
+        steam_id, "Team " + side.name, side, f"player {steam_id}", timelining.Position(0.0, 0.0, 0.0), timelining.View(0.0, 0.0)
+    )
+
+def test_overkill_damage_descriptions_are_written(tmp_path) -> None:
+    # awpy's hpDamage is the raw damage of the hit, while hpDamageTaken is capped at the health the victim had left
+    damage: timelining.DamageEvent = timelining.DamageEvent(
+        tick=100,
+        seconds=1.0,
+        clock_time="01:54",
+        attacker=create_player(1, timelining.Side.CT),
+        is_attacker_strafe=False,
+        victim=create_player(2, timelining.Side.T),
+        weapon=timelining.Weapon("AWP", "Rifle", 4, 30),
+        hp_damage=448,
+        hp_damage_taken=100,
+        armor_damage=100,
+        armor_damage_taken=50,
+        hit_group="Head",
+        is_friendly_fire=False,
+        distance=1000.0,
+        zoom_level=1,
+    )
+    cli.write_timeline_csvs(timelining.Timeline(events=[damage]), str(tmp_path), verbose=False)
+
+    with open(tmp_path / "event_descriptions.csv", newline="") as file:
+        rows: list[list[str]] = list(csv.reader(file))
+    assert rows[0] == ["tick", "name", "description"]
+    assert rows[1][:2] == ["100", "DamageEvent"]
+    assert "for 100HP and 50Armor (448/100 raw)" in rows[1][2]
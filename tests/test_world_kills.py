@@ -0,0 +1,47 @@
+import parallelizing
+import timeline_files
+import timelining
+
+def create_world_kill() -> timelining.KillEvent:
+    # awpy leaves every attacker field None when the world kills a player (i.e. the bomb or fall damage)
+    world: timelining.PositionedPlayerWithView = timelining.PositionedPlayerWithView(
+        None, None, None, None, timelining.Position(None, None, None), timelining.View(None, None)
+    )
+    victim: timelining.PositionedPlayerWithView = timelining.PositionedPlayerWithView(
+        2, "Team T", timelining.Side.T, "player 2", timelining.Position(1.0, 2.0, 3.0), timelining.View(90.0, 0.0)
+    )
+    return timelining.KillEvent(
+        tick=100,
+        seconds=1.0,
+        clock_time="01:54",
+        attacker=world,
+        victim=victim,
+        assister=None,
+        is_suicide=False,
+        is_teamkill=False,
+        is_wallbang=False,
+        penetrated_objects=0,
+        is_first_kill=True,
+        is_headshot=False,
+        is_victim_blinded=False,
+        is_attacker_blinded=None,
+        flash_thrower=None,
+        is_no_scope=False,
+        is_through_smoke=False,
+        distance=0.0,
+        player_traded=None,
+        weapon=timelining.Weapon("world", "World", None, None),
+    )
+
+def test_world_kills_are_sent_between_processes() -> None:
+    kill: timelining.KillEvent = create_world_kill()
+    decoded: list[timelining.Event] = parallelizing.decode_events(parallelizing.encode_events([kill]))
+    assert decoded == [kill]
+    assert type(decoded[0].attacker) is timelining.PositionedPlayerWithView
+    assert type(decoded[0].attacker.position) is timelining.Position
+
+def test_world_kills_are_read_back_from_timeline_files(tmp_path) -> None:
+    kill: timelining.KillEvent = create_world_kill()
+    file_path: str = str(tmp_path / ("match" + timeline_files.TIMELINE_FILE_EXTENSION))
+    timeline_files.write_timeline_file([kill], file_path)
+    assert timeline_files.load_timeline_file(file_path).events == [kill]
@@ -0,0 +1,290 @@
+import importlib
+import json
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+import numpy as np
+import parallelizing
+import timelining
+
+# A binary file of a timeline's events, so a timeline can be loaded back without parsing the demo or creating the events again.
+# The events are written in chunks (i.e. one per round) as they are created, and every chunk is an EventBatch (see parallelizing.encode_events):
+# one msgpack encoded list of events per event class plus the class of every event in order.
+# The index of every chunk is written at the end of the file, so a reader can load just the event classes it asks for
+# (i.e. only the kills of a whole season of demos) without reading or decoding any of the other events.
+#
+# Layout: MAGIC, the chunks' data, the index as JSON, the length of the index (8 bytes, little endian), MAGIC
+
+MAGIC: bytes = b"CSGOTL\x00\x01"
+FORMAT_VERSION: int = 1
+TIMELINE_FILE_EXTENSION: str = ".timeline"
+INDEX_LENGTH_FORMAT: str = "<Q"
+# How many events the writer holds on to before writing them as a chunk
+DEFAULT_CHUNK_EVENT_COUNT: int = 50000
+
+def get_class_name(event_class: type) -> str:
+    """
+    The name an event class is saved as ("module.ClassName"), so classes from outside of timelining (i.e. a custom detector's) can be found again
+    """
+    return f"{event_class.__module__}.{event_class.__qualname__}"
+
+def find_class(class_name: str) -> type:
+    """
+    The event class a get_class_name name is for
+    """
+    module_name, _, qualified_name = class_name.rpartition(".")
+    value = importlib.import_module(module_name)
+    for name in qualified_name.split("."):
+        value = getattr(value, name)
+    return value
+
+@dataclass
+class ChunkPartition:
+    """
+    Where one event class's encoded events of a chunk are in the file
+    """
+    class_index: int # Into the file's class names
+    offset: int
+    length: int
+    event_count: int
+
+@dataclass
+class Chunk:
+    """
+    One line of the index
+    """
+    event_count: int
+    first_tick: int # The smallest and largest tick of the chunk's events
+    last_tick: int
+    codes_offset: int # Where the chunk's class codes (one parallelizing.CLASS_CODE_DTYPE per event, indexes into partitions) are in the file
+    codes_length: int
+    partitions: list[ChunkPartition]
+
+    @classmethod
+    def from_dict(cls, chunk_dict: dict) -> "Chunk":
+        return cls(**{**chunk_dict, "partitions": [ChunkPartition(**partition) for partition in chunk_dict["partitions"]]})
+
+class TimelineFileWriter:
+    """
+    Writes events to a timeline file as they are created, so the whole timeline never has to be held in memory
+    The events have to be given in timeline order - they are read back in the order they were written
+
+    Usage:
+        with TimelineFileWriter("match.timeline", {"match_id": demo.match_id}) as writer:
+            writer.write_events(timelining.iter_timeline(demo))
+    """
+
+    def __init__(self, file_path: str, metadata: dict | None = None, chunk_event_count: int = DEFAULT_CHUNK_EVENT_COUNT) -> None:
+        """
+        metadata is anything (JSON serializable) that should be saved with the timeline, i.e. the demo's match id and map name
+        """
+        self.file_path: str = file_path
+        self.metadata: dict = {} if metadata is None else metadata
+        self.chunk_event_count: int = chunk_event_count
+        self.class_indexes: dict[str, int] = {}
+        self.chunks: list[Chunk] = []
+        self.pending_events: list[timelining.Event] = []
+        self.file = open(file_path, "wb")
+        self.file.write(MAGIC)
+
+    def _write_bytes(self, data: bytes) -> int:
+        """
+        Returns where the data was written
+        """
+        offset: int = self.file.tell()
+        self.file.write(data)
+        return offset
+
+    def write_chunk(self, events: list[timelining.Event]) -> None:
+        """
+        Writes the events as one chunk (the pending events are written first)
+        """
+        self.flush()
+        self._write_chunk(events)
+
+    def _write_chunk(self, events: list[timelining.Event]) -> None:
+        if len(events) == 0:
+            return
+        event_classes, codes, encoded_events = parallelizing.encode_events(events)
+        partitions: list[ChunkPartition] = []
+        class_counts: np.ndarray = np.bincount(np.frombuffer(codes, dtype=parallelizing.CLASS_CODE_DTYPE), minlength=len(event_classes))
+        for event_class, encoded, event_count in zip(event_classes, encoded_events, class_counts.tolist()):
+            class_index: int = self.class_indexes.setdefault(get_class_name(event_class), len(self.class_indexes))
+            partitions.append(ChunkPartition(class_index, self._write_bytes(encoded), len(encoded), event_count))
+        self.chunks.append(Chunk(
+            event_count=len(events),
+            first_tick=int(min(event.tick for event in events)),
+            last_tick=int(max(event.tick for event in events)),
+            codes_offset=self._write_bytes(codes),
+            codes_length=len(codes),
+            partitions=partitions,
+        ))
+
+    def write_events(self, events: Iterable[timelining.Event]) -> None:
+        """
+        Adds the events to the pending events, writing them in chunks of chunk_event_count events
+        """
+        for event in events:
+            self.pending_events.append(event)
+            if len(self.pending_events) >= self.chunk_event_count:
+                self.flush()
+
+    def flush(self) -> None:
+        self._write_chunk(self.pending_events)
+        self.pending_events = []
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
+        index: bytes = json.dumps({
+            "version": FORMAT_VERSION,
+            "metadata": self.metadata,
+            "class_names": list(self.class_indexes.keys()),
+            "chunks": [asdict(chunk) for chunk in self.chunks],
+        }).encode("utf-8")
+        self.file.write(index)
+        self.file.write(struct.pack(INDEX_LENGTH_FORMAT, len(index)))
+        self.file.write(MAGIC)
+        self.file.close()
+
+    def __enter__(self) -> "TimelineFileWriter":
+        return self
+
+    def __exit__(self, exception_type: type | None, *exception_info) -> None:
+        if exception_type is not None:
+            # Left without an index, so a timeline that was cut short can't be mistaken for a whole one
+            self.file.close()
+            return
+        self.close()
+
+def write_timeline_file(events: Iterable[timelining.Event], file_path: str, metadata: dict | None = None) -> None:
+    """
+    Saves the events (i.e. a Timeline's events or timelining.iter_timeline(demo)) to a timeline file
+    """
+    with TimelineFileWriter(file_path, metadata) as writer:
+        writer.write_events(events)
+
+class TimelineFile:
+    """
+    A timeline file that has been opened for reading
+    Only the index is read up front - events are read (and decoded) when they are asked for, and only the event classes that are asked for
+
+    Usage:
+        timeline_file = TimelineFile("match.timeline")
+        kills = timeline_file.get_events(timelining.KillEvent)
+        timeline = timeline_file.load_timeline()
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path: str = file_path
+        trailer_length: int = struct.calcsize(INDEX_LENGTH_FORMAT) + len(MAGIC)
+        with open(file_path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{file_path} isn't a timeline file")
+            if os.path.getsize(file_path) < len(MAGIC) + trailer_length:
+                raise ValueError(f"{file_path} is missing its index (it may not have been closed after it was written)")
+            file.seek(-trailer_length, os.SEEK_END)
+            trailer: bytes = file.read(trailer_length)
+            if trailer[-len(MAGIC):] != MAGIC:
+                raise ValueError(f"{file_path} is missing its index (it may not have been closed after it was written)")
+            index_length: int = struct.unpack(INDEX_LENGTH_FORMAT, trailer[:-len(MAGIC)])[0]
+            file.seek(-trailer_length - index_length, os.SEEK_END)
+            index: dict = json.loads(file.read(index_length))
+        if index["version"] != FORMAT_VERSION:
+            raise ValueError(f"{file_path} is a version {index['version']} timeline file, only version {FORMAT_VERSION} can be read")
+        self.metadata: dict = index["metadata"]
+        self.class_names: list[str] = index["class_names"]
+        self.chunks: list[Chunk] = [Chunk.from_dict(chunk) for chunk in index["chunks"]]
+        self.event_classes: dict[int, type] = {}
+
+    def get_event_class(self, class_index: int) -> type:
+        if class_index not in self.event_classes:
+            self.event_classes[class_index] = find_class(self.class_names[class_index])
+        return self.event_classes[class_index]
+
+    def get_event_counts(self) -> dict[str, int]:
+        """
+        How many events of each class (by get_class_name name) the file holds, without reading any of them
+        """
+        event_counts: dict[str, int] = {class_name: 0 for class_name in self.class_names}
+        for chunk in self.chunks:
+            for partition in chunk.partitions:
+                event_counts[self.class_names[partition.class_index]] += partition.event_count
+        return event_counts
+
+    def _get_class_indexes(self, event_classes: Iterable[type | str] | None) -> set[int]:
+        if event_classes is None:
+            return set(range(len(self.class_names)))
+        class_names: set[str] = {event_class if isinstance(event_class, str) else get_class_name(event_class) for event_class in event_classes}
+        return {class_index for class_index, class_name in enumerate(self.class_names) if class_name in class_names}
+
+    def iter_events(self, event_classes: Iterable[type | str] | None = None, start_tick: int | None = None, end_tick: int | None = None) -> Iterator[timelining.Event]:
+        """
+        Yields the events of the given classes (classes or get_class_name names, all of them by default) in timeline order, one chunk at a time
+        Chunks that are entirely before start_tick or after end_tick are skipped without being read (the bounds are inclusive)
+        """
+        class_indexes: set[int] = self._get_class_indexes(event_classes)
+        with open(self.file_path, "rb") as file:
+            def read(offset: int, length: int) -> bytes:
+                file.seek(offset)
+                return file.read(length)
+
+            for chunk in self.chunks:
+                if start_tick is not None and chunk.last_tick < start_tick:
+                    continue
+                if end_tick is not None and chunk.first_tick > end_tick:
+                    continue
+                wanted: list[bool] = [partition.class_index in class_indexes for partition in chunk.partitions]
+                if any(wanted) is False:
+                    continue
+                class_events: list[Iterator[timelining.Event] | None] = [
+                    iter(parallelizing.decode_class_events(self.get_event_class(partition.class_index), read(partition.offset, partition.length)))
+                    if is_wanted else None
+                    for partition, is_wanted in zip(chunk.partitions, wanted)
+                ]
+                if all(wanted):
+                    codes: list[int] = np.frombuffer(read(chunk.codes_offset, chunk.codes_length), dtype=parallelizing.CLASS_CODE_DTYPE).tolist()
+                    events: Iterator[timelining.Event] = (next(class_events[code]) for code in codes)
+                elif wanted.count(True) == 1:
+                    # Events of one class are already in order
+                    events = class_events[wanted.index(True)]
+                else:
+                    codes = np.frombuffer(read(chunk.codes_offset, chunk.codes_length), dtype=parallelizing.CLASS_CODE_DTYPE).tolist()
+                    events = (next(class_events[code]) for code in codes if wanted[code])
+                for event in events:
+                    if (start_tick is None or event.tick >= start_tick) and (end_tick is None or event.tick <= end_tick):
+                        yield event
+
+    def get_events(self, event_class: type | str) -> list[timelining.Event]:
+        """
+        Every event of one class, in timeline order
+        """
+        return list(self.iter_events([event_class]))
+
+    def load_timeline(self, event_classes: Iterable[type | str] | None = None) -> timelining.Timeline:
+        """
+        The timeline that was written (or just the events of the given classes)
+        """
+        return timelining.Timeline(events=list(self.iter_events(event_classes)))
+
+    def __len__(self) -> int:
+        return sum(chunk.event_count for chunk in self.chunks)
+
+    def __repr__(self) -> str:
+        return f"TimelineFile({self.file_path!r}, {len(self)} events, {len(self.chunks)} chunks)"
+
+def load_timeline_file(file_path: str, event_classes: Iterable[type | str] | None = None) -> timelining.Timeline:
+    return TimelineFile(file_path).load_timeline(event_classes)
+
+def iter_timeline_files_events(file_paths: Iterable[str], event_classes: Iterable[type | str] | None = None) -> Iterator[tuple[TimelineFile, timelining.Event]]:
+    """
+    Yields (the file, the event) for the events of the given classes of many timeline files (i.e. every kill of a season of demos), one file after another
+    Only the index of each file and the chunks holding events of the given classes are read
+    """
+    event_classes = None if event_classes is None else list(event_classes)
+    for file_path in file_paths:
+        timeline_file: TimelineFile = TimelineFile(file_path)
+        for event in timeline_file.iter_events(event_classes):
+            yield timeline_file, event
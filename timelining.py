@@ -1,5 +1,15 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
 from enum import Enum
+from functools import cached_property
+from collections.abc import Iterator
+import copy
+import gc
+import heapq
+import operator
+import time
+import typing
+import columnar
+import inventories
 import models
 import numpy as np
 
@@ -39,14 +49,14 @@ class Side(Enum):
         """
         Returns a Side value for the acronym provided
         """
-        if string is None:
-            return None
-        if string.upper() not in ["CT", "T"]:
+        # Called for every player of every event, so this is a dict lookup (the awpy output is already upper case)
+        side: Side | None = SIDE_ACRONYMS.get(string, None)
+        if side is not None or string is None:
+            return side
+        side = SIDE_ACRONYMS.get(string.upper(), None)
+        if side is None:
             raise ValueError(f"The provided side string {string.upper()} is not one of the two options (CT or T)")
-        if string.upper() == "CT":
-            return Side.CT
-        elif string.upper() == "T":
-            return Side.T
+        return side
     
     @staticmethod
     def invert(side: "Side") -> "Side":
@@ -72,6 +82,11 @@ class Side(Enum):
     def __str__(self) -> str:
         return self.name
 
+SIDE_ACRONYMS: dict[str, Side] = {
+    "CT": Side.CT,
+    "T": Side.T,
+}
+
 @dataclass
 class Player:
     steam_id: int
@@ -82,6 +97,14 @@ class Player:
     def __str__(self) -> str:
         return f"{self.team} {self.side} {self.name}"
 
+    def with_position(self, position: "Position", view: "View | None" = None) -> "PositionedPlayer":
+        """
+        This player at a position (and looking somewhere if view is given), sharing this player's steam id, team, side and name
+        """
+        if view is None:
+            return PositionedPlayer(self.steam_id, self.team, self.side, self.name, position)
+        return PositionedPlayerWithView(self.steam_id, self.team, self.side, self.name, position, view)
+
 @dataclass
 class PositionedPlayer(Player):
     """
@@ -102,6 +125,33 @@ class PositionedPlayerWithView(PositionedPlayer):
     def __str__(self) -> str:
         return f"{self.team} {self.side} {self.name} at {self.position} looking at {self.view}"
 
+class PlayerRegistry:
+    """
+    The players of a demo, so that every event about the same player refers to one shared Player
+    (and one copy of their team and name) instead of each event building its own from the parser's output
+    Events with a position and view get their own PositionedPlayer(WithView) made from the shared Player (see Player.with_position)
+    A player is looked up by everything a Player holds, so a player who changes team, side or name gets another Player
+    The Players are shared between events, so they shouldn't be changed
+    """
+
+    def __init__(self) -> None:
+        # (steam id, team, side acronym, name) -> Player
+        self.players: dict[tuple, Player] = {}
+
+    def get_player(self, steam_id: int, team: str, side_acronym: str, name: str) -> Player:
+        key: tuple = (steam_id, team, side_acronym, name)
+        player: Player | None = self.players.get(key, None)
+        if player is None:
+            player = Player(steam_id=steam_id, team=team, side=Side.from_acronym(side_acronym), name=name)
+            self.players[key] = player
+        return player
+
+    def get_frame_player(self, player_frame: models.PlayerFrameState) -> Player:
+        return self.get_player(player_frame.steam_id, player_frame.team, player_frame.side, player_frame.name)
+
+    def __len__(self) -> int:
+        return len(self.players)
+
 @dataclass
 class Event:
     tick: int
@@ -218,11 +268,7 @@ class DamageEvent(Event):
     def __str__(self) -> str:
         attacker_string: str = f"{self.attacker}"
         attacker_string += " (STRAFING)" * self.is_attacker_strafe
-        # TODO Remove these exceptions if it turns out that the values can actually be different
-        if self.hp_damage != self.hp_damage_taken:
-            raise Exception("hp_damage and hp_damage_taken are not the same")
-        if self.armor_damage != self.armor_damage_taken:
-            raise Exception("armor_damage and armor_damage_taken are not the same")
+        # hp_damage and armor_damage are the raw damage of the hit, which is more than what was taken when it was more than the victim had left
         string = f"{attacker_string} damaged {self.victim} for {self.hp_damage_taken}HP and {self.armor_damage_taken}Armor ({self.hp_damage}/{self.armor_damage} raw)"
         string += f" in the {self.hit_group} at a distance of {self.distance} at zoom level {self.zoom_level}"
         string += " (FRIENDLY FIRE)" * self.is_friendly_fire
@@ -582,844 +628,1221 @@ class Game:
     players: list[Player]
     timeline: Timeline
 
-def create_timeline(demo: models.Demo) -> Timeline:
+def get_event_classes() -> list[type]:
     """
-    Go through the demo file and create appropriate event objects and add them to a Timeline
+    Returns every event class in this module (every dataclass with a tick), in the order they are defined
     """
-    timeline: Timeline = Timeline(events=[])
+    return [
+        value for value in globals().values()
+        if isinstance(value, type) and is_dataclass(value) and "tick" in [f.name for f in fields(value)]
+    ]
 
-    connection_events: list[PlayerConnectionEvent] = []
-    for connection in demo.player_connections:
-        connection_events.append(PlayerConnectionEvent(
-            tick=connection.tick,
-            steam_id=connection.steam_id,
-            action=connection.action,
-        ))
-    timeline.events.extend(connection_events)
+def get_event_field_names() -> list[str]:
+    """
+    Returns the union of the field names of every event class, in the order they are defined
+    """
+    all_fields: list[str] = []
+    for event_class in get_event_classes():
+        all_fields.extend([f.name for f in fields(event_class)])
+    return list(dict.fromkeys(all_fields))
 
-    for round in demo.game_rounds:
+# Default thresholds of the changed_direction and slowed_speed detectors (see get_default_detectors)
+SIGNIFICANT_DEGREE_CHANGE: float = 15.0 # Degrees between a player's velocity in consecutive frames
+SIGNIFICANT_SPEED_CUT: float = 0.7 # Fraction of the previous frame's speed
+# The checks are done on whole rounds of floats at once, which can round differently to doing them one player at a time.
+# Any result this close to a threshold is redone one player at a time (the way the checks have always been done), so the events never change.
+THRESHOLD_TOLERANCE: float = 1e-9
+
+def _get_velocity(player_frame: models.PlayerFrameState) -> tuple[float, float, float]:
+    return (player_frame.velocity_x, player_frame.velocity_y, player_frame.velocity_z)
+
+def _get_degrees_apart(v1: tuple[float, float, float], v2: tuple[float, float, float]) -> float:
+    """
+    The angle between two velocities, calculated the way the direction change check always has (nan if either is zero)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 180*np.arccos(np.dot(v1,v2)/(np.linalg.norm(v1)*np.linalg.norm(v2)))/np.pi
+
+def _is_inventory_different(previous_player_frame: models.PlayerFrameState, player_frame: models.PlayerFrameState) -> bool:
+    """
+    The inventory change check as it was written before the count vectors (some weapon is in one inventory but not the other)
+    """
+    return set(previous_player_frame.inventory or []) != set(player_frame.inventory or [])
+
+# The fields of PlayerFrameState that the frame diff checks look at (the only columns of the frame arrays RoundFrameDiff builds)
+PLAYER_FRAME_FLAGS: list[str] = ["is_reloading", "is_scoped", "is_alive", "has_bomb"]
+FRAME_DIFF_COLUMNS: list[str] = ["velocity_x", "velocity_y", "velocity_z", *PLAYER_FRAME_FLAGS]
+VELOCITY_GETTER: typing.Callable = operator.attrgetter("velocity_x", "velocity_y", "velocity_z")
+# The fields of PlayerFrameState that the frame diff events are made from
+PLAYER_KEY_GETTER: typing.Callable = operator.attrgetter("steam_id", "team", "side", "name") # (see PlayerRegistry.get_player)
+POSITION_GETTER: typing.Callable = operator.attrgetter("x", "y", "z")
+VIEW_GETTER: typing.Callable = operator.attrgetter("view_x", "view_y")
+INVENTORY_GETTER: typing.Callable = operator.attrgetter("inventory")
+
+class RoundFrameDiff:
+    """
+    The frame diff checks, done for every player in every frame of a round at once on the round's frame arrays (see columnar.py)
+    Each player is compared to themselves (the same slot) in the previous frame, and is_paired says where a player is in both frames
+    Every "previous"/"current" array and every mask the checks return is indexed by [frame index - 1, slot], comparing frame i - 1 to frame i
+    Anything the frame arrays don't hold (i.e. inventories) is only built the first time a check needs it
+    """
+
+    def __init__(self, round: models.Round) -> None:
+        self.frames: list[models.Frame] = round.frames
+        self.arrays: columnar.RoundFrameArrays = columnar.build_round_frame_arrays(round, columns=FRAME_DIFF_COLUMNS)
+        self.is_paired: np.ndarray = self.arrays.is_present[:-1] & self.arrays.is_present[1:]
+        # Each frame's players, in the order that the arrays' frame_positions count them in
+        self.frame_players: list[list[models.PlayerFrameState]] = [frame.ct.players + frame.t.players for frame in self.frames]
+        self.position_count: int = max(map(len, self.frame_players), default=0)
+
+    @cached_property
+    def velocities(self) -> np.ndarray:
+        """
+        [frame index, slot, axis]
+        """
+        return np.stack([self.arrays.floats[name] for name in ("velocity_x", "velocity_y", "velocity_z")], axis=-1)
+
+    @property
+    def previous_velocities(self) -> np.ndarray:
+        return self.velocities[:-1]
+
+    @property
+    def current_velocities(self) -> np.ndarray:
+        return self.velocities[1:]
+
+    def get_flags(self, name: str, value: bool = True) -> np.ndarray:
+        """
+        Where flag == value, like the checks have always compared flags
+        (awpy leaves some flags as None, which is neither True nor False, so a flag going from None to True doesn't count as turning on)
+        """
+        if value:
+            return self.arrays.get_column(name)
+        return self.arrays.is_present & ~self.arrays.get_column(name) & ~self.arrays.is_none(name)
+
+    @cached_property
+    def present_player_frames(self) -> list[models.PlayerFrameState]:
+        return [player_frame for frame_players in self.frame_players for player_frame in frame_players]
+
+    @cached_property
+    def rows(self) -> np.ndarray:
+        """
+        [frame index, slot] index of each player frame in present_player_frames (-1 where the player isn't in the frame)
         """
-        Objects:
-            dict_keys(['round_number', 'is_warmup', 'start_tick', 'freeze_time_end_tick', 'end_tick', 'end_official_tick', 'bomb_plant_tick', 
-            't_score', 'ct_score', 'end_t_score', 'end_ct_score', 'ct_team', 't_team', 'winning_side', 'winning_team', 'losing_team', 
-            'round_end_reason', 'ct_freeze_time_end_eq_val', 'ct_round_start_eq_val', 'ct_round_spend_money', 'ct_buy_type', 
-            't_freeze_time_end_eq_val', 't_round_start_eq_val', 't_round_spend_money', 't_buy_type', 'ct_side', 't_side', 'kills', 'damages', 
-            'grenades', 'bomb_events', 'weapon_fires', 'flashes', 'frames'])
-
-        Objects of note:
-            round start event
-            freeze time end event
-            round end event
-            1 event per:
-                kills
-                damages
-                grenades
-                bomb_events
-                weapon_fires
-                flashes
-            1 event per frame in frames
-            1 event (place at start of round) for what each team bought
+        lengths: np.ndarray = np.array(list(map(len, self.frame_players)), dtype=np.int64)
+        return np.where(self.arrays.is_present, (np.cumsum(lengths) - lengths)[:, None] + self.arrays.frame_positions, -1)
+
+    @cached_property
+    def paired_rows(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The (previous, current) present_player_frames rows of every pair, in the order of self.is_paired's True cells
+        """
+        return (self.rows[:-1][self.is_paired], self.rows[1:][self.is_paired])
+
+    @cached_property
+    def inventory_arrays(self) -> inventories.InventoryArrays:
+        """
+        Every present player frame's inventory as a row of count vectors (see inventories.py)
         """
+        return inventories.InventoryArrays.from_player_frames(self.present_player_frames)
 
-        round_start_event = RoundStartEvent(
-            tick=round.start_tick,
-            ct_score=round.ct_score,
-            t_score=round.t_score,
-            ct_equipment_value=round.ct_round_start_eq_val,
-            t_equipment_value=round.t_round_start_eq_val,
+    @cached_property
+    def active_weapon_arrays(self) -> inventories.InventoryArrays:
+        """
+        Just the active weapon (the first weapon) of every present player frame's inventory, which is all the weapon checks compare
+        """
+        if "inventory_arrays" in self.__dict__:
+            return self.inventory_arrays
+        return inventories.InventoryArrays.from_weapons(
+            [(inventory or [])[:1] for inventory in map(INVENTORY_GETTER, self.present_player_frames)], inventories.MODELS_WEAPON_GETTERS
         )
-        timeline.events.append(round_start_event)
-
-        freeze_time_end_event = FreezeTimeEndEvent(
-            tick=round.freeze_time_end_tick,
-            ct_equipment_value=round.ct_freeze_time_end_eq_val,
-            t_equipment_value=round.t_freeze_time_end_eq_val,
-            ct_money_spent=round.ct_round_spend_money,
-            t_money_spent=round.t_round_spend_money,
-            ct_buy_type=round.ct_buy_type,
-            t_buy_type=round.t_buy_type
+
+    def from_rows(self, values: np.ndarray, missing_value: typing.Any) -> np.ndarray:
+        """
+        Turns one value per present player frame into a [frame index, slot] array
+        """
+        return np.where(self.arrays.is_present, values[self.rows], missing_value)
+
+    def from_paired_values(self, values: np.ndarray) -> np.ndarray:
+        """
+        Turns one value per pair (in the order of paired_rows) into a [frame index - 1, slot] mask
+        """
+        mask: np.ndarray = np.zeros(self.is_paired.shape, dtype=bool)
+        mask[self.is_paired] = values
+        return mask
+
+    @cached_property
+    def active_weapons(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (whether both players of a pair have a weapon, whether it is the same weapon with the same ammo, ammo in magazine of the active weapon)
+        """
+        arrays: inventories.InventoryArrays = self.active_weapon_arrays
+        has_weapon_array: np.ndarray = self.from_rows(arrays.has_weapon, False)
+        ammo_array: np.ndarray = self.from_rows(arrays.active_ammo_in_magazine, np.nan)
+        both_have_weapon: np.ndarray = self.is_paired & has_weapon_array[:-1] & has_weapon_array[1:]
+        # (Pairs where either inventory is empty never use this)
+        is_same_active_weapon: np.ndarray = self.from_paired_values(arrays.is_same_active_weapon(*self.paired_rows))
+        return (both_have_weapon, is_same_active_weapon, ammo_array)
+
+    @cached_property
+    def is_inventory_changed(self) -> np.ndarray:
+        """
+        Whether a pair's inventories hold different weapons (in any order)
+        An inventory holding the same weapon twice is the same as holding it once, so the pairs the count vectors can't answer for
+        are compared as sets of weapons
+        """
+        arrays: inventories.InventoryArrays = self.inventory_arrays
+        mask: np.ndarray = self.from_paired_values(arrays.is_changed(*self.paired_rows))
+        is_close: np.ndarray = self.from_paired_values(~arrays.is_exact(*self.paired_rows))
+        return self.redo_close_calls(mask, is_close, _is_inventory_different)
+
+    def get_player_frames(self, pair_index: int, slot: int) -> tuple[models.PlayerFrameState, models.PlayerFrameState]:
+        """
+        Returns the (previous, current) player frames of a pair
+        """
+        positions: np.ndarray = self.arrays.frame_positions
+        return (self.frame_players[pair_index][positions[pair_index, slot]], self.frame_players[pair_index + 1][positions[pair_index + 1, slot]])
+
+    def get_hits(self, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the pair index and slot of every True cell of a [frame index - 1, slot] mask,
+        and the key the events are ordered by - the pair index, then the player's position in the later frame's
+        ct.players + t.players (so CT players come first, in the order the frame lists them)
+        """
+        pair_indices, slots = np.nonzero(mask)
+        return (pair_indices, slots, pair_indices * self.position_count + self.arrays.frame_positions[pair_indices + 1, slots])
+
+    def is_moving(self, velocities: np.ndarray) -> np.ndarray:
+        return np.any(velocities != 0, axis=-1)
+
+    def get_speeds(self, velocities: np.ndarray) -> np.ndarray:
+        return np.sqrt(np.sum(velocities * velocities, axis=-1))
+
+    def redo_close_calls(self, mask: np.ndarray, is_close: np.ndarray, check) -> np.ndarray:
+        """
+        Replaces the results in mask where is_close is True with check(previous player frame, current player frame)
+        """
+        for pair_index, slot in zip(*np.nonzero(is_close & self.is_paired)):
+            mask[pair_index, slot] = check(*self.get_player_frames(pair_index, slot))
+        return mask
+
+    def get_stopped_moving(self) -> np.ndarray:
+        return self.is_paired & self.is_moving(self.previous_velocities) & ~self.is_moving(self.current_velocities)
+
+    def get_started_moving(self) -> np.ndarray:
+        return self.is_paired & ~self.is_moving(self.previous_velocities) & self.is_moving(self.current_velocities)
+
+    def get_changed_direction(self, significant_degree_change: float = SIGNIFICANT_DEGREE_CHANGE) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cosines: np.ndarray = np.sum(self.current_velocities * self.previous_velocities, axis=-1) / (self.get_speeds(self.current_velocities) * self.get_speeds(self.previous_velocities))
+            degrees_apart: np.ndarray = 180*np.arccos(cosines)/np.pi
+        mask: np.ndarray = self.is_paired & (degrees_apart > significant_degree_change)
+        # Near (anti)parallel velocities can round to just outside of [-1, 1], which arccos turns into nan
+        # (near parallel ones are a tiny fraction of a degree apart either way, so they only need redoing for thresholds under a degree -
+        # which keeps a player running in a straight line from being redone every frame)
+        is_close: np.ndarray = (np.abs(degrees_apart - significant_degree_change) < THRESHOLD_TOLERANCE * 180) | (np.abs(cosines + 1) < THRESHOLD_TOLERANCE)
+        if significant_degree_change < 1:
+            is_close |= np.abs(cosines - 1) < THRESHOLD_TOLERANCE
+        return self.redo_close_calls(mask, is_close, lambda previous, current: _get_degrees_apart(_get_velocity(current), _get_velocity(previous)) > significant_degree_change)
+
+    def get_slowed_speed(self, significant_speed_cut: float = SIGNIFICANT_SPEED_CUT) -> np.ndarray:
+        previous_speeds: np.ndarray = self.get_speeds(self.previous_velocities)
+        current_speeds: np.ndarray = self.get_speeds(self.current_velocities)
+        mask: np.ndarray = self.is_paired & (current_speeds < previous_speeds*significant_speed_cut)
+        # (A player standing still can't slow down however the speeds round, so they're never redone)
+        is_close: np.ndarray = (
+            (np.abs(current_speeds - previous_speeds*significant_speed_cut) <= THRESHOLD_TOLERANCE * np.maximum(previous_speeds, 1))
+            & self.is_moving(self.previous_velocities)
         )
-        timeline.events.append(freeze_time_end_event)
-
-        round_end_event = RoundEndEvent(
-            tick=round.end_tick,
-            official_tick=round.end_official_tick,
-            reason=round.round_end_reason,
-            winning_side=Side.from_acronym(round.winning_side),
-            winning_team=round.winning_team,
-            losing_team=round.losing_team,
-            end_ct_score=round.end_ct_score,
-            end_t_score=round.end_t_score
+        return self.redo_close_calls(mask, is_close, lambda previous, current: np.linalg.norm(_get_velocity(current)) < np.linalg.norm(_get_velocity(previous))*significant_speed_cut)
+
+    def get_flag_turned_on(self, name: str) -> np.ndarray:
+        return self.is_paired & self.get_flags(name, False)[:-1] & self.get_flags(name, True)[1:]
+
+    def get_flag_turned_off(self, name: str) -> np.ndarray:
+        return self.is_paired & self.get_flags(name, True)[:-1] & self.get_flags(name, False)[1:]
+
+    def get_finished_reload(self) -> np.ndarray:
+        mask: np.ndarray = self.get_flag_turned_off("is_reloading")
+        if not mask.any():
+            # (No weapons need to be looked at)
+            return mask
+        both_have_weapon, is_same_active_weapon, ammo = self.active_weapons
+        return mask & both_have_weapon & is_same_active_weapon & (ammo[1:] > ammo[:-1])
+
+    def get_cancelled_reload(self) -> np.ndarray:
+        mask: np.ndarray = self.get_flag_turned_off("is_reloading")
+        if not mask.any():
+            return mask
+        both_have_weapon, is_same_active_weapon, ammo = self.active_weapons
+        return mask & both_have_weapon & (~is_same_active_weapon | (ammo[1:] <= ammo[:-1]))
+
+    def get_switched_weapon(self) -> np.ndarray:
+        both_have_weapon, is_same_active_weapon, _ = self.active_weapons
+        return both_have_weapon & ~is_same_active_weapon
+
+    def get_changed_inventory(self) -> np.ndarray:
+        return self.is_inventory_changed
+
+def get_frame_event_player_class(event_class: type) -> type:
+    """
+    The class of the player of the events the frame diff checks find
+    (every one has the player's view except deaths and bomb pickups/drops, even where the event class only asks for a PositionedPlayer)
+    """
+    if event_class in (DeathEvent, BombPickupEvent, BombDropEvent):
+        return PositionedPlayer
+    return PositionedPlayerWithView
+
+def get_frame_event_fields(event_class: type, previous_player_frame: models.PlayerFrameState, player_frame: models.PlayerFrameState) -> dict:
+    """
+    The fields (other than tick, seconds, clock_time and player) of the event one of the frame diff checks found for one player
+    """
+    field_names: list[str] = [f.name for f in fields(event_class)][4:]
+    return {name: column[0] for name, column in zip(field_names, get_frame_event_columns(event_class, [previous_player_frame], [player_frame]))}
+
+def get_frame_event_columns(event_class: type, previous_player_frames: list[models.PlayerFrameState], player_frames: list[models.PlayerFrameState]) -> list[list]:
+    """
+    get_frame_event_fields for many pairs at once, as one list per field (in the order the event class declares them)
+    """
+    if event_class is DirectionChangeEvent:
+        return [list(map(VELOCITY_GETTER, previous_player_frames)), list(map(VELOCITY_GETTER, player_frames))]
+    elif event_class is SlowedSpeedEvent:
+        # Each speed is worked out alone (not as one array), so it rounds exactly the way it always has
+        return [
+            [float(np.linalg.norm(velocity)) for velocity in map(VELOCITY_GETTER, previous_player_frames)],
+            [float(np.linalg.norm(velocity)) for velocity in map(VELOCITY_GETTER, player_frames)],
+        ]
+    elif event_class in (ReloadStartEvent, ReloadFinishEvent, ScopeEvent):
+        return [[player_frame.inventory[0] for player_frame in player_frames]]
+    elif event_class is ReloadCancelEvent:
+        return [[player_frame.inventory[0] for player_frame in previous_player_frames]]
+    elif event_class is UnscopeEvent:
+        return [[player_frame.inventory[0] if len(player_frame.inventory) > 0 else None for player_frame in player_frames]]
+    elif event_class is WeaponSwitchEvent:
+        return [[player_frame.inventory[0] for player_frame in previous_player_frames], [player_frame.inventory[0] for player_frame in player_frames]]
+    elif event_class is InventoryChangeEvent:
+        return [list(map(INVENTORY_GETTER, previous_player_frames)), list(map(INVENTORY_GETTER, player_frames))]
+    return []
+
+def _create_frame_events_of_class(event_class: type, diff: RoundFrameDiff, pair_indices: np.ndarray, slots: np.ndarray, players: PlayerRegistry) -> list[Event]:
+    """
+    Creates the events for every pair that one of the frame diff checks found (see RoundFrameDiff.get_hits)
+    Everything is gathered a column at a time and the events are made with positional arguments,
+    since making the event objects is most of the work left once the checks are done on whole rounds
+    """
+    previous_positions: list[int] = diff.arrays.frame_positions[pair_indices, slots].tolist()
+    positions: list[int] = diff.arrays.frame_positions[pair_indices + 1, slots].tolist()
+    pair_index_list: list[int] = pair_indices.tolist()
+    player_frames: list[models.PlayerFrameState] = [diff.frame_players[pair_index + 1][position] for pair_index, position in zip(pair_index_list, positions)]
+    previous_player_frames: list[models.PlayerFrameState] = [
+        diff.frame_players[pair_index][position] for pair_index, position in zip(pair_index_list, previous_positions)
+    ]
+    frames: list[models.Frame] = [diff.frames[pair_index + 1] for pair_index in pair_index_list]
+    get_player: typing.Callable = players.get_player
+    shared_players: list[Player] = [get_player(*key) for key in map(PLAYER_KEY_GETTER, player_frames)]
+    player_positions: list[Position] = [Position(*position) for position in map(POSITION_GETTER, player_frames)]
+    positioned_players: list[PositionedPlayer]
+    if get_frame_event_player_class(event_class) is PositionedPlayer:
+        positioned_players = [
+            PositionedPlayer(player.steam_id, player.team, player.side, player.name, position)
+            for player, position in zip(shared_players, player_positions)
+        ]
+    else:
+        positioned_players = [
+            PositionedPlayerWithView(player.steam_id, player.team, player.side, player.name, position, View(*view))
+            for player, position, view in zip(shared_players, player_positions, map(VIEW_GETTER, player_frames))
+        ]
+    # Event fields come first (tick, seconds, clock_time), then the player, then the event class's own fields
+    return [
+        event_class(frame.tick, frame.seconds, frame.clock_time, player, *values)
+        for frame, player, *values in zip(frames, positioned_players, *get_frame_event_columns(event_class, previous_player_frames, player_frames))
+    ]
+
+# Smokes and fires are told apart by their ids (rather than comparing every field, which made a smoke that drifted count as a new one)
+SMOKE_ID_GETTER: typing.Callable = operator.attrgetter("grenade_entity_id")
+FIRE_ID_GETTER: typing.Callable = operator.attrgetter("unique_id")
+
+def _get_spawned(previous_objects: list, objects: list, get_id: typing.Callable) -> list:
+    """
+    The objects whose ids weren't in previous_objects
+    """
+    previous_ids: set[int] = set(map(get_id, previous_objects))
+    return [o for o in objects if get_id(o) not in previous_ids]
+
+def create_smoke_spawn_events(previous_frame: models.Frame, frame: models.Frame) -> list[SmokeSpawnEvent]:
+    return [
+        SmokeSpawnEvent(
+            tick=frame.tick,
+            seconds=frame.seconds,
+            clock_time=frame.clock_time,
+            grenade_entity_id=smoke.grenade_entity_id,
+            position=Position(
+                x=smoke.x,
+                y=smoke.y,
+                z=smoke.z,
+            )
         )
-        timeline.events.append(round_end_event)
-
-        kill_events: list[KillEvent] = []
-        for kill in round.kills:
-            attacker: PositionedPlayerWithView = PositionedPlayerWithView(
-                steam_id=kill.attacker_steam_id,
-                team=kill.attacker_team,
-                side=Side.from_acronym(kill.attacker_side),
-                name=kill.attacker_name,
-                position=Position(
-                    x=kill.attacker_x,
-                    y=kill.attacker_y,
-                    z=kill.attacker_z,
-                ),
-                view=View(
-                    x=kill.attacker_view_x,
-                    y=kill.attacker_view_y,
-                )
+        for smoke in _get_spawned(previous_frame.smokes, frame.smokes, SMOKE_ID_GETTER)
+    ]
+
+def create_smoke_despawn_events(previous_frame: models.Frame, frame: models.Frame) -> list[SmokeDespawnEvent]:
+    return [
+        SmokeDespawnEvent(
+            tick=frame.tick,
+            seconds=frame.seconds,
+            clock_time=frame.clock_time,
+            grenade_entity_id=smoke.grenade_entity_id,
+            position=Position(
+                x=smoke.x,
+                y=smoke.y,
+                z=smoke.z,
             )
-            victim: PositionedPlayerWithView = PositionedPlayerWithView(
-                steam_id=kill.victim_steam_id,
-                team=kill.victim_team,
-                side=Side.from_acronym(kill.victim_side),
-                name=kill.victim_name,
-                position=Position(
-                    x=kill.victim_x,
-                    y=kill.victim_y,
-                    z=kill.victim_z,
-                ),
-                view=View(
-                    x=kill.victim_view_x,
-                    y=kill.victim_view_y,
-                )
+        )
+        for smoke in _get_spawned(frame.smokes, previous_frame.smokes, SMOKE_ID_GETTER)
+    ]
+
+def create_fire_spawn_events(previous_frame: models.Frame, frame: models.Frame) -> list[FireSpawnEvent]:
+    return [
+        FireSpawnEvent(
+            tick=frame.tick,
+            seconds=frame.seconds,
+            clock_time=frame.clock_time,
+            unique_id=fire.unique_id,
+            position=Position(
+                x=fire.x,
+                y=fire.y,
+                z=fire.z,
             )
-            assister: Player | None = None
-            if kill.assister_steam_id is not None:
-                assister = Player(
-                    steam_id=kill.assister_steam_id,
-                    team=kill.assister_team,
-                    side=Side.from_acronym(kill.assister_side),
-                    name=kill.assister_name,
-                )
-            flash_thrower: Player | None = None
-            if kill.flash_thrower_steam_id is not None:
-                flash_thrower = Player(
-                    steam_id=kill.flash_thrower_steam_id,
-                    team=kill.flash_thrower_team,
-                    side=Side.from_acronym(kill.flash_thrower_side),
-                    name=kill.flash_thrower_name,
-                )
-            player_traded: Player | None = None
-            if kill.player_traded_steam_id is not None:
-                player_traded = Player(
-                    steam_id=kill.player_traded_steam_id,
-                    team=kill.player_traded_team,
-                    # This Side inference might not always be correct
-                    side=Side.invert(Side.from_acronym(kill.attacker_side)),
-                    name=kill.player_traded_name,
-                )
-            weapon: Weapon = Weapon(
-                name=kill.weapon,
-                weapon_class=kill.weapon_class,
-                ammo_in_magazine=None,  # This info is not available
-                ammo_in_reserve=None,   # This info is not available
+        )
+        for fire in _get_spawned(previous_frame.fires, frame.fires, FIRE_ID_GETTER)
+    ]
+
+def create_fire_despawn_events(previous_frame: models.Frame, frame: models.Frame) -> list[FireDespawnEvent]:
+    return [
+        FireDespawnEvent(
+            tick=frame.tick,
+            seconds=frame.seconds,
+            clock_time=frame.clock_time,
+            unique_id=fire.unique_id,
+            position=Position(
+                x=fire.x,
+                y=fire.y,
+                z=fire.z,
             )
+        )
+        for fire in _get_spawned(frame.fires, previous_frame.fires, FIRE_ID_GETTER)
+    ]
 
-            kill_events.append(KillEvent(
-                tick=kill.tick,
-                seconds=kill.seconds,
-                clock_time=kill.clock_time,
-                attacker=attacker,
-                victim=victim,
-                assister=assister,
-                is_suicide=kill.is_suicide,
-                is_teamkill=kill.is_teamkill,
-                is_wallbang=kill.is_wallbang,
-                penetrated_objects=kill.penetrated_objects,
-                is_first_kill=kill.is_first_kill,
-                is_headshot=kill.is_headshot,
-                is_victim_blinded=kill.is_victim_blinded,
-                is_attacker_blinded=kill.is_attacker_blinded,
-                flash_thrower=flash_thrower,
-                is_no_scope=kill.is_no_scope,
-                is_through_smoke=kill.is_through_smoke,
-                distance=kill.distance,
-                # is_trade: bool
-                player_traded=player_traded,
-                weapon=weapon,
-            ))
-        timeline.events.extend(kill_events)
-
-        damage_events: list[DamageEvent] = []
-        for damage in round.damages:
-            attacker = PositionedPlayerWithView(
-                steam_id=damage.attacker_steam_id,
-                team=damage.attacker_team,
-                side=Side.from_acronym(damage.attacker_side),
-                name=damage.attacker_name,
-                position=Position(
-                    x=damage.attacker_x,
-                    y=damage.attacker_y,
-                    z=damage.attacker_z,
-                ),
-                view=View(
-                    x=damage.attacker_view_x,
-                    y=damage.attacker_view_y,
-                )
+@dataclass
+class Detector:
+    """
+    One check that finds events, which a DetectorRegistry can turn on and off
+    kind says what detect is called with (and returns):
+        "round": detect(round) -> list of events, for events that come straight from one of the round's lists (i.e. kills)
+            (or detect(round, players) if takes_players is True, to share the registry's PlayerRegistry)
+        "player": detect(frame diff, **settings) -> [frame index - 1, slot] mask of where the event happens (see RoundFrameDiff)
+        "world": detect(previous frame, frame) -> list of events, for frame diff checks that aren't about a player (smokes and fires)
+        "demo": detect(demo) -> list of events, for events that aren't about a single round (player connections)
+    """
+    name: str
+    kind: str
+    event_classes: tuple[type, ...]
+    detect: typing.Callable
+    settings: dict[str, typing.Any] = field(default_factory=dict)
+    # For "round" and "demo" detectors that make one event per row of one of the round's (or demo's) lists, the name of that list
+    # (so TimelineBuilder only has to pass it the rows it hasn't seen yet)
+    source_field: str | None = None
+    # For "round" detectors, whether detect also takes the registry's PlayerRegistry
+    takes_players: bool = False
+    # The event classes it is enabled for (it runs if there are any)
+    enabled_event_classes: set[type] = field(init=False)
+    # Timing counters (see DetectorRegistry.get_timings)
+    call_count: int = 0
+    event_count: int = 0
+    seconds_taken: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.enabled_event_classes = set(self.event_classes)
+
+    @property
+    def is_enabled(self) -> bool:
+        return len(self.enabled_event_classes) > 0
+
+    def run(self, *arguments: typing.Any) -> typing.Any:
+        start_time: float = time.perf_counter()
+        result: typing.Any = self.detect(*arguments, **self.settings)
+        self.seconds_taken += time.perf_counter() - start_time
+        self.call_count += 1
+        self.event_count += int(np.count_nonzero(result)) if isinstance(result, np.ndarray) else len(result)
+        return result
+
+def get_default_detectors() -> list[Detector]:
+    """
+    Every check that create_timeline does, in the order their events come in when several have the same tick
+    ("player" detectors are also ordered this way for each player in a frame, followed by the "world" detectors)
+    """
+    return [
+        Detector("connections", "demo", (PlayerConnectionEvent,), create_connection_events, source_field="player_connections"),
+        Detector("round_state", "round", (RoundStartEvent, FreezeTimeEndEvent, RoundEndEvent), create_round_state_events),
+        Detector("kills", "round", (KillEvent,), create_kill_events, source_field="kills", takes_players=True),
+        Detector("damages", "round", (DamageEvent,), create_damage_events, source_field="damages", takes_players=True),
+        Detector("grenade_throws", "round", (GrenadeThrowEvent,), create_grenade_throw_events, source_field="grenades", takes_players=True),
+        Detector("grenade_triggers", "round", (GrenadeTriggerEvent,), create_grenade_trigger_events, source_field="grenades"),
+        Detector("bomb_events", "round", (BombEvent,), create_bomb_events, source_field="bomb_events", takes_players=True),
+        Detector("weapon_fires", "round", (WeaponFireEvent,), create_weapon_fire_events, source_field="weapon_fires", takes_players=True),
+        Detector("flashes", "round", (FlashEvent,), create_flash_events, source_field="flashes", takes_players=True),
+        Detector("stopped_moving", "player", (StoppingMovingEvent,), RoundFrameDiff.get_stopped_moving),
+        # TODO: This should probably be a StartingMovingEvent
+        Detector("started_moving", "player", (StoppingMovingEvent,), RoundFrameDiff.get_started_moving),
+        Detector("changed_direction", "player", (DirectionChangeEvent,), RoundFrameDiff.get_changed_direction, {"significant_degree_change": SIGNIFICANT_DEGREE_CHANGE}),
+        Detector("slowed_speed", "player", (SlowedSpeedEvent,), RoundFrameDiff.get_slowed_speed, {"significant_speed_cut": SIGNIFICANT_SPEED_CUT}),
+        Detector("reload_start", "player", (ReloadStartEvent,), RoundFrameDiff.get_flag_turned_on, {"name": "is_reloading"}),
+        Detector("reload_finish", "player", (ReloadFinishEvent,), RoundFrameDiff.get_finished_reload),
+        Detector("reload_cancel", "player", (ReloadCancelEvent,), RoundFrameDiff.get_cancelled_reload),
+        Detector("scope", "player", (ScopeEvent,), RoundFrameDiff.get_flag_turned_on, {"name": "is_scoped"}),
+        Detector("unscope", "player", (UnscopeEvent,), RoundFrameDiff.get_flag_turned_off, {"name": "is_scoped"}),
+        Detector("weapon_switch", "player", (WeaponSwitchEvent,), RoundFrameDiff.get_switched_weapon),
+        Detector("inventory_change", "player", (InventoryChangeEvent,), RoundFrameDiff.get_changed_inventory),
+        # TODO: Buy check, if we are implementing BuyCheckEvent(s)
+        Detector("death", "player", (DeathEvent,), RoundFrameDiff.get_flag_turned_off, {"name": "is_alive"}),
+        Detector("bomb_pickup", "player", (BombPickupEvent,), RoundFrameDiff.get_flag_turned_on, {"name": "has_bomb"}),
+        Detector("bomb_drop", "player", (BombDropEvent,), RoundFrameDiff.get_flag_turned_off, {"name": "has_bomb"}),
+        Detector("smoke_spawn", "world", (SmokeSpawnEvent,), create_smoke_spawn_events),
+        Detector("smoke_despawn", "world", (SmokeDespawnEvent,), create_smoke_despawn_events),
+        Detector("fire_spawn", "world", (FireSpawnEvent,), create_fire_spawn_events),
+        Detector("fire_despawn", "world", (FireDespawnEvent,), create_fire_despawn_events),
+    ]
+
+class DetectorRegistry:
+    """
+    The detectors that create_timeline (and the functions it uses) runs, which can be turned on and off by the event class they find
+    Only the enabled detectors run - if no "player" detector is enabled the frame diff arrays aren't even built,
+    and i.e. inventories are only compared when the inventory change detector is enabled
+
+    Usage:
+        registry = DetectorRegistry()
+        registry.enable_only(KillEvent, BombEvent)
+        timeline = create_timeline(demo, registry)
+        print(registry.get_timings())
+    It also holds the PlayerRegistry that the events it creates share their players from (so a registry is meant to be used for one demo)
+    """
+
+    def __init__(self, detectors: list[Detector] | None = None) -> None:
+        self.detectors: list[Detector] = get_default_detectors() if detectors is None else detectors
+        self.players: PlayerRegistry = PlayerRegistry()
+
+    def register(self, detector: Detector) -> None:
+        """
+        Adds a detector (after all of the existing ones of its kind)
+        """
+        if detector.name in [d.name for d in self.detectors]:
+            raise ValueError(f"There is already a detector called {detector.name}")
+        self.detectors.append(detector)
+
+    def get_detector(self, name: str) -> Detector:
+        for detector in self.detectors:
+            if detector.name == name:
+                return detector
+        raise KeyError(f"There is no detector called {name}, the options are {[d.name for d in self.detectors]}")
+
+    def get_detectors(self, kind: str | None = None, enabled_only: bool = True) -> list[Detector]:
+        return [
+            detector for detector in self.detectors
+            if (kind is None or detector.kind == kind) and (detector.is_enabled or enabled_only is False)
+        ]
+
+    def set_enabled(self, event_classes: typing.Iterable[type], is_enabled: bool) -> None:
+        """
+        Enables/disables every detector for the given event classes and their subclasses (i.e. set_enabled([Event], False) disables nearly everything)
+        """
+        event_classes = tuple(event_classes)
+        for detector in self.detectors:
+            for event_class in detector.event_classes:
+                if issubclass(event_class, event_classes) is False:
+                    continue
+                if is_enabled:
+                    detector.enabled_event_classes.add(event_class)
+                else:
+                    detector.enabled_event_classes.discard(event_class)
+
+    def enable(self, *event_classes: type) -> None:
+        self.set_enabled(event_classes, True)
+
+    def disable(self, *event_classes: type) -> None:
+        self.set_enabled(event_classes, False)
+
+    def enable_only(self, *event_classes: type) -> None:
+        """
+        Disables every detector that doesn't find any of the given event classes
+        """
+        for detector in self.detectors:
+            detector.enabled_event_classes.clear()
+        self.set_enabled(event_classes, True)
+
+    def run_round_detector(self, detector: Detector, round: models.Round) -> list:
+        """
+        A detector that finds several classes (i.e. round_state) runs if any of them is enabled, and this filters out the rest
+        """
+        events: list = detector.run(round, self.players) if detector.takes_players else detector.run(round)
+        if len(detector.enabled_event_classes) < len(detector.event_classes):
+            events = [event for event in events if type(event) in detector.enabled_event_classes]
+        return events
+
+    def set_setting(self, name: str, setting_name: str, value: typing.Any) -> None:
+        """
+        i.e. set_setting("changed_direction", "significant_degree_change", 30.0)
+        """
+        detector: Detector = self.get_detector(name)
+        if setting_name not in detector.settings:
+            raise KeyError(f"The {name} detector has no {setting_name} setting, the options are {list(detector.settings.keys())}")
+        detector.settings[setting_name] = value
+
+    def reset_timings(self) -> None:
+        for detector in self.detectors:
+            detector.call_count = 0
+            detector.event_count = 0
+            detector.seconds_taken = 0.0
+
+    def get_timings(self) -> str:
+        """
+        A table of how many times each enabled detector ran, how many events it found and how long it took
+        ("player" detectors share the frame diff arrays, and each array is counted towards the first detector that needed it)
+        """
+        lines: list[str] = [f"{'detector':<20} {'calls':>8} {'events':>8} {'seconds':>10}"]
+        for detector in self.get_detectors():
+            lines.append(f"{detector.name:<20} {detector.call_count:>8} {detector.event_count:>8} {detector.seconds_taken:>10.4f}")
+        return "\n".join(lines)
+
+def create_frame_events(round: models.Round, registry: DetectorRegistry | None = None) -> list[Event]:
+    """
+    Compares every frame of the round to the frame before it and creates an event for each change
+    (a player stopping/starting moving, reloading, scoping, switching weapons, dying, picking up the bomb, a smoke or fire appearing, ...)
+    Each "player" check is done for every player in every frame of the round at once (see RoundFrameDiff) rather than one player at a time
+    Events are in frame order - within a frame they are ordered by team (CT first), then player, then detector,
+    followed by the "world" (smoke and fire) events
+    """
+    # Making tens of thousands of events (and the arrays of every player frame of the round) keeps setting off the garbage collector,
+    # which then goes over every object in memory each time (the whole demo) without finding anything, since events can't refer back to themselves
+    was_gc_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        return _create_frame_events(round, registry)
+    finally:
+        if was_gc_enabled:
+            gc.enable()
+
+def _create_frame_events(round: models.Round, registry: DetectorRegistry | None) -> list[Event]:
+    if registry is None:
+        registry = DetectorRegistry()
+    player_detectors: list[Detector] = registry.get_detectors("player")
+    world_detectors: list[Detector] = registry.get_detectors("world")
+    if len(round.frames) < 2 or len(player_detectors) + len(world_detectors) == 0:
+        # The demo was parsed without frames (see parsing.get_parser_options) or nothing needs them
+        return []
+
+    # Every player event found, sorted by (frame, position in the frame's ct.players + t.players, detector) using one combined integer key
+    player_events: list[Event] = []
+    pair_ends: list[int] = [0] * (len(round.frames) - 1) # Where each pair's player events end in player_events
+    check_count: int = len(player_detectors)
+    if check_count > 0:
+        diff: RoundFrameDiff = RoundFrameDiff(round)
+        keys: list[np.ndarray] = []
+        for check_index, detector in enumerate(player_detectors):
+            pair_indices, slots, order_keys = diff.get_hits(detector.run(diff))
+            keys.append(order_keys * check_count + check_index)
+            player_events.extend(_create_frame_events_of_class(detector.event_classes[0], diff, pair_indices, slots, registry.players))
+        all_keys: np.ndarray = np.concatenate(keys)
+        order: list[int] = np.argsort(all_keys, kind="stable").tolist()
+        player_events = [player_events[index] for index in order]
+        pair_ends = np.searchsorted(np.sort(all_keys) // (diff.position_count * check_count), np.arange(1, len(round.frames)), side="left").tolist()
+
+    events: list[Event] = []
+    pair_start: int = 0
+    for pair_index, pair_end in enumerate(pair_ends):
+        events.extend(player_events[pair_start:pair_end])
+        pair_start = pair_end
+        for detector in world_detectors:
+            events.extend(detector.run(round.frames[pair_index], round.frames[pair_index + 1]))
+    return events
+
+def create_round_state_events(round: models.Round) -> list[Event]:
+    """
+    Create the round start, freeze time end and round end events of a round
+    """
+    events: list[Event] = []
+
+    """
+    Objects:
+        dict_keys(['round_number', 'is_warmup', 'start_tick', 'freeze_time_end_tick', 'end_tick', 'end_official_tick', 'bomb_plant_tick', 
+        't_score', 'ct_score', 'end_t_score', 'end_ct_score', 'ct_team', 't_team', 'winning_side', 'winning_team', 'losing_team', 
+        'round_end_reason', 'ct_freeze_time_end_eq_val', 'ct_round_start_eq_val', 'ct_round_spend_money', 'ct_buy_type', 
+        't_freeze_time_end_eq_val', 't_round_start_eq_val', 't_round_spend_money', 't_buy_type', 'ct_side', 't_side', 'kills', 'damages', 
+        'grenades', 'bomb_events', 'weapon_fires', 'flashes', 'frames'])
+
+    Objects of note:
+        round start event
+        freeze time end event
+        round end event
+        1 event per:
+            kills
+            damages
+            grenades
+            bomb_events
+            weapon_fires
+            flashes
+        1 event per frame in frames
+        1 event (place at start of round) for what each team bought
+    """
+
+    round_start_event = RoundStartEvent(
+        tick=round.start_tick,
+        ct_score=round.ct_score,
+        t_score=round.t_score,
+        ct_equipment_value=round.ct_round_start_eq_val,
+        t_equipment_value=round.t_round_start_eq_val,
+    )
+    events.append(round_start_event)
+
+    freeze_time_end_event = FreezeTimeEndEvent(
+        tick=round.freeze_time_end_tick,
+        ct_equipment_value=round.ct_freeze_time_end_eq_val,
+        t_equipment_value=round.t_freeze_time_end_eq_val,
+        ct_money_spent=round.ct_round_spend_money,
+        t_money_spent=round.t_round_spend_money,
+        ct_buy_type=round.ct_buy_type,
+        t_buy_type=round.t_buy_type
+    )
+    events.append(freeze_time_end_event)
+
+    round_end_event = RoundEndEvent(
+        tick=round.end_tick,
+        official_tick=round.end_official_tick,
+        reason=round.round_end_reason,
+        winning_side=Side.from_acronym(round.winning_side),
+        winning_team=round.winning_team,
+        losing_team=round.losing_team,
+        end_ct_score=round.end_ct_score,
+        end_t_score=round.end_t_score
+    )
+    events.append(round_end_event)
+    return events
+
+def create_kill_events(round: models.Round, players: PlayerRegistry | None = None) -> list[KillEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    kill_events: list[KillEvent] = []
+    for kill in round.kills:
+        attacker: PositionedPlayerWithView = players.get_player(
+            steam_id=kill.attacker_steam_id,
+            team=kill.attacker_team,
+            side_acronym=kill.attacker_side,
+            name=kill.attacker_name,
+        ).with_position(
+            position=Position(
+                x=kill.attacker_x,
+                y=kill.attacker_y,
+                z=kill.attacker_z,
+            ),
+            view=View(
+                x=kill.attacker_view_x,
+                y=kill.attacker_view_y,
+            )
+        )
+        victim: PositionedPlayerWithView = players.get_player(
+            steam_id=kill.victim_steam_id,
+            team=kill.victim_team,
+            side_acronym=kill.victim_side,
+            name=kill.victim_name,
+        ).with_position(
+            position=Position(
+                x=kill.victim_x,
+                y=kill.victim_y,
+                z=kill.victim_z,
+            ),
+            view=View(
+                x=kill.victim_view_x,
+                y=kill.victim_view_y,
+            )
+        )
+        assister: Player | None = None
+        if kill.assister_steam_id is not None:
+            assister = players.get_player(
+                steam_id=kill.assister_steam_id,
+                team=kill.assister_team,
+                side_acronym=kill.assister_side,
+                name=kill.assister_name,
+            )
+        flash_thrower: Player | None = None
+        if kill.flash_thrower_steam_id is not None:
+            flash_thrower = players.get_player(
+                steam_id=kill.flash_thrower_steam_id,
+                team=kill.flash_thrower_team,
+                side_acronym=kill.flash_thrower_side,
+                name=kill.flash_thrower_name,
+            )
+        player_traded: Player | None = None
+        if kill.player_traded_steam_id is not None:
+            player_traded = players.get_player(
+                steam_id=kill.player_traded_steam_id,
+                team=kill.player_traded_team,
+                # This Side inference might not always be correct
+                side_acronym=Side.invert(Side.from_acronym(kill.attacker_side)).name,
+                name=kill.player_traded_name,
             )
+        weapon: Weapon = Weapon(
+            name=kill.weapon,
+            weapon_class=kill.weapon_class,
+            ammo_in_magazine=None,  # This info is not available
+            ammo_in_reserve=None,   # This info is not available
+        )
 
-            victim = PositionedPlayerWithView(
-                steam_id=damage.victim_steam_id,
-                team=damage.victim_team,
-                side=Side.from_acronym(damage.victim_side),
-                name=damage.victim_name,
-                position=Position(
-                    x=damage.victim_x,
-                    y=damage.victim_y,
-                    z=damage.victim_z,
-                ),
-                view=View(
-                    x=damage.victim_view_x,
-                    y=damage.victim_view_y,
-                )
+        kill_events.append(KillEvent(
+            tick=kill.tick,
+            seconds=kill.seconds,
+            clock_time=kill.clock_time,
+            attacker=attacker,
+            victim=victim,
+            assister=assister,
+            is_suicide=kill.is_suicide,
+            is_teamkill=kill.is_teamkill,
+            is_wallbang=kill.is_wallbang,
+            penetrated_objects=kill.penetrated_objects,
+            is_first_kill=kill.is_first_kill,
+            is_headshot=kill.is_headshot,
+            is_victim_blinded=kill.is_victim_blinded,
+            is_attacker_blinded=kill.is_attacker_blinded,
+            flash_thrower=flash_thrower,
+            is_no_scope=kill.is_no_scope,
+            is_through_smoke=kill.is_through_smoke,
+            distance=kill.distance,
+            # is_trade: bool
+            player_traded=player_traded,
+            weapon=weapon,
+        ))
+    return kill_events
+
+def create_damage_events(round: models.Round, players: PlayerRegistry | None = None) -> list[DamageEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    damage_events: list[DamageEvent] = []
+    for damage in round.damages:
+        attacker = players.get_player(
+            steam_id=damage.attacker_steam_id,
+            team=damage.attacker_team,
+            side_acronym=damage.attacker_side,
+            name=damage.attacker_name,
+        ).with_position(
+            position=Position(
+                x=damage.attacker_x,
+                y=damage.attacker_y,
+                z=damage.attacker_z,
+            ),
+            view=View(
+                x=damage.attacker_view_x,
+                y=damage.attacker_view_y,
             )
+        )
 
-            weapon = Weapon(
-                name=damage.weapon,
-                weapon_class=damage.weapon_class,
-                ammo_in_magazine=None,  # This info is not available
-                ammo_in_reserve=None,   # This info is not available
+        victim = players.get_player(
+            steam_id=damage.victim_steam_id,
+            team=damage.victim_team,
+            side_acronym=damage.victim_side,
+            name=damage.victim_name,
+        ).with_position(
+            position=Position(
+                x=damage.victim_x,
+                y=damage.victim_y,
+                z=damage.victim_z,
+            ),
+            view=View(
+                x=damage.victim_view_x,
+                y=damage.victim_view_y,
             )
+        )
 
-            damage_events.append(DamageEvent(
-                tick=damage.tick,
-                seconds=damage.seconds,
-                clock_time=damage.clock_time,
-                attacker=attacker,
-                is_attacker_strafe=damage.is_attacker_strafe,
-                victim=victim,
-                weapon=weapon,
-                hp_damage=damage.hp_damage,
-                hp_damage_taken=damage.hp_damage_taken,
-                armor_damage=damage.armor_damage,
-                armor_damage_taken=damage.armor_damage_taken,
-                hit_group=damage.hit_group,
-                is_friendly_fire=damage.is_friendly_fire,
-                distance=damage.distance,
-                zoom_level=damage.zoom_level,
-            ))
-        timeline.events.extend(kill_events)
-
-        grenade_throw_events: list[GrenadeThrowEvent] = []
-        grenade_trigger_events: list[GrenadeTriggerEvent] = []
-        for grenade in round.grenades:
-            thrower = PositionedPlayer(
-                steam_id=grenade.thrower_steam_id,
-                team=grenade.thrower_team,
-                side=Side.from_acronym(grenade.thrower_side),
-                name=grenade.thrower_name,
-                position=Position(
-                    x=grenade.thrower_x,
-                    y=grenade.thrower_y,
-                    z=grenade.thrower_z,
-                )
+        weapon = Weapon(
+            name=damage.weapon,
+            weapon_class=damage.weapon_class,
+            ammo_in_magazine=None,  # This info is not available
+            ammo_in_reserve=None,   # This info is not available
+        )
+
+        damage_events.append(DamageEvent(
+            tick=damage.tick,
+            seconds=damage.seconds,
+            clock_time=damage.clock_time,
+            attacker=attacker,
+            is_attacker_strafe=damage.is_attacker_strafe,
+            victim=victim,
+            weapon=weapon,
+            hp_damage=damage.hp_damage,
+            hp_damage_taken=damage.hp_damage_taken,
+            armor_damage=damage.armor_damage,
+            armor_damage_taken=damage.armor_damage_taken,
+            hit_group=damage.hit_group,
+            is_friendly_fire=damage.is_friendly_fire,
+            distance=damage.distance,
+            zoom_level=damage.zoom_level,
+        ))
+    return damage_events
+
+def create_grenade_throw_events(round: models.Round, players: PlayerRegistry | None = None) -> list[GrenadeThrowEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    grenade_throw_events: list[GrenadeThrowEvent] = []
+    for grenade in round.grenades:
+        thrower = players.get_player(
+            steam_id=grenade.thrower_steam_id,
+            team=grenade.thrower_team,
+            side_acronym=grenade.thrower_side,
+            name=grenade.thrower_name,
+        ).with_position(
+            position=Position(
+                x=grenade.thrower_x,
+                y=grenade.thrower_y,
+                z=grenade.thrower_z,
+            )
+        )
+
+        grenade_throw_events.append(GrenadeThrowEvent(
+            tick=grenade.throw_tick,
+            seconds=grenade.throw_seconds,
+            clock_time=grenade.throw_clock_time,
+            entity_id=grenade.entity_id,
+            grenade_type=grenade.grenade_type,
+            thrower=thrower,
+        ))
+    return grenade_throw_events
+
+def create_grenade_trigger_events(round: models.Round) -> list[GrenadeTriggerEvent]:
+    grenade_trigger_events: list[GrenadeTriggerEvent] = []
+    for grenade in round.grenades:
+        grenade_trigger_events.append(GrenadeTriggerEvent(
+            tick=grenade.destroy_tick,
+            seconds=grenade.destroy_seconds,
+            clock_time=grenade.destroy_clock_time,
+            entity_id=grenade.entity_id,
+            grenade_type=grenade.grenade_type,
+            position=Position(
+                x=grenade.grenade_x,
+                y=grenade.grenade_y,
+                z=grenade.grenade_z,
+            )
+        ))
+    return grenade_trigger_events
+
+def create_bomb_events(round: models.Round, players: PlayerRegistry | None = None) -> list[BombEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    bomb_events: list[BombEvent] = []
+    for bomb in round.bomb_events:
+        player_frame = players.get_player(
+            steam_id=bomb.player_steam_id,
+            team=bomb.player_team,
+            side_acronym=Side.from_bomb_action(bomb.bomb_action).name,
+            name=bomb.player_name,
+        ).with_position(
+            position=Position(
+                x=bomb.player_x,
+                y=bomb.player_y,
+                z=bomb.player_z,
             )
+        )
 
-            grenade_throw_events.append(GrenadeThrowEvent(
-                tick=grenade.throw_tick,
-                seconds=grenade.throw_seconds,
-                clock_time=grenade.throw_clock_time,
-                entity_id=grenade.entity_id,
-                grenade_type=grenade.grenade_type,
-                thrower=thrower,
-            ))
-
-            grenade_trigger_events.append(GrenadeTriggerEvent(
-                tick=grenade.destroy_tick,
-                seconds=grenade.destroy_seconds,
-                clock_time=grenade.destroy_clock_time,
-                entity_id=grenade.entity_id,
-                grenade_type=grenade.grenade_type,
+        bomb_events.append(BombEvent(
+            tick=bomb.tick,
+            seconds=bomb.seconds,
+            clock_time=bomb.clock_time,
+            player=player_frame,
+            bomb_action=bomb.bomb_action,
+            bomb_site=bomb.bomb_site,
+        ))
+        pass
+    return bomb_events
+
+def create_weapon_fire_events(round: models.Round, players: PlayerRegistry | None = None) -> list[WeaponFireEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    weapon_fire_events: list[WeaponFireEvent] = []
+    for weapon_fire in round.weapon_fires:
+        weapon_fire_events.append(WeaponFireEvent(
+            tick=weapon_fire.tick,
+            seconds=weapon_fire.seconds,
+            clock_time=weapon_fire.clock_time,
+            player=players.get_player(
+                steam_id=weapon_fire.player_steam_id,
+                team=weapon_fire.player_team,
+                side_acronym=weapon_fire.player_side,
+                name=weapon_fire.player_name,
+            ).with_position(
                 position=Position(
-                    x=grenade.grenade_x,
-                    y=grenade.grenade_y,
-                    z=grenade.grenade_z,
+                    x=weapon_fire.player_x,
+                    y=weapon_fire.player_y,
+                    z=weapon_fire.player_z,
+                ),
+                view=View(
+                    x=weapon_fire.player_view_x,
+                    y=weapon_fire.player_view_y,
                 )
-            ))
-        timeline.events.extend(grenade_throw_events)
-        timeline.events.extend(grenade_trigger_events)
-
-        bomb_events: list[BombEvent] = []
-        for bomb in round.bomb_events:
-            player_frame = PositionedPlayer(
-                steam_id=bomb.player_steam_id,
-                team=bomb.player_team,
-                side=Side.from_bomb_action(bomb.bomb_action),
-                name=bomb.player_name,
+            ),
+            is_player_strafe=weapon_fire.is_player_strafe,
+            weapon=Weapon(
+                name=weapon_fire.weapon,
+                weapon_class=weapon_fire.weapon_class,
+                ammo_in_magazine=weapon_fire.ammo_in_magazine,
+                ammo_in_reserve=weapon_fire.ammo_in_reserve,
+            ),
+            zoom_level=weapon_fire.zoom_level,
+        ))
+    return weapon_fire_events
+
+def create_flash_events(round: models.Round, players: PlayerRegistry | None = None) -> list[FlashEvent]:
+    if players is None:
+        players = PlayerRegistry()
+    flash_events: list[FlashEvent] = []
+    for flash in round.flashes:
+        flash_events.append(FlashEvent(
+            tick=flash.tick,
+            seconds=flash.seconds,
+            clock_time=flash.clock_time,
+            attacker=players.get_player(
+                steam_id=flash.attacker_steam_id,
+                team=flash.attacker_team,
+                side_acronym=flash.attacker_side,
+                name=flash.attacker_name,
+            ).with_position(
                 position=Position(
-                    x=bomb.player_x,
-                    y=bomb.player_y,
-                    z=bomb.player_z,
-                )
-            )
-
-            bomb_events.append(BombEvent(
-                tick=bomb.tick,
-                seconds=bomb.seconds,
-                clock_time=bomb.clock_time,
-                player=player_frame,
-                bomb_action=bomb.bomb_action,
-                bomb_site=bomb.bomb_site,
-            ))
-            pass
-        timeline.events.extend(bomb_events)
-        
-        weapon_fire_events: list[WeaponFireEvent] = []
-        for weapon_fire in round.weapon_fires:
-            weapon_fire_events.append(WeaponFireEvent(
-                tick=weapon_fire.tick,
-                seconds=weapon_fire.seconds,
-                clock_time=weapon_fire.clock_time,
-                player=PositionedPlayerWithView(
-                    steam_id=weapon_fire.player_steam_id,
-                    team=weapon_fire.player_team,
-                    side=Side.from_acronym(weapon_fire.player_side),
-                    name=weapon_fire.player_name,
-                    position=Position(
-                        x=weapon_fire.player_x,
-                        y=weapon_fire.player_y,
-                        z=weapon_fire.player_z,
-                    ),
-                    view=View(
-                        x=weapon_fire.player_view_x,
-                        y=weapon_fire.player_view_y,
-                    )
+                    x=flash.attacker_x,
+                    y=flash.attacker_y,
+                    z=flash.attacker_z,
                 ),
-                is_player_strafe=weapon_fire.is_player_strafe,
-                weapon=Weapon(
-                    name=weapon_fire.weapon,
-                    weapon_class=weapon_fire.weapon_class,
-                    ammo_in_magazine=weapon_fire.ammo_in_magazine,
-                    ammo_in_reserve=weapon_fire.ammo_in_reserve,
+                view=View(
+                    x=flash.attacker_view_x,
+                    y=flash.attacker_view_y,
                 ),
-                zoom_level=weapon_fire.zoom_level,
-            ))
-        timeline.events.extend(weapon_fire_events)
-
-        flash_events: list[FlashEvent] = []
-        for flash in round.flashes:
-            flash_events.append(FlashEvent(
-                tick=flash.tick,
-                seconds=flash.seconds,
-                clock_time=flash.clock_time,
-                attacker=PositionedPlayerWithView(
-                    steam_id=flash.attacker_steam_id,
-                    team=flash.attacker_team,
-                    side=Side.from_acronym(flash.attacker_side),
-                    name=flash.attacker_name,
-                    position=Position(
-                        x=flash.attacker_x,
-                        y=flash.attacker_y,
-                        z=flash.attacker_z,
-                    ),
-                    view=View(
-                        x=flash.attacker_view_x,
-                        y=flash.attacker_view_y,
-                    ),
+            ),
+            player=players.get_player(
+                steam_id=flash.player_steam_id,
+                team=flash.player_team,
+                side_acronym=flash.player_side,
+                name=flash.player_name,
+            ).with_position(
+                position=Position(
+                    x=flash.player_x,
+                    y=flash.player_y,
+                    z=flash.player_z,
                 ),
-                player=PositionedPlayerWithView(
-                    steam_id=flash.player_steam_id,
-                    team=flash.player_team,
-                    side=Side.from_acronym(flash.player_side),
-                    name=flash.player_name,
-                    position=Position(
-                        x=flash.player_x,
-                        y=flash.player_y,
-                        z=flash.player_z,
-                    ),
-                    view=View(
-                        x=flash.player_view_x,
-                        y=flash.player_view_y,
-                    ),
+                view=View(
+                    x=flash.player_view_x,
+                    y=flash.player_view_y,
                 ),
-                flash_duration=flash.flash_duration,
-            ))
-        timeline.events.extend(flash_events)
-
-        # TODO: Each frame tracks game state
-        # Use this to, by progressing through each frame,
-        # Detect when:
-        # 1. a player significantly changes movement
-        # ->    What this means is TBD
-        # ->    a. Stops moving
-        # ->    b. Starts moving
-        # ->    c. Direction changes by more than a certain amount (15 degrees?)
-        # ->    d. Speed drops by like 70%
-        # 2. a player starts reloading
-        # 3. a player scopes
-        # 4. a player switches weapons
-        # 5. a player's inventory changes
-        # 6. a player buys something from the store
-        # 7. a player dies (this might be redundant)
-        # 8. smoke spawns
-        # 9. smoke despawns
-        # 10.fire spawns
-        # 11.fire despawns
-        # 12.when a player picks up the bomb
-        
-        # Defining a default initial frame
-        # to make the for loop easier to write
-        # TODO Maybe just make this the first frame
-        # previous_frame = models.Frame(
-        #     is_kill_frame=False,
-        #     tick=None,
-        #     seconds=None,
-        #     clock_time=None,
-        #     t=models.TeamFrameState(
-        #         side=Side.T,
-        #         team_name=None,
-        #         team_eq_val=None,
-        #         alive_players=None,
-        #         total_utility=None,
-        #         players=[],
-        #     ),
-        #     ct=models.TeamFrameState(
-        #         side=Side.CT,
-        #         team_name=None,
-        #         team_eq_val=None,
-        #         alive_players=None,
-        #         total_utility=None,
-        #         players=[],
-        #     ),
-        #     bomb_planted=False,
-        #     bomb_site=None,
-        #     bomb=models.Bomb(
-        #         x=None,
-        #         y=None,
-        #         z=None,
-        #     ),
-        #     projectiles=[],
-        #     smokes=[],
-        #     fires=[],
-        # )
-        previous_frame = round.frames[0]
-        for frame in round.frames[1:]:
-            # Perform checks!
-
-            previous_team_frame: models.TeamFrameState
-            team_frame: models.TeamFrameState
-            previous_player_frame: models.PlayerFrameState = None
-            player_frame: models.PlayerFrameState = None
-            for (previous_team_frame, team_frame) in [(previous_frame.ct, frame.ct), (previous_frame.t, frame.t)]:
-                for (previous_player_frame, player_frame) in zip(previous_team_frame.players, team_frame.players): # Maybe change this to team.alive_players if I want to
-                    
-                    # Stop moving check
-                    if player_frame.is_moving() == False and previous_player_frame.is_moving() == True:
-                        timeline.events.append(StoppingMovingEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                        ))
-                        
-                    # Start moving check
-                    if player_frame.is_moving() == True and previous_player_frame.is_moving() == False:
-                        timeline.events.append(StoppingMovingEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                        ))
-
-                    # Direction change check
-                    v1 = (player_frame.velocity_x, player_frame.velocity_y, player_frame.velocity_z)
-                    v2 = (previous_player_frame.velocity_x, previous_player_frame.velocity_y, previous_player_frame.velocity_z)
-                    degrees_apart = 180*np.arccos(np.dot(v1,v2)/(np.linalg.norm(v1)*np.linalg.norm(v2)))/np.pi
-                    SIGNIFICANT_DEGREE_CHANGE: float = 15.0
-                    if degrees_apart > SIGNIFICANT_DEGREE_CHANGE:
-                        timeline.events.append(DirectionChangeEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            old_velocity=v2,
-                            new_velocity=v1,
-                        ))
-
-                    # Speed drop check
-                    player_speed = np.linalg.norm([player_frame.velocity_x, player_frame.velocity_y, player_frame.velocity_z])
-                    last_frame_player_speed = np.linalg.norm([previous_player_frame.velocity_x, previous_player_frame.velocity_y, previous_player_frame.velocity_z])
-                    SIGNIFICANT_SPEED_CUT: float = 0.7
-                    if player_speed < last_frame_player_speed*SIGNIFICANT_SPEED_CUT:
-                        timeline.events.append(SlowedSpeedEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            old_speed=last_frame_player_speed,
-                            new_speed=player_speed,
-                        ))
-
-                    # Reload start check
-                    if player_frame.is_reloading == True and previous_player_frame.is_reloading == False:
-                        timeline.events.append(ReloadStartEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            weapon=player_frame.inventory[0],
-                        ))
-
-                    # Reload finish check
-                    if (
-                        player_frame.is_reloading == False and previous_player_frame.is_reloading == True and
-                        len(player_frame.inventory) > 0 and len(previous_player_frame.inventory) > 0 and
-                        player_frame.inventory[0] == previous_player_frame.inventory[0] and
-                        player_frame.inventory[0].ammo_in_magazine > previous_player_frame.inventory[0].ammo_in_magazine
-                    ):
-                        timeline.events.append(ReloadFinishEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            weapon=player_frame.inventory[0],
-                        ))
-
-                    # Reload cancel check
-                    if (
-                        player_frame.is_reloading == False and previous_player_frame.is_reloading == True and
-                        len(player_frame.inventory) > 0 and len(previous_player_frame.inventory) > 0 and
-                        (player_frame.inventory[0] != previous_player_frame.inventory[0] or
-                        player_frame.inventory[0].ammo_in_magazine <= previous_player_frame.inventory[0].ammo_in_magazine)
-                    ):
-                        timeline.events.append(ReloadCancelEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            # weapon=player_frame.inventory[0],
-                            weapon=previous_player_frame.inventory[0],
-                        ))
-
-                    # Scope check
-                    if player_frame.is_scoped == True and previous_player_frame.is_scoped == False:
-                        timeline.events.append(ScopeEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            weapon=player_frame.inventory[0],
-                        ))
-
-                    # Unscope check
-                    if player_frame.is_scoped == False and previous_player_frame.is_scoped == True:
-                        timeline.events.append(UnscopeEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            weapon=player_frame.inventory[0] if len(player_frame.inventory) > 0 else None,
-                        ))
-
-                    # Switch weapon check
-                    if (
-                        len(player_frame.inventory) > 0 and len(previous_player_frame.inventory) > 0 and
-                        player_frame.inventory[0] != previous_player_frame.inventory[0]
-                    ):
-                        timeline.events.append(WeaponSwitchEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            previous_weapon=previous_player_frame.inventory[0],
-                            new_weapon=player_frame.inventory[0],
-                        ))
-
-                    # Inventory change check
-                    combined_inventory: list[Weapon] = player_frame.inventory + previous_player_frame.inventory
-                    inventory_difference = [w for w in combined_inventory if w not in player_frame.inventory or w not in previous_player_frame.inventory]
-                    if len(inventory_difference) > 0:
-                        timeline.events.append(InventoryChangeEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayerWithView(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                                view=View(
-                                    x=player_frame.view_x,
-                                    y=player_frame.view_y,
-                                ),
-                            ),
-                            old_inventory=previous_player_frame.inventory,
-                            updated_inventory=player_frame.inventory,
-                        ))
-
-                    # Buy check
-                    # TODO: Do this if we are implementing BuyCheckEvent(s)
-
-                    # Death check
-                    if player_frame.is_alive == False and previous_player_frame.is_alive == True:
-                        timeline.events.append(DeathEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayer(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                            ),
-                        ))
-
-                    # Bomb pickup check
-                    if player_frame.has_bomb == True and previous_player_frame.has_bomb == False:
-                        timeline.events.append(BombPickupEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayer(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                            ),
-                        ))
-
-                    # Bomb drop check
-                    if player_frame.has_bomb == False and previous_player_frame.has_bomb == True:
-                        timeline.events.append(BombDropEvent(
-                            tick=frame.tick,
-                            seconds=frame.seconds,
-                            clock_time=frame.clock_time,
-                            player=PositionedPlayer(
-                                steam_id=player_frame.steam_id,
-                                team=player_frame.team,
-                                side=Side.from_acronym(player_frame.side),
-                                name=player_frame.name,
-                                position=Position(
-                                    x=player_frame.x,
-                                    y=player_frame.y,
-                                    z=player_frame.z,
-                                ),
-                            ),
-                        ))
-
-            # Non-team specific checks:
-
-            # Smoke spawn/despawn check
-            current_smokes: list[models.Smoke] = frame.smokes
-            previous_smokes: list[models.Smoke] = previous_frame.smokes
-            spawned_smokes: list[models.Smoke] = [s for s in current_smokes if s not in previous_smokes]
-            despawned_smokes: list[models.Smoke] = [s for s in previous_smokes if s not in current_smokes]
-            for smoke in spawned_smokes:
-                timeline.events.append(SmokeSpawnEvent(
-                    tick=frame.tick,
-                    seconds=frame.seconds,
-                    clock_time=frame.clock_time,
-                    grenade_entity_id=smoke.grenade_entity_id,
-                    position=Position(
-                        x=smoke.x,
-                        y=smoke.y,
-                        z=smoke.z,
-                    )
-                ))
-            for smoke in despawned_smokes:
-                timeline.events.append(SmokeDespawnEvent(
-                    tick=frame.tick,
-                    seconds=frame.seconds,
-                    clock_time=frame.clock_time,
-                    grenade_entity_id=smoke.grenade_entity_id,
-                    position=Position(
-                        x=smoke.x,
-                        y=smoke.y,
-                        z=smoke.z,
-                    )
-                ))
-
-            # Fire spawn/despawn check
-            current_fires: list[models.Fire] = frame.fires
-            previous_fires: list[models.Fire] = previous_frame.fires
-            spawned_fires: list[models.Fire] = [f for f in current_fires if f not in previous_fires]
-            despawned_fires: list[models.Fire] = [f for f in previous_fires if f not in current_fires]
-            for fire in spawned_fires:
-                timeline.events.append(FireSpawnEvent(
-                    tick=frame.tick,
-                    seconds=frame.seconds,
-                    clock_time=frame.clock_time,
-                    unique_id=fire.unique_id,
-                    position=Position(
-                        x=fire.x,
-                        y=fire.y,
-                        z=fire.z,
-                    )
-                ))
-            for fire in despawned_fires:
-                timeline.events.append(FireDespawnEvent(
-                    tick=frame.tick,
-                    seconds=frame.seconds,
-                    clock_time=frame.clock_time,
-                    unique_id=fire.unique_id,
-                    position=Position(
-                        x=fire.x,
-                        y=fire.y,
-                        z=fire.z,
-                    )
-                ))
-
-            previous_frame = frame
+            ),
+            flash_duration=flash.flash_duration,
+        ))
+    return flash_events
+
+def _get_tick(event: Event) -> int:
+    return event.tick
+
+def iter_round_events(round: models.Round, registry: DetectorRegistry | None = None) -> Iterator[Event]:
+    """
+    Yields the event objects for a single round, in chronological order
+    Each enabled "round" detector's events (and the frame diff events) are already in tick order (or nearly, so sorting them is cheap),
+    so they are k-way merged instead of sorting the whole round at once
+    Events with the same tick come out in the order of the registry's detectors, the same as a stable sort of all of them would give
+    """
+    if registry is None:
+        registry = DetectorRegistry()
+    event_streams: list[list[Event]] = [
+        sorted(registry.run_round_detector(detector, round), key=_get_tick) for detector in registry.get_detectors("round")
+    ]
+    event_streams.append(sorted(create_frame_events(round, registry), key=_get_tick))
+    return heapq.merge(*event_streams, key=_get_tick)
+
+def create_round_events(round: models.Round, registry: DetectorRegistry | None = None) -> list[Event]:
+    """
+    Create the event objects for a single round, in chronological order
+    """
+    return list(iter_round_events(round, registry))
+
+def create_connection_events(demo: models.Demo) -> list[PlayerConnectionEvent]:
+    """
+    Create an event for every player connection/disconnection in the demo
+    """
+    connection_events: list[PlayerConnectionEvent] = []
+    for connection in demo.player_connections:
+        connection_events.append(PlayerConnectionEvent(
+            tick=connection.tick,
+            steam_id=connection.steam_id,
+            action=connection.action,
+        ))
+    return connection_events
+
+def create_demo_events(demo: models.Demo, registry: DetectorRegistry | None = None) -> list[Event]:
+    """
+    Create the events of every enabled "demo" detector (the ones that aren't about a single round, i.e. player connections)
+    """
+    if registry is None:
+        registry = DetectorRegistry()
+    events: list[Event] = []
+    for detector in registry.get_detectors("demo"):
+        events.extend(detector.run(demo))
+    return events
+
+def create_timeline(demo: models.Demo, registry: DetectorRegistry | None = None) -> Timeline:
+    """
+    Go through the demo file and create appropriate event objects and add them to a Timeline
+    Pass a DetectorRegistry to choose which events are created (by default, all of them are)
+    """
+    if registry is None:
+        registry = DetectorRegistry()
+    timeline: Timeline = Timeline(events=[])
+    timeline.events.extend(create_demo_events(demo, registry))
+
+    for round in demo.game_rounds:
+        timeline.events.extend(create_round_events(round, registry))
 
     # Sort events into chronological order
     sorted_timeline = Timeline(events=sorted(timeline.events, key=lambda event: event.tick))
     return sorted_timeline
 
+def iter_timeline(demo: models.Demo, registry: DetectorRegistry | None = None) -> Iterator[Event]:
+    """
+    Yields the events of create_timeline(demo) one round at a time, so the whole timeline is never held in memory
+    Only one round's events are created at a time, which relies on rounds not overlapping (true of every demo)
+    Connection events are merged in between the rounds' events by tick
+    """
+    if registry is None:
+        registry = DetectorRegistry()
+    demo_events: list[Event] = sorted(create_demo_events(demo, registry), key=_get_tick)
+    round_events: Iterator[Event] = (event for round in demo.game_rounds for event in iter_round_events(round, registry))
+    return heapq.merge(demo_events, round_events, key=_get_tick)
+
+@dataclass
+class RoundProgress:
+    """
+    How much of a round a TimelineBuilder has already made events for
+    """
+    # Detector name -> how many rows of its source_field list it has been given
+    source_counts: dict[str, int] = field(default_factory=dict)
+    frame_count: int = 0
+    # The last frame diffed (so every player's previous PlayerFrameState), which the next new frame is compared to
+    last_frame: models.Frame | None = None
+    # Detector name -> the events the detectors that look at the round as a whole (i.e. round_state) made the last time the round was added
+    whole_round_events: dict[str, list[Event]] = field(default_factory=dict)
+
+def _with_fields(source: typing.Any, **changes: typing.Any) -> typing.Any:
+    """
+    A shallow copy of a models object (or one of decoding.py's structs, which dataclasses.replace doesn't take) with some fields changed
+    """
+    source_copy: typing.Any = copy.copy(source)
+    for name, value in changes.items():
+        setattr(source_copy, name, value)
+    return source_copy
+
+class TimelineBuilder:
+    """
+    Builds a timeline a bit at a time - each call only makes the events for what it hasn't seen before,
+    so adding round N + 1 (or re-adding a demo that was re-parsed with more rounds) doesn't redo the rounds before it
+    A round can also be added more than once as it grows (i.e. while the demo is still being parsed):
+    only its new kills, damages, ... are turned into events, and its new frames are diffed starting from the last frame seen
+    The events about the round as a whole (its start, freeze time end and end) are made again each time, and replace the ones made before
+    if they changed (i.e. a RoundEndEvent made before the round had ended)
+    Adding every round of a demo in order gives the same events as create_timeline(demo)
+
+    Usage:
+        builder = TimelineBuilder()
+        builder.add_demo(demo)
+        new_events = builder.add_round(next_round)
+        timeline = builder.get_timeline()
+    """
+
+    def __init__(self, registry: DetectorRegistry | None = None) -> None:
+        self.registry: DetectorRegistry = DetectorRegistry() if registry is None else registry
+        self.demo_events: list[Event] = []
+        self.round_events: list[Event] = []
+        # Detector name -> how many rows of its source_field list of the demo it has been given
+        self.demo_source_counts: dict[str, int] = {}
+        self.round_progress: dict[int, RoundProgress] = {}
+
+    def _take_new_rows(self, source: typing.Any, detector: Detector, source_counts: dict[str, int]) -> list:
+        rows: list = getattr(source, detector.source_field)
+        start: int = source_counts.get(detector.name, 0)
+        source_counts[detector.name] = len(rows)
+        return rows[start:]
+
+    def add_demo_events(self, demo: models.Demo) -> list[Event]:
+        """
+        Makes the events of the "demo" detectors (i.e. player connections) that haven't been made yet and returns them
+        """
+        new_events: list[Event] = []
+        for detector in self.registry.get_detectors("demo"):
+            if detector.source_field is None:
+                if detector.name in self.demo_source_counts:
+                    continue
+                self.demo_source_counts[detector.name] = 0
+                new_events.extend(detector.run(demo))
+            else:
+                new_events.extend(detector.run(_with_fields(demo, **{detector.source_field: self._take_new_rows(demo, detector, self.demo_source_counts)})))
+        new_events = sorted(new_events, key=_get_tick)
+        self.demo_events = list(heapq.merge(self.demo_events, new_events, key=_get_tick))
+        return new_events
+
+    def add_round(self, round: models.Round) -> list[Event]:
+        """
+        Makes the events of the parts of the round that haven't been seen yet and returns them (in chronological order)
+        Rounds are told apart by round_number, and should be added in order
+        Events about the round as a whole that changed since the round was last added are returned again,
+        and the ones returned before are taken out of the timeline
+        """
+        progress: RoundProgress | None = self.round_progress.get(round.round_number, None)
+        if progress is None:
+            progress = RoundProgress()
+            self.round_progress[round.round_number] = progress
+
+        event_streams: list[list[Event]] = []
+        replaced_events: list[Event] = []
+        for detector in self.registry.get_detectors("round"):
+            if detector.source_field is None:
+                # Detectors that look at the round as a whole (i.e. round_state) are cheap, so they are run again every time
+                whole_round_events: list[Event] = sorted(self.registry.run_round_detector(detector, round), key=_get_tick)
+                previous_events: list[Event] | None = progress.whole_round_events.get(detector.name, None)
+                if previous_events is not None and previous_events == whole_round_events:
+                    continue
+                replaced_events.extend(previous_events or [])
+                progress.whole_round_events[detector.name] = whole_round_events
+                event_streams.append(whole_round_events)
+                continue
+            new_rows: list = self._take_new_rows(round, detector, progress.source_counts)
+            if len(new_rows) > 0:
+                event_streams.append(sorted(self.registry.run_round_detector(detector, _with_fields(round, **{detector.source_field: new_rows})), key=_get_tick))
+
+        new_frames: list[models.Frame] = round.frames[progress.frame_count:]
+        if len(new_frames) > 0:
+            frames_to_diff: list[models.Frame] = new_frames if progress.last_frame is None else [progress.last_frame] + new_frames
+            event_streams.append(sorted(create_frame_events(_with_fields(round, frames=frames_to_diff), self.registry), key=_get_tick))
+            progress.frame_count = len(round.frames)
+            progress.last_frame = round.frames[-1]
+
+        new_events: list[Event] = list(heapq.merge(*event_streams, key=_get_tick))
+        if len(replaced_events) > 0:
+            # The replacements don't have to be later than every event made so far, so they are merged in rather than added to the end
+            replaced_ids: set[int] = set(map(id, replaced_events))
+            kept_events: list[Event] = [event for event in self.round_events if id(event) not in replaced_ids]
+            self.round_events = list(heapq.merge(kept_events, new_events, key=_get_tick))
+        else:
+            self.round_events.extend(new_events)
+        return new_events
+
+    def add_demo(self, demo: models.Demo) -> list[Event]:
+        """
+        Adds the demo's events and every one of its rounds, returning the events that are new
+        """
+        new_events: list[Event] = self.add_demo_events(demo)
+        for round in demo.game_rounds:
+            new_events.extend(self.add_round(round))
+        return sorted(new_events, key=_get_tick)
+
+    def get_timeline(self) -> Timeline:
+        return Timeline(events=list(heapq.merge(self.demo_events, self.round_events, key=_get_tick)))
+
 # TODO: Add __str__ methods to every data class
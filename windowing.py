@@ -0,0 +1,313 @@
+import csv
+import math
+import operator
+import typing
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+import numpy as np
+import timelining
+
+# Per-window statistics (kills, damage dealt, shots fired, ... per player and per team every 5, 10 and 15 seconds, see parsing_2.parse)
+# computed in one pass over a tick-sorted timeline.
+# Each event is looked at once: every metric that counts its class adds the event's value to a (round, base bucket, subject, metric) cell,
+# where the base bucket is the greatest common divisor of every window size and step. Every window (tumbling or sliding) is then a sum of
+# consecutive base buckets, which is a difference of cumulative sums - so asking for more window sizes doesn't mean going over the events again.
+# Windows are measured from the start of each round (its RoundStartEvent), like resampling measures intervals from a round's first frame.
+
+PLAYER: str = "player"
+TEAM: str = "team"
+
+ROW_FIELD_NAMES: list[str] = [
+    "round_number", "window_seconds", "step_seconds", "window_start_tick", "window_end_tick", "window_start_seconds",
+    "subject_kind", "steam_id", "name", "team", "metric", "value",
+]
+
+@dataclass
+class Metric:
+    """
+    One statistic that can be aggregated over windows
+    For every event of one of its event_classes, get_player returns who it counts for (None to not count the event)
+    and get_value returns how much it counts for
+    Each event also counts for the team of the player it counts for
+    """
+    name: str
+    event_classes: tuple[type, ...]
+    get_player: typing.Callable[[timelining.Event], timelining.Player | None]
+    get_value: typing.Callable[[timelining.Event], float] = lambda event: 1
+
+def _get_killer(kill: timelining.KillEvent) -> timelining.Player | None:
+    # Suicides and team kills don't count as kills
+    if kill.is_suicide or kill.is_teamkill:
+        return None
+    return kill.attacker
+
+def _get_damager(damage: timelining.DamageEvent) -> timelining.Player | None:
+    return None if damage.is_friendly_fire else damage.attacker
+
+def _get_enemy_flasher(flash: timelining.FlashEvent) -> timelining.Player | None:
+    if flash.attacker is None or flash.player is None or flash.attacker.side == flash.player.side:
+        return None
+    return flash.attacker
+
+def get_default_metrics() -> list[Metric]:
+    """
+    The metrics asked for in parsing_2.parse's requirements
+    """
+    return [
+        Metric("kills", (timelining.KillEvent,), _get_killer),
+        Metric("deaths", (timelining.KillEvent,), operator.attrgetter("victim")),
+        Metric("damage_dealt", (timelining.DamageEvent,), _get_damager, operator.attrgetter("hp_damage_taken")),
+        Metric("shots_fired", (timelining.WeaponFireEvent,), operator.attrgetter("player")),
+        Metric("enemies_flashed", (timelining.FlashEvent,), _get_enemy_flasher),
+        Metric("flash_seconds", (timelining.FlashEvent,), _get_enemy_flasher, operator.attrgetter("flash_duration")),
+        Metric("utility_thrown", (timelining.GrenadeThrowEvent,), operator.attrgetter("thrower")),
+        Metric(
+            "movement_changes",
+            (timelining.StartingMovingEvent, timelining.StoppingMovingEvent, timelining.DirectionChangeEvent, timelining.SlowedSpeedEvent),
+            operator.attrgetter("player"),
+        ),
+    ]
+
+@dataclass(frozen=True)
+class Window:
+    """
+    Windows of seconds long, starting every step_seconds (every seconds - one after the other - if step_seconds is None)
+    A step shorter than the window makes sliding windows, i.e. Window(10, 1) is the last 10 seconds as of every second
+    """
+    seconds: float
+    step_seconds: float | None = None
+
+    def get_step_seconds(self) -> float:
+        return self.seconds if self.step_seconds is None else self.step_seconds
+
+    def get_ticks(self, tick_rate: int) -> tuple[int, int]:
+        """
+        The window's (size, step) in ticks
+        """
+        ticks: list[int] = []
+        for seconds in (self.seconds, self.get_step_seconds()):
+            window_ticks: float = seconds * tick_rate
+            if window_ticks <= 0 or window_ticks != round(window_ticks):
+                raise ValueError(f"Windows have to be a positive whole number of ticks long, got {seconds} seconds at {tick_rate} ticks per second")
+            ticks.append(int(round(window_ticks)))
+        return (ticks[0], ticks[1])
+
+DEFAULT_WINDOWS: list[Window] = [Window(5), Window(10), Window(15)]
+
+@dataclass
+class WindowedRound:
+    round_number: int
+    start_tick: int
+    end_tick: int # The last tick of the round (its official end, or the last event a metric counts if that is later)
+    values: np.ndarray # [subject, metric, base bucket]
+
+class WindowedStats:
+    """
+    The aggregated metrics of every subject (player or team) in every window of every round
+
+    Usage:
+        stats = aggregate_timeline(timeline.events, demo.tick_rate, [Window(5), Window(10, 1)])
+        stats.write_csv("windowed_stats.csv")
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[Window],
+        metrics: Sequence[Metric],
+        subjects: list[tuple[str, int | None, str | None, str | None]],
+        rounds: list[WindowedRound],
+        tick_rate: int,
+        base_ticks: int,
+    ) -> None:
+        self.windows: list[Window] = list(windows)
+        self.metrics: list[Metric] = list(metrics)
+        # (subject kind, steam id, name, team) - teams have no steam id or name
+        self.subjects: list[tuple[str, int | None, str | None, str | None]] = subjects
+        self.rounds: list[WindowedRound] = rounds
+        self.tick_rate: int = tick_rate
+        self.base_ticks: int = base_ticks
+
+    def get_window_values(self, windowed_round: WindowedRound, window: Window) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the start tick of every window of the round and [subject, metric, window] values
+        Every window that starts before the round's end is included (the last ones can run past it)
+        """
+        window_ticks, step_ticks = window.get_ticks(self.tick_rate)
+        window_buckets: int = window_ticks // self.base_ticks
+        step_buckets: int = step_ticks // self.base_ticks
+        bucket_count: int = windowed_round.values.shape[-1]
+        starts: np.ndarray = np.arange(0, bucket_count, step_buckets)
+        totals: np.ndarray = np.zeros(windowed_round.values.shape[:-1] + (bucket_count + 1,))
+        np.cumsum(windowed_round.values, axis=-1, out=totals[..., 1:])
+        ends: np.ndarray = np.minimum(starts + window_buckets, bucket_count)
+        # Rounded so that non-integer values (i.e. flash durations) that cancel out come back as exactly 0
+        return (windowed_round.start_tick + starts * self.base_ticks, np.round(totals[..., ends] - totals[..., starts], 9))
+
+    def iter_rows(self, include_zeros: bool = True) -> Iterator[list]:
+        """
+        Yields one tidy row (see ROW_FIELD_NAMES) per round, window, subject and metric
+        Without include_zeros, rows with a value of 0 are left out
+        """
+        for windowed_round in self.rounds:
+            for window in self.windows:
+                window_ticks: int = window.get_ticks(self.tick_rate)[0]
+                start_ticks, values = self.get_window_values(windowed_round, window)
+                if include_zeros:
+                    subject_indexes, metric_indexes, window_indexes = np.indices(values.shape).reshape(3, -1)
+                else:
+                    subject_indexes, metric_indexes, window_indexes = np.nonzero(values)
+                # Ordered by window, then subject, then metric
+                order: np.ndarray = np.lexsort((metric_indexes, subject_indexes, window_indexes))
+                for subject_index, metric_index, window_index in zip(
+                    subject_indexes[order].tolist(), metric_indexes[order].tolist(), window_indexes[order].tolist()
+                ):
+                    start_tick: int = int(start_ticks[window_index])
+                    subject_kind, steam_id, name, team = self.subjects[subject_index]
+                    value: float = float(values[subject_index, metric_index, window_index])
+                    yield [
+                        windowed_round.round_number, window.seconds, window.get_step_seconds(), start_tick, start_tick + window_ticks,
+                        (start_tick - windowed_round.start_tick) / self.tick_rate,
+                        subject_kind, steam_id, name, team, self.metrics[metric_index].name,
+                        int(value) if value.is_integer() else value,
+                    ]
+
+    def write_csv(self, file_path: str, include_zeros: bool = True) -> None:
+        with open(file_path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(ROW_FIELD_NAMES)
+            writer.writerows(self.iter_rows(include_zeros))
+
+    def __repr__(self) -> str:
+        return f"WindowedStats({len(self.rounds)} rounds, {len(self.windows)} windows, {len(self.subjects)} subjects, {len(self.metrics)} metrics)"
+
+class WindowAggregator:
+    """
+    Aggregates events as they are given (i.e. as a timeline is streamed), in one pass
+    The events have to be in tick order
+
+    Usage:
+        aggregator = WindowAggregator(demo.tick_rate)
+        aggregator.add_events(timelining.iter_timeline(demo))
+        stats = aggregator.get_stats()
+    """
+
+    def __init__(self, tick_rate: int, windows: Sequence[Window] = DEFAULT_WINDOWS, metrics: Sequence[Metric] | None = None) -> None:
+        if len(windows) == 0:
+            raise ValueError("At least one window is needed")
+        self.tick_rate: int = tick_rate
+        self.windows: list[Window] = list(windows)
+        self.metrics: list[Metric] = get_default_metrics() if metrics is None else list(metrics)
+        # Every window size and step is a whole number of base buckets
+        self.base_ticks: int = math.gcd(*[ticks for window in self.windows for ticks in window.get_ticks(tick_rate)])
+        # Event class -> the (metric index, metric) of every metric that counts it
+        self.class_metrics: dict[type, list[tuple[int, Metric]]] = {}
+        for metric_index, metric in enumerate(self.metrics):
+            for event_class in metric.event_classes:
+                self.class_metrics.setdefault(event_class, []).append((metric_index, metric))
+
+        self.subjects: list[tuple[str, int | None, str | None, str | None]] = []
+        self.player_subjects: dict[int, tuple[int, int]] = {} # Steam id -> (player subject index, team subject index)
+        self.team_subjects: dict[str | None, int] = {}
+        self.rounds: list[WindowedRound] = []
+        # The current round's contributions, one list per column
+        self.round_number: int = 0
+        self.round_start_tick: int = 0
+        self.round_end_tick: int = 0
+        self.buckets: list[int] = []
+        self.subject_indexes: list[int] = []
+        self.metric_indexes: list[int] = []
+        self.values: list[float] = []
+
+    def _get_subject_indexes(self, player: timelining.Player) -> tuple[int, int]:
+        subject_indexes: tuple[int, int] | None = self.player_subjects.get(player.steam_id, None)
+        if subject_indexes is None:
+            team_index: int | None = self.team_subjects.get(player.team, None)
+            if team_index is None:
+                team_index = len(self.subjects)
+                self.team_subjects[player.team] = team_index
+                self.subjects.append((TEAM, None, None, player.team))
+            subject_indexes = (len(self.subjects), team_index)
+            self.player_subjects[player.steam_id] = subject_indexes
+            self.subjects.append((PLAYER, player.steam_id, player.name, player.team))
+        return subject_indexes
+
+    def _build_round(self) -> WindowedRound | None:
+        """
+        The current round's values (None if nothing has happened before the first round started)
+        """
+        if self.round_number == 0 and len(self.values) == 0:
+            return None
+        bucket_count: int = (self.round_end_tick - self.round_start_tick) // self.base_ticks + 1
+        subject_count: int = len(self.subjects)
+        metric_count: int = len(self.metrics)
+        cells: np.ndarray = (
+            (np.array(self.subject_indexes, dtype=np.int64) * metric_count + np.array(self.metric_indexes, dtype=np.int64)) * bucket_count
+            + np.array(self.buckets, dtype=np.int64)
+        )
+        values: np.ndarray = np.bincount(
+            cells, weights=np.array(self.values, dtype=np.float64), minlength=subject_count * metric_count * bucket_count
+        ).reshape(subject_count, metric_count, bucket_count)
+        return WindowedRound(self.round_number, self.round_start_tick, self.round_end_tick, values)
+
+    def _finish_round(self) -> None:
+        windowed_round: WindowedRound | None = self._build_round()
+        if windowed_round is not None:
+            self.rounds.append(windowed_round)
+        self.buckets, self.subject_indexes, self.metric_indexes, self.values = [], [], [], []
+
+    def add_events(self, events: Iterable[timelining.Event]) -> None:
+        for event in events:
+            if isinstance(event, timelining.RoundStartEvent):
+                self._finish_round()
+                self.round_number += 1
+                self.round_start_tick = event.tick
+                self.round_end_tick = event.tick
+                continue
+            if isinstance(event, timelining.RoundEndEvent):
+                self.round_end_tick = max(self.round_end_tick, event.official_tick)
+            # Only the round's end and the events that are counted make the round longer
+            # (not i.e. a player connecting long after the round is over, which would add empty windows)
+            class_metrics: list[tuple[int, Metric]] | None = self.class_metrics.get(event.__class__, None)
+            if class_metrics is None:
+                continue
+            bucket: int = (event.tick - self.round_start_tick) // self.base_ticks
+            for metric_index, metric in class_metrics:
+                player: timelining.Player | None = metric.get_player(event)
+                if player is None:
+                    continue
+                value: float = metric.get_value(event)
+                self.round_end_tick = max(self.round_end_tick, event.tick)
+                for subject_index in self._get_subject_indexes(player):
+                    self.buckets.append(bucket)
+                    self.subject_indexes.append(subject_index)
+                    self.metric_indexes.append(metric_index)
+                    self.values.append(value)
+
+    def get_stats(self) -> WindowedStats:
+        """
+        The stats of every event given so far (the round that is in progress counts as ending at the last event a metric counted)
+        """
+        rounds: list[WindowedRound] = list(self.rounds)
+        current_round: WindowedRound | None = self._build_round()
+        if current_round is not None:
+            rounds.append(current_round)
+        # Rounds finished before a subject was first seen have no rows for it yet
+        subject_count: int = len(self.subjects)
+        for windowed_round in rounds:
+            missing_count: int = subject_count - windowed_round.values.shape[0]
+            if missing_count > 0:
+                windowed_round.values = np.concatenate([windowed_round.values, np.zeros((missing_count,) + windowed_round.values.shape[1:])])
+        return WindowedStats(self.windows, self.metrics, self.subjects, rounds, self.tick_rate, self.base_ticks)
+
+def aggregate_timeline(
+    events: Iterable[timelining.Event],
+    tick_rate: int,
+    windows: Sequence[Window] = DEFAULT_WINDOWS,
+    metrics: Sequence[Metric] | None = None,
+) -> WindowedStats:
+    """
+    Aggregates the metrics (all of get_default_metrics by default) of a tick-sorted timeline's events over every window
+    """
+    aggregator: WindowAggregator = WindowAggregator(tick_rate, windows, metrics)
+    aggregator.add_events(events)
+    return aggregator.get_stats()